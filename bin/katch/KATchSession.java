@@ -0,0 +1,74 @@
+import java.io.BufferedReader;
+import java.io.ByteArrayOutputStream;
+import java.io.FileDescriptor;
+import java.io.FileOutputStream;
+import java.io.InputStreamReader;
+import java.io.OutputStream;
+import java.io.PrintStream;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.nio.charset.StandardCharsets;
+import java.util.jar.JarFile;
+
+/**
+ * Keeps one JVM with KATch loaded and runs many NKPL files through it.
+ *
+ * Usage: java -cp <katch jar> KATchSession.java <katch jar>
+ *
+ * Reads one NKPL file path per line from stdin. For every path, it runs
+ * KATch's main method with the arguments "run <path>" and writes back the
+ * captured output as two frames:
+ *
+ *   OUT <byte count>\n<bytes>ERR <byte count>\n<bytes>
+ *
+ * Exceptions thrown by KATch (e.g. failed checks) are written to the ERR frame.
+ */
+public class KATchSession {
+    public static void main(String[] args) throws Exception {
+        if (args.length != 1) {
+            System.err.println("Usage: KATchSession <path to KATch jar>");
+            System.exit(1);
+        }
+        OutputStream protocol = new FileOutputStream(FileDescriptor.out);
+
+        // Replace the standard streams before any KATch class is loaded, so that
+        // Scala's Console picks up the capturing streams as its defaults.
+        ByteArrayOutputStream outBuf = new ByteArrayOutputStream();
+        ByteArrayOutputStream errBuf = new ByteArrayOutputStream();
+        PrintStream out = new PrintStream(outBuf, true, "UTF-8");
+        PrintStream err = new PrintStream(errBuf, true, "UTF-8");
+        System.setOut(out);
+        System.setErr(err);
+
+        String mainClassName;
+        try (JarFile jar = new JarFile(args[0])) {
+            mainClassName = jar.getManifest().getMainAttributes().getValue("Main-Class");
+        }
+        Method katchMain = Class.forName(mainClassName).getMethod("main", String[].class);
+
+        BufferedReader in =
+                new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        String filePath;
+        while ((filePath = in.readLine()) != null) {
+            outBuf.reset();
+            errBuf.reset();
+            try {
+                katchMain.invoke(null, (Object) new String[] {"run", filePath});
+            } catch (InvocationTargetException e) {
+                err.println(e.getCause());
+            } catch (Throwable e) {
+                err.println(e);
+            }
+            out.flush();
+            err.flush();
+            writeFrame(protocol, "OUT", outBuf.toByteArray());
+            writeFrame(protocol, "ERR", errBuf.toByteArray());
+            protocol.flush();
+        }
+    }
+
+    private static void writeFrame(OutputStream os, String name, byte[] data) throws Exception {
+        os.write((name + " " + data.length + "\n").getBytes(StandardCharsets.UTF_8));
+        os.write(data);
+    }
+}
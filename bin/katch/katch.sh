@@ -12,5 +12,11 @@ fi
 SCRIPT_PATH=$(dirname $(realpath -s $0))
 file=$(realpath -s ${@:2})
 
-cd $SCRIPT_PATH
-"$_java" -Xss10m -Xmx128g -jar $SCRIPT_PATH/KATch-assembly-0.1.0-SNAPSHOT.jar $1 $file && rm -rf $SCRIPT_PATH/kat
+# KATch writes its files to the working directory, so every run gets its own
+# directory, as several runs may be active at the same time
+WORK_DIR=$(mktemp -d)
+trap 'rm -rf "$WORK_DIR"' EXIT
+mkdir "$WORK_DIR/results"
+
+cd "$WORK_DIR"
+"$_java" -Xss10m -Xmx128g -jar $SCRIPT_PATH/KATch-assembly-0.1.0-SNAPSHOT.jar $1 $file
@@ -0,0 +1,25 @@
+#!/bin/bash
+
+# Starts a long-lived KATch process reading NKPL file paths from stdin.
+# See KATchSession.java for the protocol. Requires Java 11 or higher.
+
+if [[ -n `type -p java` ]]; then
+  _java=java
+elif [[ -n "$JAVA_HOME" ]] && [[ -x "$JAVA_HOME/bin/java" ]];  then
+  _java="$JAVA_HOME/bin/java"
+else
+  echo "No Java installation found in PATH or JAVA_HOME. Please install Java 11 or higher!" >&2
+  exit 1
+fi
+
+SCRIPT_PATH=$(dirname $(realpath -s $0))
+JAR_PATH=$SCRIPT_PATH/KATch-assembly-0.1.0-SNAPSHOT.jar
+
+# KATch writes its files to the working directory, so every session gets its
+# own directory, as several sessions and runs may be active at the same time
+WORK_DIR=$(mktemp -d)
+trap 'rm -rf "$WORK_DIR"' EXIT
+mkdir "$WORK_DIR/results"
+
+cd "$WORK_DIR"
+"$_java" -Xss10m -Xmx128g -cp $JAR_PATH $SCRIPT_PATH/KATchSession.java $JAR_PATH
@@ -9,7 +9,10 @@ from pydantic_core import PydanticCustomError
 from src.analyzer.harmful_trace import RaceType
 from src.cli import CLIError, getCLIArgs
 from src.errors import MaudeError
+from src.generator.checkpoint import CheckpointError, loadCheckpoint
+from src.generator.frontier import FrontierError, loadFrontier, saveFrontier
 from src.json_safety_property import SafetyProperties
+from src.KATch_comm import KATchError
 from src.model.dnk_maude_model import DNKMaudeModel
 from src.stats import StatsCollector, StatsEntry
 from src.tracer import Tracer
@@ -22,6 +25,9 @@ PROJECT_DIR_PATH = os.path.dirname(os.path.realpath(__file__))
 OUTPUT_DIR_PATH = os.path.join(PROJECT_DIR_PATH, "output")
 MAUDE_FILES_DIR_PATH = os.path.join(PROJECT_DIR_PATH, "src", "maude")
 KATCH_EXEC_PATH = os.path.join(PROJECT_DIR_PATH, "bin", "katch", "katch.sh")
+KATCH_SESSION_EXEC_PATH = os.path.join(
+    PROJECT_DIR_PATH, "bin", "katch", "katch_session.sh"
+)
 RUN_DIR_NAME = "run"
 STATS_FILE_NAME = "final_stats"
 
@@ -43,11 +49,22 @@ def createRunOutputDir(currTime: time.struct_time) -> str:
 
 
 def logRunStats(stats: StatsCollector, fileName: str) -> None:
+    """Appends the stats of the run to the given CSV file. A file with a
+    different header, e.g. written by an older version, is renamed first."""
     logFilePath = os.path.join(OUTPUT_DIR_PATH, f"{fileName}.csv")
     sep = ","
+    header = stats.keys(sep)
+    if os.path.exists(logFilePath):
+        with open(logFilePath, "r") as f:
+            oldHeader = f.readline().rstrip("\r\n")
+        if oldHeader != header:
+            oldFileIndex = 1
+            while os.path.exists(f"{logFilePath}.{oldFileIndex}"):
+                oldFileIndex += 1
+            os.rename(logFilePath, f"{logFilePath}.{oldFileIndex}")
     if not os.path.exists(logFilePath):
         with open(logFilePath, "w") as f:
-            f.write(stats.keys(sep))
+            f.write(header)
             f.write(os.linesep)
 
     with open(logFilePath, "a") as f:
@@ -79,6 +96,7 @@ def main() -> None:
             "KATch executable could not be found at "
             + f"{KATCH_EXEC_PATH} or it is not runnable!"
         )
+    tracer: Tracer | None = None
     try:
         args = getCLIArgs()
         logLevel = logging.CRITICAL
@@ -93,18 +111,53 @@ def main() -> None:
         fmtTime = time.strftime("%Y-%m-%d;%H:%M:%S", currTime)
         runOutputDir = createRunOutputDir(currTime)
 
+        katchSessionPath = None
+        if args.katchSession and isExe(KATCH_SESSION_EXEC_PATH):
+            katchSessionPath = KATCH_SESSION_EXEC_PATH
+
         config = TracerConfig(
-            runOutputDir,
-            KATCH_EXEC_PATH,
-            MAUDE_FILES_DIR_PATH,
-            args.threads,
-            args.verbose,
-            getFileName(args.sdnModelFilePath),
+            outputDirPath=runOutputDir,
+            katchPath=KATCH_EXEC_PATH,
+            maudeFilesDirPath=MAUDE_FILES_DIR_PATH,
+            threads=args.threads,
+            verbose=args.verbose,
+            inputFileName=getFileName(args.sdnModelFilePath),
+            katchSessionPath=katchSessionPath,
+            katchWorkers=args.katchWorkers,
+            katchCacheDirPath=args.katchCacheDir,
+            katchCacheSizeMB=args.katchCacheSize,
+            katchTimeout=args.katchTimeout,
+            precomputeLimit=args.precomputeLimit,
+            stateGraph=args.stateGraph,
+            partialOrderReduction=args.partialOrderReduction,
+            genCacheSizeMB=args.genCacheSize,
+            genCacheDirPath=args.genCacheDir,
+            streamTraces=args.streamTraces,
+            pbfsChunkSize=args.pbfsChunkSize,
+            frontierMemoryMB=args.frontierMemory,
+            checkpointInterval=args.checkpointInterval,
+            maxHarmfulRaces=args.maxHarmfulRaces,
+            maxNodes=args.maxNodes,
+            maxMemoryMB=args.maxMemory,
+            timeBudget=args.timeBudget,
         )
 
         tracer = Tracer(config, args.strategy, dnkModel, safetyProps)
-        print("Generating traces...")
-        ok = tracer.generateTraces(args.depth)
+        if args.streamTraces:
+            print("Generating and analyzing traces...")
+            ok = tracer.generateAndAnalyzeTraces(args.depth)
+        elif args.resume is not None:
+            checkpoint = loadCheckpoint(args.resume)
+            # the generation continues until the depth it was started with
+            args.depth = checkpoint.depth
+            print(f"Resuming trace generation up to depth {args.depth}...")
+            ok = tracer.resumeTraces(checkpoint)
+        elif args.extendFrontier is not None:
+            print("Extending traces...")
+            ok = tracer.extendTraces(args.depth, loadFrontier(args.extendFrontier))
+        else:
+            print("Generating traces...")
+            ok = tracer.generateTraces(args.depth)
 
         stats = StatsCollector()
         stats.addEntries([StatsEntry("date", "Date", fmtTime)])
@@ -117,12 +170,13 @@ def main() -> None:
                 "Could not generate any traces for the given network and depth!"
             )
 
-        print()
-        print(stats.toPrettyStr())
-        print()
+        if not args.streamTraces:
+            print()
+            print(stats.toPrettyStr())
+            print()
 
-        print("Analyzing traces...")
-        tracer.analyzeTraces()
+            print("Analyzing traces...")
+            tracer.analyzeTraces()
 
         stats.addEntries(tracer.getTraceAnalysisStats())
         stats.addEntries(
@@ -140,14 +194,26 @@ def main() -> None:
         print(stats.toPrettyStr())
         print("=================================")
         logRunStats(stats, STATS_FILE_NAME)
+        if args.saveFrontier is not None:
+            saveFrontier(args.saveFrontier, tracer.getFrontier())
+            print(f"Traces saved to: {args.saveFrontier}")
         print(f"Output written to: {runOutputDir}")
 
     except CLIError as e:
         printAndExit(e.__str__())
     except MaudeError as e:
         print(f"Error encountered while executing Maude:\n\t{e}")
+    except KATchError as e:
+        print(f"Error encountered while executing KATch:\n\t{e}")
+    except FrontierError as e:
+        print(f"Could not save or extend the traces:\n\t{e}")
+    except CheckpointError as e:
+        print(f"Could not resume the trace generation:\n\t{e}")
     except (ValidationError, PydanticCustomError) as e:
         print(f"Invalid JSON file!\n{e}")
+    finally:
+        if tracer is not None:
+            tracer.close()
 
 
 if __name__ == "__main__":
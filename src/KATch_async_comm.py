@@ -0,0 +1,137 @@
+import asyncio
+import os
+import signal
+from functools import partial
+from typing import List, Tuple
+
+from src.decorators.bool_cache import BoolCache
+from src.KATch_comm import (KATCH_FILE_EXT, NKPL_CHECK, NKPL_DIFF, NKPL_FALSE,
+                            NKPL_NOT_EQUIV, KATchError, _buildPropertyCheck,
+                            _processCheckOpResult, _toolFormat)
+from src.util import exportFile, getTempFilePath, removeFile
+
+
+class AsyncKATchComm(BoolCache):
+    """asyncio variant of KATchComm. Every NPKL program is run by a separate
+    KATch process started with asyncio.create_subprocess_exec, so a single
+    thread can keep many checks in flight, e.g. with asyncio.gather.
+
+    At most 'max_concurrency' KATch processes run at the same time. Identical
+    checks awaited concurrently share a single KATch run, and their result is
+    cached like the results of KATchComm.
+
+    If a timeout is given, a KATch run taking longer than 'timeout' seconds is
+    killed and the check raises KATchError.
+
+    An instance must only be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        tool_path: str,
+        output_dir: str,
+        max_concurrency: int = 1,
+        timeout: float | None = None,
+    ) -> None:
+        BoolCache.__init__(self)
+        self.tool_path: str = tool_path
+        self.output_dir: str = output_dir
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # running checks keyed by method name and arguments
+        self._inFlight: dict[Tuple[str, ...], asyncio.Task[bool]] = {}
+
+    async def runNPKLProgram(self, npklProgram: str) -> Tuple[str, str | None]:
+        """
+        Generates a file with the given NPKL program, passes it to
+        KATch, and returns the result and an error, if any occured.
+        """
+        outfile = getTempFilePath(self.output_dir, KATCH_FILE_EXT)
+        exportFile(outfile, npklProgram)
+        try:
+            async with self._semaphore:
+                stdout, stderr = await self._runKATch(outfile)
+        finally:
+            removeFile(outfile)
+        error = stderr.decode("utf-8")
+        return stdout.decode("utf-8"), error if error != "" else None
+
+    async def _runKATch(self, filePath: str) -> Tuple[bytes, bytes]:
+        proc = await asyncio.create_subprocess_exec(
+            self.tool_path,
+            "run",
+            filePath,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            # the KATch script starts the JVM as a child process,
+            # which is killed together with the script on timeouts
+            process_group=0,
+        )
+        try:
+            return await asyncio.wait_for(proc.communicate(), self.timeout)
+        except TimeoutError:
+            _killProcessGroup(proc.pid)
+            await proc.wait()
+            raise KATchError(f"KATch did not finish within {self.timeout} seconds")
+
+    async def checkProperty(self, prop: str, expr: str) -> bool:
+        return await self._check(
+            self.checkProperty.__name__, (prop, expr), _buildPropertyCheck(prop, expr)
+        )
+
+    async def checkProperties(self, prop: str, exprs: List[str]) -> List[bool]:
+        """Checks the given property for every given expression concurrently."""
+        return list(
+            await asyncio.gather(*(self.checkProperty(prop, expr) for expr in exprs))
+        )
+
+    async def isNonEmptyDifference(self, nkEnc1: str, nkEnc2: str) -> bool:
+        npklProgram = (
+            f"{NKPL_CHECK} ({_toolFormat(nkEnc1)}) {NKPL_DIFF} ({_toolFormat(nkEnc2)}) "
+            + f"{NKPL_NOT_EQUIV} {NKPL_FALSE}"
+        )
+        return await self._check(
+            self.isNonEmptyDifference.__name__, (nkEnc1, nkEnc2), npklProgram
+        )
+
+    async def areNotEquiv(self, nkEnc1: str, nkEnc2: str) -> bool:
+        npklProgram = (
+            f"{NKPL_CHECK} ({_toolFormat(nkEnc1)}) {NKPL_NOT_EQUIV} "
+            + f"({_toolFormat(nkEnc2)})"
+        )
+        return await self._check(self.areNotEquiv.__name__, (nkEnc1, nkEnc2), npklProgram)
+
+    async def _check(
+        self, methodName: str, args: Tuple[str, ...], npklProgram: str
+    ) -> bool:
+        """Returns the cached result of the given check, or runs it in KATch
+        unless the same check is already running."""
+        cached = self.lookupCache(methodName, *args)
+        if cached is not None:
+            return cached
+        key = (methodName, *args)
+        task = self._inFlight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._runCheck(npklProgram))
+            self._inFlight[key] = task
+            task.add_done_callback(partial(self._storeResult, methodName, args))
+        # a cancelled caller must not cancel the run shared with other callers
+        return await asyncio.shield(task)
+
+    async def _runCheck(self, npklProgram: str) -> bool:
+        return _processCheckOpResult(*await self.runNPKLProgram(npklProgram))
+
+    def _storeResult(
+        self, methodName: str, args: Tuple[str, ...], task: asyncio.Task[bool]
+    ) -> None:
+        del self._inFlight[(methodName, *args)]
+        if task.cancelled() or task.exception() is not None:
+            return
+        self.storeCache(methodName, task.result(), *args)
+
+
+def _killProcessGroup(pid: int) -> None:
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
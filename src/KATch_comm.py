@@ -1,13 +1,31 @@
+import heapq
+import logging
 import os
 import re
+import subprocess
+from concurrent.futures import Future, ThreadPoolExecutor
 from enum import StrEnum
+from functools import partial
+from itertools import count
+from queue import SimpleQueue
+from threading import Lock
+from time import perf_counter
 from typing import List, Tuple
 
 from src.decorators.bool_cache import BoolCache, with_bool_cache
 from src.decorators.exec_time import ExecTimes, with_time_execution
+from src.decorators.latency import Latencies, with_latency
+from src.decorators.normalized_netkat import with_normalized_netkat
+from src.KATch_session import (KATchSession, KATchSessionError,
+                               KATchSessionTimeoutError)
+from src.KATch_verdict_store import KATchVerdictStore
+from src.netkat.evaluator import PacketSpaceTooLargeError, isEmpty
+from src.netkat.normalizer import normalizeNetKAT
+from src.netkat.parser import NetKATParseError, parseNetKAT
 from src.stats import StatsEntry, StatsGenerator
 from src.util import DyNetKATSymbols as sym
-from src.util import executeCmd, exportFile, getTempFilePath
+from src.util import (exportFile, getTempFilePath, removeFile, startCmd,
+                      uniformSplit, waitCmd)
 
 _SAFETY_PROPERTY_PLACEHOLDER_NAME = "@Network"
 KATCH_FILE_EXT = "nkpl"
@@ -25,12 +43,36 @@ NKPL_CHECK = "check"
 NKPL_INOUTMAP = "inoutmap"
 KATCH_TRUE = "True"
 KATCH_FALSE = "False"
+_CHECK_PASSED = "Check passed"
+_CHECK_FAILED = "Check failed"
+# number of times a failing KATch session is restarted before falling
+# back to running KATch as a separate process for every program
+_MAX_SESSION_FAILURES = 3
+# maximum number of distinct packets for which a property is decided without KATch
+_MAX_LOCAL_PACKETS = 1 << 10
+# number of slowest NPKL programs written to the latency report
+_SLOWEST_PROGRAMS_COUNT = 10
+_LATENCY_REPORT_FILE_NAME = "katch_latencies.txt"
+# latency key of single KATch runs
+_RUN_LATENCY_KEY = "run"
+
+logger = logging.getLogger("KATch")
 
 
 class _StatsKey(StrEnum):
     execTime = "katchExecTime"
     cacheHits = "katchCacheHits"
     cacheMisses = "katchCacheMisses"
+    localChecks = "katchLocalChecks"
+    runs = "katchRuns"
+    runLatencyP50 = "katchRunLatencyP50"
+    runLatencyP95 = "katchRunLatencyP95"
+    runLatencyP99 = "katchRunLatencyP99"
+    runLatencyMax = "katchRunLatencyMax"
+    spawnTime = "katchSpawnTime"
+    ioTime = "katchIOTime"
+    verifierTime = "katchVerifierTime"
+    callsPerMethod = "katchCallsPerMethod"
 
 
 class KATchError(Exception):
@@ -38,13 +80,34 @@ class KATchError(Exception):
 
 
 def _processCheckOpResult(output: str, error: str | None) -> bool:
-    if output.find("Check passed") > -1:
+    if output.find(_CHECK_PASSED) > -1:
         return True
-    if error is not None and error.find("Check failed") > -1:
+    if error is not None and error.find(_CHECK_FAILED) > -1:
         return False
     raise KATchError(error)
 
 
+def _buildPropertyCheck(prop: str, expr: str) -> str:
+    finalProp = re.sub(_SAFETY_PROPERTY_PLACEHOLDER_NAME, "(" + expr + ")", prop)
+    return f"{NKPL_CHECK} {_toolFormat(finalProp)}"
+
+
+def _decidePropertyLocally(prop: str, expr: str) -> bool | None:
+    """Decides the given property check without KATch, if the property is an
+    emptiness check of an expression supported by the NetKAT evaluator.
+    Returns None otherwise."""
+    finalProp = re.sub(_SAFETY_PROPERTY_PLACEHOLDER_NAME, "(" + expr + ")", prop)
+    for relation, passesIfEmpty in ((NKPL_EQUIV, True), (NKPL_NOT_EQUIV, False)):
+        netkatExpr, found, rightSide = finalProp.rpartition(relation)
+        if not found or rightSide.strip() != NKPL_FALSE:
+            continue
+        try:
+            return isEmpty(parseNetKAT(netkatExpr), _MAX_LOCAL_PACKETS) == passesIfEmpty
+        except (NetKATParseError, PacketSpaceTooLargeError):
+            return None
+    return None
+
+
 def _toolFormat(netkatEncoding: str) -> str:
     """Converts the given NetKAT encoding into
     NKPL format (KATch's specification language)."""
@@ -68,14 +131,96 @@ def _toolFormat(netkatEncoding: str) -> str:
     return re.sub(r"([a-zA-Z_]\w*)", r"@\1", netkatEncoding)
 
 
-class KATchComm(ExecTimes, BoolCache, StatsGenerator):
-    """Class for running KATch as an OS command."""
+class _RunPhase(StrEnum):
+    spawn = "spawn"  # starting the KATch process
+    io = "io"  # writing and removing NPKL files
+    verifier = "verifier"  # waiting for KATch to answer, including JVM start-up
+
+
+class KATchComm(ExecTimes, BoolCache, Latencies, StatsGenerator):
+    """Class for running KATch as an OS command.
 
-    def __init__(self, tool_path: str, output_dir: str) -> None:
+    If a session script is given, NPKL programs are passed to long-lived
+    KATch processes instead of starting a new one for every program.
+    Running KATch as a separate process is kept as a fallback in case
+    the session cannot be used.
+
+    With more than 1 worker, property checks can be prefetched: they are run
+    concurrently in the background, and 'checkProperty' waits for the
+    in-flight check instead of running the same check again. Prefetched
+    results are cached once they are ready, even if they are never requested.
+
+    NetKAT expressions are normalized before the cache lookup, so equivalent
+    notations of the same expression share their cached result.
+
+    If a verdict store is given, the result of every check is also persisted
+    on disk and reused by later runs.
+
+    Property checks of simple expressions are decided by the Python NetKAT
+    evaluator, without running KATch, unless 'local_checks' is False.
+
+    If a timeout is given, a KATch run taking longer than 'timeout' seconds
+    is stopped and the check raises KATchError. A timed out session is
+    restarted for the next program and does not count as a failed session.
+    """
+
+    def __init__(
+        self,
+        tool_path: str,
+        output_dir: str,
+        session_path: str | None = None,
+        workers: int = 1,
+        verdict_store: KATchVerdictStore | None = None,
+        local_checks: bool = True,
+        timeout: float | None = None,
+    ) -> None:
         ExecTimes.__init__(self)
         BoolCache.__init__(self)
+        Latencies.__init__(self)
         self.tool_path: str = tool_path
         self.output_dir: str = output_dir
+        self.workers = workers
+        self.verdict_store = verdict_store
+        self.local_checks = local_checks
+        self.timeout = timeout
+        self.localChecksCount = 0
+        self._localChecksLock = Lock()
+        self._runStatsLock = Lock()
+        # min heap of the slowest runs as (latency, run number, NPKL program)
+        self._slowestRuns: List[Tuple[float, int, str]] = []
+        self._runCounter = count()
+        self._sessionPath = session_path
+        # every thread running KATch needs its own session
+        self._sessions: List[KATchSession] = []
+        self._idleSessions: SimpleQueue[KATchSession] = SimpleQueue()
+        self._sessionLock = Lock()
+        self._sessionFailures = 0
+        self._pool: ThreadPoolExecutor | None = None
+        # checks running in the background, keyed like the cache of 'checkProperty'
+        self._inFlight: dict[Tuple[str, str], Future[bool]] = {}
+        self._inFlightLock = Lock()
+
+    def _getPool(self) -> ThreadPoolExecutor | None:
+        """Returns the pool running KATch checks concurrently, or None
+        if KATchComm was created with a single worker."""
+        if self.workers > 1 and self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def close(self) -> None:
+        """Cancels the prefetched checks that did not start, waits for any
+        running checks and stops all KATch sessions."""
+        self.cancelPrefetched()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        with self._sessionLock:
+            for session in self._sessions:
+                session.close()
+            self._sessions = []
+            self._idleSessions = SimpleQueue()
+        if self.verdict_store is not None:
+            self.verdict_store.close()
 
     def _runNPKLProgram(self, npklProgram: str) -> Tuple[str, str | None]:
         """
@@ -83,18 +228,156 @@ class KATchComm(ExecTimes, BoolCache, StatsGenerator):
         KATch, and returns the result and an error, if any occured.
         """
 
+        startTime = perf_counter()
         outfile = getTempFilePath(self.output_dir, KATCH_FILE_EXT)
         exportFile(outfile, npklProgram)
+        self._addPhaseTime(_RunPhase.io, perf_counter() - startTime)
+
+        try:
+            result = self._runInSession(outfile)
+            if result is None:
+                result = self._runInProcess(outfile)
+        finally:
+            removeStartTime = perf_counter()
+            removeFile(outfile)
+            self._addPhaseTime(_RunPhase.io, perf_counter() - removeStartTime)
+
+        self._recordRun(npklProgram, perf_counter() - startTime)
+        return result
+
+    def _runInProcess(self, filePath: str) -> Tuple[str, str | None]:
+        """Runs the given NPKL file in a new KATch process.
+        Raises KATchError if KATch does not finish within the timeout."""
+        spawnStartTime = perf_counter()
+        proc = startCmd([self.tool_path, "run", filePath])
+        self._addPhaseTime(_RunPhase.spawn, perf_counter() - spawnStartTime)
+        verifierStartTime = perf_counter()
+        try:
+            return waitCmd(proc, self.timeout)
+        except subprocess.TimeoutExpired:
+            raise KATchError(f"KATch did not finish within {self.timeout} seconds")
+        finally:
+            self._addPhaseTime(_RunPhase.verifier, perf_counter() - verifierStartTime)
+
+    def _addPhaseTime(self, phase: _RunPhase, time: float) -> None:
+        with self._runStatsLock:
+            self.addExecTime(phase, time)
+
+    def _recordRun(self, npklProgram: str, latency: float) -> None:
+        self.addLatency(_RUN_LATENCY_KEY, latency)
+        with self._runStatsLock:
+            run = (latency, next(self._runCounter), npklProgram)
+            if len(self._slowestRuns) < _SLOWEST_PROGRAMS_COUNT:
+                heapq.heappush(self._slowestRuns, run)
+                return
+            heapq.heappushpop(self._slowestRuns, run)
+
+    def _runInSession(self, filePath: str) -> Tuple[str, str | None] | None:
+        """Runs the given NPKL file in a KATch session. Returns None if
+        there is no usable session."""
+        session = self._acquireSession()
+        if session is None:
+            return None
+        try:
+            spawnStartTime = perf_counter()
+            session.start()
+            self._addPhaseTime(_RunPhase.spawn, perf_counter() - spawnStartTime)
+            verifierStartTime = perf_counter()
+            result = session.run(filePath)
+            self._addPhaseTime(_RunPhase.verifier, perf_counter() - verifierStartTime)
+            return result
+        except KATchSessionTimeoutError as e:
+            raise KATchError(str(e))
+        except KATchSessionError as e:
+            logger.info("%s", e)
+            with self._sessionLock:
+                self._sessionFailures += 1
+                if self._sessionFailures >= _MAX_SESSION_FAILURES:
+                    logger.info("Disabling KATch sessions after repeated failures")
+                    self._sessionPath = None
+            return None
+        finally:
+            self._releaseSession(session)
 
-        cmd = [self.tool_path, "run", outfile]
-        output, error = executeCmd(cmd)
+    def _acquireSession(self) -> KATchSession | None:
+        with self._sessionLock:
+            if self._sessionPath is None:
+                return None
+            if not self._idleSessions.empty():
+                return self._idleSessions.get()
+            session = KATchSession(self._sessionPath, self.timeout)
+            self._sessions.append(session)
+            return session
 
-        if os.path.exists(outfile):
-            os.remove(outfile)
+    def _releaseSession(self, session: KATchSession) -> None:
+        with self._sessionLock:
+            if self._sessionPath is None:
+                session.close()
+                return
+            self._idleSessions.put(session)
 
-        return output, error
+    def prefetchProperties(self, prop: str, exprs: List[str]) -> None:
+        """Starts checking the given property for every given expression in the
+        background. Does nothing if KATchComm was created with a single worker."""
+        pool = self._getPool()
+        if pool is None:
+            return
+        for expr in map(normalizeNetKAT, exprs):
+            key = (prop, expr)
+            # checked under the lock of the done-callback, so that a check is
+            # not started again while its result is being cached
+            with self._inFlightLock:
+                if key in self._inFlight:
+                    continue
+                if self.isCached(self.checkProperty.__name__, prop, expr):
+                    continue
+                future = pool.submit(self._runPropertyCheck, prop, expr)
+                self._inFlight[key] = future
+            # outside the lock, since the callback runs right away if the check
+            # is already done
+            future.add_done_callback(partial(self._storePrefetched, key))
+
+    def cancelPrefetched(self) -> None:
+        """Cancels the prefetched checks that did not start yet, e.g. once the
+        analysis stopped. Running checks finish and their results are cached."""
+        with self._inFlightLock:
+            inFlight = list(self._inFlight.values())
+        for future in inFlight:
+            future.cancel()
+
+    def _storePrefetched(self, key: Tuple[str, str], future: Future[bool]) -> None:
+        """Caches the result of a prefetched check once it is done, unless it
+        was already taken by a caller waiting for it"""
+        with self._inFlightLock:
+            if self._inFlight.get(key) is not future:
+                return
+            del self._inFlight[key]
+            if future.cancelled() or future.exception() is not None:
+                return
+            self.storeCache(self.checkProperty.__name__, future.result(), *key)
+
+    def _popInFlight(self, prop: str, expr: str) -> Future[bool] | None:
+        with self._inFlightLock:
+            return self._inFlight.pop((prop, expr), None)
+
+    def _runPropertyCheck(self, prop: str, expr: str) -> bool:
+        local = self._checkPropertyLocally(prop, expr)
+        if local is not None:
+            return local
+        return self._runChecks([_buildPropertyCheck(prop, expr)])[0]
+
+    def _checkPropertyLocally(self, prop: str, expr: str) -> bool | None:
+        if not self.local_checks:
+            return None
+        result = _decidePropertyLocally(prop, expr)
+        if result is not None:
+            with self._localChecksLock:
+                self.localChecksCount += 1
+        return result
 
     @with_time_execution
+    @with_latency
+    @with_normalized_netkat
     @with_bool_cache
     def isNonEmptyDifference(self, nkEnc1: str, nkEnc2: str) -> bool:
         fmtNKEnc1 = _toolFormat(nkEnc1)
@@ -104,45 +387,234 @@ class KATchComm(ExecTimes, BoolCache, StatsGenerator):
             + f"{NKPL_NOT_EQUIV} {NKPL_FALSE}"
         )
 
-        output, error = self._runNPKLProgram(npklProgram)
-
-        return _processCheckOpResult(output, error)
+        return self._runChecks([npklProgram])[0]
 
     @with_time_execution
+    @with_latency
+    @with_normalized_netkat
     @with_bool_cache
     def areNotEquiv(self, nkEnc1: str, nkEnc2: str) -> bool:
         fmtNKEnc1 = _toolFormat(nkEnc1)
         fmtNKEnc2 = _toolFormat(nkEnc2)
         npklProgram = f"{NKPL_CHECK} ({fmtNKEnc1}) {NKPL_NOT_EQUIV} ({fmtNKEnc2})"
 
-        output, error = self._runNPKLProgram(npklProgram)
-
-        return _processCheckOpResult(output, error)
+        return self._runChecks([npklProgram])[0]
 
     @with_time_execution
+    @with_latency
+    @with_normalized_netkat
     @with_bool_cache
     def checkProperty(self, prop: str, expr: str) -> bool:
-        finalProp = re.sub(_SAFETY_PROPERTY_PLACEHOLDER_NAME, "(" + expr + ")", prop)
-        fmtFinalProp = _toolFormat(finalProp)
-        npklProgram = f"{NKPL_CHECK} {fmtFinalProp}"
+        inFlight = self._popInFlight(prop, expr)
+        if inFlight is not None and not inFlight.cancelled():
+            return inFlight.result()
+        # the prefetched result may have been cached since the cache lookup
+        cached = self.lookupCache(self.checkProperty.__name__, prop, expr)
+        if cached is not None:
+            return cached
 
-        output, error = self._runNPKLProgram(npklProgram)
+        return self._runPropertyCheck(prop, expr)
 
-        return _processCheckOpResult(output, error)
+    @with_time_execution
+    @with_latency
+    def checkProperties(self, prop: str, exprs: List[str]) -> List[bool]:
+        """Checks the given property for every given expression. All expressions
+        that are not cached yet are checked by passing a single NPKL program with
+        one check statement per expression to KATch.
+        Results share the cache of 'checkProperty'."""
+        results: List[bool] = [False for _ in exprs]
+        # expressions not found in the cache mapped to their positions
+        pending: dict[str, List[int]] = {}
+        for i, expr in enumerate(map(normalizeNetKAT, exprs)):
+            if expr in pending:
+                pending[expr].append(i)
+                continue
+            cached = self.lookupCache(self.checkProperty.__name__, prop, expr)
+            if cached is None:
+                pending[expr] = [i]
+                continue
+            results[i] = cached
+
+        for (expr, positions), res in zip(
+            pending.items(), self._checkPending(prop, list(pending.keys()))
+        ):
+            self.storeCache(self.checkProperty.__name__, res, prop, expr)
+            for i in positions:
+                results[i] = res
+        return results
+
+    def _checkPending(self, prop: str, exprs: List[str]) -> List[bool]:
+        """Checks the given property for expressions that are not cached.
+        Waits for the expressions already checked in the background, and
+        splits the ones that cannot be decided locally in batches,
+        one for every worker."""
+        inFlight: dict[int, Future[bool]] = {}
+        for i, expr in enumerate(exprs):
+            future = self._popInFlight(prop, expr)
+            if future is not None and not future.cancelled():
+                inFlight[i] = future
+        results: List[bool] = [False for _ in exprs]
+        remaining: List[int] = []
+        for i, expr in enumerate(exprs):
+            if i in inFlight:
+                continue
+            cached = self.lookupCache(self.checkProperty.__name__, prop, expr)
+            if cached is not None:
+                results[i] = cached
+                continue
+            local = self._checkPropertyLocally(prop, expr)
+            if local is None:
+                remaining.append(i)
+                continue
+            results[i] = local
+        checks = [_buildPropertyCheck(prop, exprs[i]) for i in remaining]
+
+        pool = self._getPool()
+        if pool is None or len(checks) <= 1:
+            batchResults = self._runChecks(checks)
+        else:
+            batches = uniformSplit(checks, self.workers)
+            batchResults = [
+                res
+                for batchRes in pool.map(self._runChecks, batches)
+                for res in batchRes
+            ]
+        for i, res in zip(remaining, batchResults):
+            results[i] = res
+        for i, future in inFlight.items():
+            results[i] = future.result()
+        return results
+
+    def _runChecks(self, checks: List[str]) -> List[bool]:
+        """Returns the result of every given NPKL check statement. Checks
+        found in the verdict store are not passed to KATch."""
+        store = self.verdict_store
+        if store is None:
+            return self._runChecksInKATch(checks)
+
+        results: List[bool | None] = [store.get(check) for check in checks]
+        missing = [i for i, res in enumerate(results) if res is None]
+        missingResults = self._runChecksInKATch([checks[i] for i in missing])
+        for i, res in zip(missing, missingResults):
+            store.put(checks[i], res)
+            results[i] = res
+        return [res is True for res in results]
+
+    def _runChecksInKATch(self, checks: List[str]) -> List[bool]:
+        """Runs the given NPKL check statements as a single program and
+        returns the result of every check.
+
+        KATch reports the passed checks on stdout and the failed ones on
+        stderr, so the order of the results is lost when both occur. If KATch
+        stopped at the first failed check, the checks before it passed and the
+        remaining ones are run again. Otherwise, the checks are split in half
+        and every half is run separately.
+        """
+        if len(checks) <= 1:
+            return [
+                _processCheckOpResult(*self._runNPKLProgram(check)) for check in checks
+            ]
+
+        output, error = self._runNPKLProgram(os.linesep.join(checks))
+        passed = output.count(_CHECK_PASSED)
+        failed = 0 if error is None else error.count(_CHECK_FAILED)
+        if failed == 0:
+            if passed != len(checks):
+                raise KATchError(error)
+            return [True for _ in checks]
+        if passed == 0 and failed == len(checks):
+            return [False for _ in checks]
+        if failed == 1 and passed + failed < len(checks):
+            return (
+                [True for _ in range(passed)]
+                + [False]
+                + self._runChecksInKATch(checks[passed + 1 :])
+            )
+        mid = len(checks) // 2
+        return self._runChecksInKATch(checks[:mid]) + self._runChecksInKATch(
+            checks[mid:]
+        )
 
     def getStats(self) -> List[StatsEntry]:
+        """Verdicts found in the verdict store count as cache hits, so cache
+        misses are the checks that had to be passed to KATch."""
+        hits = self.getTotalCacheHits()
+        misses = self.getTotalCacheMisses()
+        if self.verdict_store is not None:
+            hits += self.verdict_store.stats.hits
+            misses = self.verdict_store.stats.misses
         return [
             StatsEntry(
                 _StatsKey.execTime,
                 "KATch total execution time",
                 self.getWrapperTotalExecTime(),
             ),
-            StatsEntry(
-                _StatsKey.cacheHits, "KATch total cache hits", self.getTotalCacheHits()
-            ),
+            StatsEntry(_StatsKey.cacheHits, "KATch total cache hits", hits),
             StatsEntry(
                 _StatsKey.cacheMisses,
                 "KATch total cache misses",
-                self.getTotalCacheMisses(),
+                misses,
+            ),
+            StatsEntry(
+                _StatsKey.localChecks,
+                "Checks decided without KATch",
+                self.localChecksCount,
+            ),
+        ] + self._getRunStats()
+
+    def _getRunStats(self) -> List[StatsEntry]:
+        runs = self.getLatencySummary(_RUN_LATENCY_KEY)
+        return [
+            StatsEntry(_StatsKey.runs, "KATch runs", runs.count),
+            StatsEntry(_StatsKey.runLatencyP50, "KATch run latency p50", runs.p50),
+            StatsEntry(_StatsKey.runLatencyP95, "KATch run latency p95", runs.p95),
+            StatsEntry(_StatsKey.runLatencyP99, "KATch run latency p99", runs.p99),
+            StatsEntry(_StatsKey.runLatencyMax, "KATch run latency max", runs.max),
+            StatsEntry(
+                _StatsKey.spawnTime,
+                "KATch process start time",
+                self.getExecTime(_RunPhase.spawn),
+            ),
+            StatsEntry(
+                _StatsKey.ioTime,
+                "KATch file I/O time",
+                self.getExecTime(_RunPhase.io),
+            ),
+            StatsEntry(
+                _StatsKey.verifierTime,
+                "KATch verifier time",
+                self.getExecTime(_RunPhase.verifier),
+            ),
+            StatsEntry(
+                _StatsKey.callsPerMethod,
+                "KATch calls per method",
+                ";".join(
+                    f"{key}:{self.getLatencySummary(key).count}"
+                    for key in self._getMethodLatencyKeys()
+                ),
             ),
         ]
+
+    def _getMethodLatencyKeys(self) -> List[str]:
+        return [key for key in self.getLatencyKeys() if key != _RUN_LATENCY_KEY]
+
+    def writeLatencyReport(self, dirPath: str) -> None:
+        """Writes the latency distribution of every method and of single KATch
+        runs, and the slowest NPKL programs passed to KATch."""
+        lines = ["Latencies (seconds):"]
+        for key in self._getMethodLatencyKeys() + [_RUN_LATENCY_KEY]:
+            lines.append(f"{key}: {self.getLatencySummary(key)}")
+        lines.append("")
+        lines.append("Time per KATch run phase (seconds):")
+        for phase in _RunPhase:
+            lines.append(f"{phase}: {self.getExecTime(phase):.6f}")
+        with self._runStatsLock:
+            slowestRuns = sorted(self._slowestRuns, reverse=True)
+        lines.append("")
+        lines.append(f"Slowest {len(slowestRuns)} KATch runs:")
+        for latency, _run, npklProgram in slowestRuns:
+            lines.append(f"--- {latency:.6f} seconds ---")
+            lines.append(npklProgram)
+        exportFile(
+            os.path.join(dirPath, _LATENCY_REPORT_FILE_NAME), os.linesep.join(lines)
+        )
@@ -0,0 +1,116 @@
+import os
+import subprocess
+from threading import Event, Timer
+from typing import IO, Tuple
+
+from src.util import killCmd
+
+
+class KATchSessionError(Exception):
+    pass
+
+
+class KATchSessionTimeoutError(KATchSessionError):
+    pass
+
+
+class KATchSession:
+    """Long-lived KATch process that runs NKPL files sent over its stdin.
+
+    The process is started lazily on the first run. Every NKPL file path written
+    to the process is answered with two frames, one for the output and one
+    for the errors produced by KATch (see bin/katch/KATchSession.java).
+
+    If a timeout is given, the process is killed when it does not answer
+    a run within 'timeout' seconds.
+    """
+
+    def __init__(self, sessionPath: str, timeout: float | None = None) -> None:
+        self.sessionPath = sessionPath
+        self.timeout = timeout
+        self._proc: subprocess.Popen[bytes] | None = None
+
+    def isAlive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def start(self) -> None:
+        if self.isAlive():
+            return
+        try:
+            self._proc = subprocess.Popen(
+                [self.sessionPath],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                shell=False,
+                process_group=0,
+            )
+        except OSError as e:
+            raise KATchSessionError(f"Could not start KATch session: {e}")
+
+    def run(self, filePath: str) -> Tuple[str, str | None]:
+        """Runs the NKPL file at the given path and returns the output
+        and an error, if any occured.
+        Raises KATchSessionError if the session process is no longer usable,
+        and KATchSessionTimeoutError if it was killed after the timeout."""
+        self.start()
+        proc = self._proc
+        if proc is None or proc.stdin is None or proc.stdout is None:
+            raise KATchSessionError("KATch session was not started")
+        timedOut = Event()
+        timer = None
+        if self.timeout is not None:
+            timer = Timer(self.timeout, _kill, (proc, timedOut))
+            timer.start()
+        try:
+            proc.stdin.write(f"{os.path.abspath(filePath)}\n".encode("utf-8"))
+            proc.stdin.flush()
+            output = _readFrame(proc.stdout, "OUT")
+            error = _readFrame(proc.stdout, "ERR")
+        except (OSError, ValueError) as e:
+            self.close()
+            if timedOut.is_set():
+                raise KATchSessionTimeoutError(
+                    f"KATch session did not answer within {self.timeout} seconds"
+                )
+            raise KATchSessionError(f"KATch session failed: {e}")
+        finally:
+            if timer is not None:
+                timer.cancel()
+        return output, error if error != "" else None
+
+    def close(self) -> None:
+        proc = self._proc
+        self._proc = None
+        if proc is None:
+            return
+        if proc.stdin is not None:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            killCmd(proc)
+            proc.wait()
+        if proc.stdout is not None:
+            proc.stdout.close()
+
+
+def _kill(proc: subprocess.Popen[bytes], killed: Event) -> None:
+    killed.set()
+    killCmd(proc)
+
+
+def _readFrame(stream: IO[bytes], name: str) -> str:
+    """Reads a frame of shape '<name> <byte count>\\n<bytes>' from the given stream.
+    Raises ValueError if the stream does not contain such a frame."""
+    header = stream.readline().decode("utf-8").split()
+    if len(header) != 2 or header[0] != name or not header[1].isdigit():
+        raise ValueError(f"Unexpected session response header: {header}")
+    size = int(header[1])
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError("Session response ended unexpectedly")
+    return data.decode("utf-8")
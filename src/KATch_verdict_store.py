@@ -0,0 +1,140 @@
+import glob
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Tuple, cast
+
+from src.decorators.cache_stats import CacheStats
+
+_DB_FILE_NAME = "katch_verdicts.sqlite"
+# how many new verdicts are stored before the size of the database is checked
+_EVICTION_CHECK_INTERVAL = 100
+# fraction of the least recently used verdicts removed once the size limit is hit
+_EVICTION_FRACTION = 0.25
+# seconds to wait for other runs holding a lock on the database
+_DB_TIMEOUT = 30.0
+
+
+def katchHash(toolPath: str) -> str:
+    """Returns a hash of the KATch jar files found next to the given script
+    (or of the script itself if there are none), so that verdicts are not
+    shared between different KATch versions."""
+    toolDir = os.path.dirname(os.path.realpath(toolPath))
+    filePaths = sorted(glob.glob(os.path.join(toolDir, "*.jar")))
+    if not filePaths:
+        filePaths = [toolPath]
+    h = hashlib.sha256()
+    for filePath in filePaths:
+        with open(filePath, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+class KATchVerdictStore:
+    """Verdicts of KATch checks persisted in an SQLite database, so they
+    can be reused across runs. The database can be shared by concurrent runs.
+
+    Verdicts are keyed by the NPKL program passed to KATch and the hash of
+    the KATch version. Once the database grows past the given size, the least
+    recently used verdicts are removed.
+    """
+
+    def __init__(self, dirPath: str, katchHash: str, maxSizeMB: int) -> None:
+        self.dbPath = os.path.join(dirPath, _DB_FILE_NAME)
+        self.katchHash = katchHash
+        self.maxSizeBytes = maxSizeMB * 1024 * 1024
+        self.stats = CacheStats(0, 0)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._putsSinceEvictionCheck = 0
+        os.makedirs(dirPath, exist_ok=True)
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS verdicts ("
+            + "key TEXT PRIMARY KEY, verdict INTEGER NOT NULL, lastUsed REAL NOT NULL)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        """Returns the database connection of the calling thread."""
+        conn = cast(sqlite3.Connection | None, getattr(self._local, "conn", None))
+        if conn is None:
+            conn = sqlite3.connect(
+                self.dbPath,
+                timeout=_DB_TIMEOUT,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _key(self, npklProgram: str) -> str:
+        return hashlib.sha256(
+            f"{self.katchHash}\n{npklProgram}".encode("utf-8")
+        ).hexdigest()
+
+    def get(self, npklProgram: str) -> bool | None:
+        """Returns the stored verdict of the given check, or None if there is none."""
+        key = self._key(npklProgram)
+        conn = self._conn()
+        row = cast(
+            Tuple[int] | None,
+            conn.execute(
+                "SELECT verdict FROM verdicts WHERE key = ?", (key,)
+            ).fetchone(),
+        )
+        with self._lock:
+            if row is None:
+                self.stats.misses += 1
+                return None
+            self.stats.hits += 1
+        conn.execute(
+            "UPDATE verdicts SET lastUsed = ? WHERE key = ?", (time.time(), key)
+        )
+        return bool(row[0])
+
+    def put(self, npklProgram: str, verdict: bool) -> None:
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO verdicts (key, verdict, lastUsed) VALUES (?, ?, ?)",
+            (self._key(npklProgram), int(verdict), time.time()),
+        )
+        with self._lock:
+            self._putsSinceEvictionCheck += 1
+            if self._putsSinceEvictionCheck < _EVICTION_CHECK_INTERVAL:
+                return
+            self._putsSinceEvictionCheck = 0
+        self._evictIfTooLarge(conn)
+
+    def _evictIfTooLarge(self, conn: sqlite3.Connection) -> None:
+        if self._usedBytes(conn) <= self.maxSizeBytes:
+            return
+        rowCount = _queryInt(conn, "SELECT COUNT(*) FROM verdicts")
+        conn.execute(
+            "DELETE FROM verdicts WHERE key IN "
+            + "(SELECT key FROM verdicts ORDER BY lastUsed LIMIT ?)",
+            (max(1, int(rowCount * _EVICTION_FRACTION)),),
+        )
+
+    def _usedBytes(self, conn: sqlite3.Connection) -> int:
+        """Size of the database pages that are in use. Pages freed by evictions
+        are reused by new verdicts, so the file does not grow past the limit."""
+        pageCount = _queryInt(conn, "PRAGMA page_count")
+        freePages = _queryInt(conn, "PRAGMA freelist_count")
+        return (pageCount - freePages) * _queryInt(conn, "PRAGMA page_size")
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+            self._local = threading.local()
+
+
+def _queryInt(conn: sqlite3.Connection, query: str) -> int:
+    return cast(Tuple[int], conn.execute(query).fetchone())[0]
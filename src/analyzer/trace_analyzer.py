@@ -1,7 +1,9 @@
-from typing import List, Tuple
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import List
 
 from src.analyzer.harmful_trace import HarmfulTrace, RaceType, RacingNode
-from src.analyzer.transition_checker import TransitionsChecker
+from src.analyzer.transition_checker import RaceCandidate, TransitionsChecker
 from src.model.dnk_maude_model import ElementMetadata
 from src.trace.node import TraceNode
 
@@ -10,6 +12,19 @@ class TraceAnalyzerError(Exception):
     pass
 
 
+@dataclass(frozen=True)
+class CandidateRace:
+    """Race between the nodes at 'node1Pos' and 'node2Pos' of a trace, found
+    when analyzing the node at position 'pos'"""
+
+    pos: int
+    node1Pos: int
+    el1: int
+    node2Pos: int
+    el2: int
+    candidate: RaceCandidate
+
+
 def _validateTrace(trace: List[TraceNode], elsMetadata: List[ElementMetadata]) -> None:
     """Raises TraceAnalyzerError if the vector clocks of any nodes in
     the given trace does not match the number of elements of
@@ -53,9 +68,39 @@ class TraceAnalyzer:
         self._elLastNode: dict[int, int] = {}
         self.__skippedRaces: dict[RaceType, int] = {}
 
-    def analyze(self, trace: List[TraceNode]) -> HarmfulTrace | None:
+    def analyze(self, trace: List[TraceNode], fromPos: int = 0) -> HarmfulTrace | None:
         """Does not account for policies/flow rules that are appended to a flow table.
+        Only races with a node at position 'fromPos' or later are checked, e.g. when
+        the prefix of the trace was already analyzed.
         Raises TraceAnalyzerError if something goes wrong during the analysis."""
+        return self.firstHarmfulRace(trace, self.candidateRaces(trace, fromPos))
+
+    def firstHarmfulRace(
+        self, trace: List[TraceNode], races: Iterable[CandidateRace]
+    ) -> HarmfulTrace | None:
+        """Checks the given candidate races of the trace in order and returns
+        the first harmful one"""
+        for race in races:
+            res = self._transChecker.checkCandidate(race.candidate)
+            if res is None:
+                continue
+            return HarmfulTrace(
+                trace,
+                self._elsMetadata,
+                [
+                    RacingNode(race.node1Pos, race.el1, res.netPolicy1),
+                    RacingNode(race.node2Pos, race.el2, res.netPolicy2),
+                ],
+                res.raceType,
+            )
+        return None
+
+    def candidateRaces(
+        self, trace: List[TraceNode], fromPos: int = 0
+    ) -> Iterator[CandidateRace]:
+        """Yields the races of the given trace with a node at position 'fromPos'
+        or later, in the order in which they are checked, without checking them.
+        Raises TraceAnalyzerError if the trace is not valid."""
         self._trace = trace
         self._elLastNode = {}
         _validateTrace(self._trace, self._elsMetadata)
@@ -69,12 +114,12 @@ class TraceAnalyzer:
             # destination of the rcfg) because we are interested in races
             # where the switch processes a packet.
             self._elLastNode[el1] = i
+            if i < fromPos:
+                continue
             for el2 in self._findElementsRacingWith(el1):
-                res = self._checkRace(el1, el2)
-                if res is None:
-                    continue
-                return HarmfulTrace(self._trace, self._elsMetadata, res[0], res[1])
-        return None
+                race = self._candidateRace(i, el1, el2)
+                if race is not None:
+                    yield race
 
     def _findElementsRacingWith(self, el1: int) -> List[int]:
         racingElements: List[int] = []
@@ -90,18 +135,13 @@ class TraceAnalyzer:
             racingElements.append(el2)
         return racingElements
 
-    def _checkRace(
-        self, el1: int, el2: int
-    ) -> Tuple[List[RacingNode], RaceType] | None:
+    def _candidateRace(self, pos: int, el1: int, el2: int) -> CandidateRace | None:
         node1Pos = self._elLastNode[el1]
         node2Pos = self._elLastNode[el2]
         if node1Pos > node2Pos:
             node1Pos, node2Pos = node2Pos, node1Pos
             el1, el2 = el2, el1
-        transCheckResult = self._transChecker.check(self._trace, node1Pos, node2Pos)
-        if transCheckResult is not None:
-            return [
-                RacingNode(node1Pos, el1, transCheckResult.netPolicy1),
-                RacingNode(node2Pos, el2, transCheckResult.netPolicy2),
-            ], transCheckResult.raceType
-        return None
+        candidate = self._transChecker.candidate(self._trace, node1Pos, node2Pos)
+        if candidate is None:
+            return None
+        return CandidateRace(pos, node1Pos, el1, node2Pos, el2, candidate)
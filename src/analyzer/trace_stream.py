@@ -0,0 +1,60 @@
+import queue
+from collections.abc import Iterator
+from typing import List
+
+from src.trace.node import TraceNode
+
+# seconds between checks of whether the consumer stopped, while the queue is full
+_PUT_TIMEOUT = 0.1
+
+
+class TraceStreamClosedError(Exception):
+    pass
+
+
+class TraceStream(Iterator[List[TraceNode]]):
+    """Bounded queue handing the traces from the trace generator to the trace
+    analyzer running in another thread. The generator blocks while the queue is
+    full, so at most maxSize traces wait for the analysis at once."""
+
+    def __init__(self, maxSize: int) -> None:
+        self._queue: queue.Queue[List[TraceNode] | None] = queue.Queue(maxSize)
+        self._consumerStopped = False
+        # whether the end of the stream was read, so later reads do not block
+        self._ended = False
+
+    def put(self, trace: List[TraceNode]) -> None:
+        """Adds a trace to the stream. Raises TraceStreamClosedError if the
+        consumer stopped reading the stream."""
+        self.__put(trace)
+
+    def close(self) -> None:
+        """Marks the end of the stream, once all traces were added"""
+        try:
+            self.__put(None)
+        except TraceStreamClosedError:
+            pass
+
+    def stopConsuming(self) -> None:
+        """Called by the consumer when it stops reading the stream, so that the
+        producer does not block forever on a full queue."""
+        self._consumerStopped = True
+
+    def __put(self, item: List[TraceNode] | None) -> None:
+        while True:
+            if self._consumerStopped:
+                raise TraceStreamClosedError("The trace stream consumer stopped")
+            try:
+                self._queue.put(item, timeout=_PUT_TIMEOUT)
+                return
+            except queue.Full:
+                continue
+
+    def __next__(self) -> List[TraceNode]:
+        if self._ended:
+            raise StopIteration()
+        trace = self._queue.get()
+        if trace is None:
+            self._ended = True
+            raise StopIteration()
+        return trace
@@ -1,11 +1,13 @@
 import os
+import time
+from collections.abc import Iterator
+from itertools import islice
 from typing import List, Tuple
 
 from src.analyzer.harmful_trace import HarmfulTrace, RaceType
-from src.analyzer.trace_analyzer import TraceAnalyzer
+from src.analyzer.trace_analyzer import CandidateRace, TraceAnalyzer
 from src.analyzer.transition_checker import TransitionsChecker
 from src.decorators.exec_time import ExecTimes, with_time_execution
-from src.generator.trace_tree import TraceTree
 from src.KATch_comm import KATchComm
 from src.model.dnk_maude_model import ElementMetadata
 from src.stats import StatsEntry, StatsGenerator
@@ -14,6 +16,10 @@ from src.util import exportFile
 
 RAW_HARMFUL_TRACE_FILE_NAME = "harmful_trace_raw"
 HARMFUL_TRACE_FILE_NAME = "harmful_trace"
+# number of traces whose checks are prefetched at once for every KATch worker
+_PREFETCH_TRACES_PER_WORKER = 8
+# trace with its candidate races, or None if they are searched when analyzing it
+_TraceRaces = Tuple[List[TraceNode], List[CandidateRace] | None]
 
 
 def _hasExistingRace(trace: List[TraceNode]) -> bool:
@@ -31,6 +37,34 @@ def _hasExistingRace(trace: List[TraceNode]) -> bool:
     return False
 
 
+def _raceKey(htrace: HarmfulTrace) -> Tuple[str, ...]:
+    """Transitions of the racing nodes, identifying the race across traces"""
+    return tuple(str(htrace.nodes[rn.pos].trans) for rn in htrace.racingNodes)
+
+
+class _AnalyzedPrefix:
+    """Nodes of the last analyzed trace whose races were all checked. Traces
+    sharing a prefix with it, e.g. the next traces of a DFS, are only checked
+    from the end of the shared prefix, so every new node is checked once."""
+
+    def __init__(self) -> None:
+        self.nodes: List[TraceNode] = []
+
+    def sharedLength(self, trace: List[TraceNode]) -> int:
+        n = min(len(trace), len(self.nodes))
+        i = 0
+        while i < n and trace[i] is self.nodes[i]:
+            i += 1
+        return i
+
+    def update(self, trace: List[TraceNode], htrace: HarmfulTrace | None) -> None:
+        if htrace is None:
+            self.nodes = trace
+            return
+        # the race was found while checking its last node
+        self.nodes = trace[: max(rn.pos for rn in htrace.racingNodes)]
+
+
 def _markRacingNodes(trace: List[TraceNode], nodePos: List[int]) -> None:
     for p1 in nodePos:
         for p2 in nodePos:
@@ -59,6 +93,9 @@ class TracesAnalyzer(ExecTimes, StatsGenerator):
         safetyProps: dict[RaceType, str],
         outputDirRaw: str,
         outputDirDOT: str,
+        katchWorkers: int = 1,
+        precomputeLimit: int = 0,
+        maxHarmfulRaces: int = 0,
     ) -> None:
         ExecTimes.__init__(self)
         StatsGenerator.__init__(self)
@@ -66,49 +103,148 @@ class TracesAnalyzer(ExecTimes, StatsGenerator):
         self.safetyProps = safetyProps
         self.outputDirRaw = outputDirRaw
         self.outputDirDOT = outputDirDOT
+        self.katchWorkers = katchWorkers
+        self.precomputeLimit = precomputeLimit
+        # number of harmful races after which the analysis stops, 0 means all
+        self.maxHarmfulRaces = maxHarmfulRaces
         self.harmfulRacesCount = 0
+        # time at which the traces started to be generated, set by the caller
+        self.startTime: float | None = None
+        # time at which the first harmful race of the last run was found
+        self.firstRaceTime: float | None = None
+        # whether the last run stopped before analyzing all traces
+        self.stoppedEarly = False
+        # harmful traces written by all runs, numbering the files of later runs
+        self.writtenHarmfulTraces = 0
+        # racing transitions of the harmful races reported by previous runs,
+        # which are not reported again when analyzing extended traces
+        self.reportedRaces: set[Tuple[str, ...]] = set()
+        self.precomputedVerdictsCount = 0
+        self.precomputeExecTime = 0.0
 
     @with_time_execution
-    def run(self, traceTree: TraceTree, elsMetadata: List[ElementMetadata]) -> None:
-        """Analyzes each trace in the given list, and outputs every trace posing
+    def run(
+        self,
+        traces: Iterator[List[TraceNode]],
+        elsMetadata: List[ElementMetadata],
+        fromPos: int = 0,
+    ) -> None:
+        """Analyzes each of the given traces, and outputs every trace posing
         a harmful race in 2 ways: once as a file containing the raw trace and the
-        information about the harmful race, and once as a DOT file."""
+        information about the harmful race, and once as a DOT file. Only races
+        with a node at position 'fromPos' or later are checked.
+        If a maximum number of harmful races is set, the analysis stops once
+        that many distinct races were found."""
         transChecker = TransitionsChecker(self.katchComm, self.safetyProps, elsMetadata)
+        if self.precomputeLimit > 0:
+            startTime = time.perf_counter()
+            self.precomputedVerdictsCount = transChecker.precomputeNetworks(
+                self.precomputeLimit
+            )
+            self.precomputeExecTime = time.perf_counter() - startTime
         ta = TraceAnalyzer(transChecker, elsMetadata)
         htraces: List[HarmfulTrace] = []
-        for trace in traceTree.getTraceIterator():
+        foundRaces: set[Tuple[str, ...]] = set()
+        self.firstRaceTime = None
+        self.stoppedEarly = False
+        tracesRaces: Iterator[_TraceRaces] = ((trace, None) for trace in traces)
+        if self.katchWorkers > 1:
+            tracesRaces = self.__prefetchChecks(traces, ta, transChecker, fromPos)
+        prefix = _AnalyzedPrefix()
+        for trace, races in tracesRaces:
             if _hasExistingRace(trace):
                 continue
-            htrace = ta.analyze(trace)
+            start = max(fromPos, prefix.sharedLength(trace))
+            if races is None:
+                htrace = ta.analyze(trace, start)
+            else:
+                htrace = ta.firstHarmfulRace(
+                    trace, (r for r in races if r.pos >= start)
+                )
+            prefix.update(trace, htrace)
             if htrace is None:
                 continue
             htraces.append(htrace)
             _markRacingNodes(trace, [rn.pos for rn in htrace.racingNodes])
+            key = _raceKey(htrace)
+            if key in self.reportedRaces or key in foundRaces:
+                continue
+            if self.firstRaceTime is None:
+                self.firstRaceTime = time.perf_counter()
+            foundRaces.add(key)
+            if self.maxHarmfulRaces > 0 and len(foundRaces) >= self.maxHarmfulRaces:
+                self.stoppedEarly = True
+                # the checks prefetched for the remaining traces are not needed
+                self.katchComm.cancelPrefetched()
+                break
         htraces = self.__filterHarmfulRaces(htraces)
         self.harmfulRacesCount = len(htraces)
         self.__writeHarmfulTracesToFile(htraces)
         self.__printSkippedRaces(transChecker)
 
+    def __prefetchChecks(
+        self,
+        traces: Iterator[List[TraceNode]],
+        ta: TraceAnalyzer,
+        transChecker: TransitionsChecker,
+        fromPos: int,
+    ) -> Iterator[_TraceRaces]:
+        """Yields the given traces in windows, together with their candidate races
+        from position 'fromPos' on. Before a window is yielded, the candidate races
+        of the next window are searched and their checks are started in the
+        background, so KATch works on them while the current window is analyzed.
+        The analysis then only checks the recorded races, so every trace is
+        walked once."""
+        windowSize = self.katchWorkers * _PREFETCH_TRACES_PER_WORKER
+        # the races of the shared prefix are taken from the previous trace
+        prefix = _AnalyzedPrefix()
+        prefixRaces: List[CandidateRace] = []
+
+        def nextWindow() -> List[_TraceRaces]:
+            nonlocal prefixRaces
+            window: List[_TraceRaces] = []
+            for trace in islice(traces, windowSize):
+                if _hasExistingRace(trace):
+                    window.append((trace, None))
+                    continue
+                start = max(fromPos, prefix.sharedLength(trace))
+                newRaces = list(ta.candidateRaces(trace, start))
+                transChecker.prefetchCandidates([r.candidate for r in newRaces])
+                races = [r for r in prefixRaces if r.pos < start] + newRaces
+                prefix.update(trace, None)
+                prefixRaces = races
+                window.append((trace, races))
+            return window
+
+        window = nextWindow()
+        while window:
+            followingWindow = nextWindow()
+            yield from window
+            window = followingWindow
+
     def __filterHarmfulRaces(
         self, harmfulTraces: List[HarmfulTrace]
     ) -> List[HarmfulTrace]:
         # transition strings tuple to HarmfulTrace
         filtered: dict[Tuple[str, ...], HarmfulTrace] = {}
         for htrace in harmfulTraces:
-            transIndicies = [rn.pos for rn in htrace.racingNodes]
-            key = tuple(str(htrace.nodes[i].trans) for i in transIndicies)
+            key = _raceKey(htrace)
+            if key in self.reportedRaces:
+                continue
             currBest = filtered.get(key, None)
             if currBest is None:
                 filtered[key] = htrace
                 continue
             currBest = _getSoonerRace(currBest, htrace)
             filtered[key] = currBest
+        self.reportedRaces.update(filtered)
         return list(filtered.values())
 
     def __writeHarmfulTracesToFile(self, htraces: List[HarmfulTrace]) -> None:
-        for i, htrace in enumerate(htraces):
+        for i, htrace in enumerate(htraces, self.writtenHarmfulTraces):
             self.__writeRawTraceToFile(htrace, i)
             self.__writeDOTTraceToFile(htrace.toDOT(), htrace.raceType, i)
+        self.writtenHarmfulTraces += len(htraces)
 
     def __writeRawTraceToFile(self, htrace: HarmfulTrace, traceNumber: int) -> None:
         content = f"{htrace.nodes}\n{htrace.raceType}\n" + os.linesep.join(
@@ -133,9 +269,34 @@ class TracesAnalyzer(ExecTimes, StatsGenerator):
         print("Skipped races:")
         print(skippedRaces)
 
+    def __timeToFirstRace(self) -> float | str:
+        if self.startTime is None or self.firstRaceTime is None:
+            return "-"
+        return self.firstRaceTime - self.startTime
+
     def getStats(self) -> List[StatsEntry]:
         return [
             StatsEntry("harmfulRaces", "Harmful races found", self.harmfulRacesCount),
+            StatsEntry(
+                "precomputedVerdicts",
+                "Precomputed network verdicts",
+                self.precomputedVerdictsCount,
+            ),
+            StatsEntry(
+                "precomputeExecTime",
+                "Verdicts precomputation time",
+                self.precomputeExecTime,
+            ),
+            StatsEntry(
+                "timeToFirstRace",
+                "Time from the start of the generation to the first harmful race",
+                self.__timeToFirstRace(),
+            ),
+            StatsEntry(
+                "stoppedAfterRaces",
+                "Analysis stopped after the maximum number of harmful races",
+                self.stoppedEarly,
+            ),
             StatsEntry(
                 "traceAnalyzerExecTime",
                 "Trace Analyzer execution time",
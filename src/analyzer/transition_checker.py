@@ -2,11 +2,13 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
+from itertools import product
+from math import prod
 from os import linesep
-from typing import List, Protocol, Tuple, TypeVar, cast
+from typing import Hashable, List, Protocol, Tuple, TypeVar, cast
 
 from src.analyzer.harmful_trace import RaceType
-from src.analyzer.util import (buildNetworkPolicy, elementIsActiveInBetween,
+from src.analyzer.util import (NetworkFTs, elementIsActiveInBetween,
                                elementIsRcfgTargetInBetween,
                                reconstructElementFTs)
 from src.KATch_comm import KATchComm
@@ -16,6 +18,7 @@ from src.trace.transition import ITransition, PktProcTrans, RcfgTrans
 
 _T1 = TypeVar("_T1", bound=ITransition)
 _T2 = TypeVar("_T2", bound=ITransition)
+_Network = NetworkFTs | str
 
 
 @dataclass(frozen=True)
@@ -25,6 +28,15 @@ class TransCheckResult:
     netPolicy2: str
 
 
+@dataclass(frozen=True)
+class RaceCandidate:
+    """Race whose harmfulness is decided by checking the safety property of its
+    race type against both networks. Races of skipped types have no networks."""
+
+    raceType: RaceType
+    networks: Tuple[_Network, _Network] | None
+
+
 class RaceHandler[_T1, _T2](ABC):
     def __init__(self, tc: TransitionsChecker, raceType: RaceType) -> None:
         self.tc = tc
@@ -39,25 +51,27 @@ class RaceHandler[_T1, _T2](ABC):
     ) -> bool: ...
 
     @abstractmethod
-    def check(
+    def networks(
         self,
         trace: List[TraceNode],
         t1: Tuple[_T1, int],
         t2: Tuple[_T2, int],
-    ) -> TransCheckResult | None: ...
+    ) -> Tuple[_Network, _Network] | None:
+        """Returns the networks resulting from each of the racing transitions.
+        The race is harmful if the safety property holds for only one of them."""
 
     def _reconstructRcfg(
         self, fts: List[str], policy: str, targetEl: int, targetFTChannel: str
-    ) -> str:
+    ) -> NetworkFTs:
         """
-        If the given node position does not contain a rcfg transition, it
-        returns the policy of the node's transition.
+        Returns the network of the target element after the
+        flow table matching the given channel is set to the given policy.
         """
         targetFt = self.tc.elsMetadata[targetEl].findSwitchIndex(targetFTChannel)
         if targetFt == -1:
             raise ValueError("Could not match network switch based on rcfg channel")
         fts[targetFt] = policy
-        return buildNetworkPolicy(fts, self.tc.elsMetadata[targetEl].link)
+        return NetworkFTs(targetEl, tuple(fts))
 
 
 class SWSWRaceHandler(RaceHandler[PktProcTrans, PktProcTrans]):
@@ -72,12 +86,12 @@ class SWSWRaceHandler(RaceHandler[PktProcTrans, PktProcTrans]):
     ) -> bool:
         return True
 
-    def check(
+    def networks(
         self,
         trace: List[TraceNode],
         t1: Tuple[PktProcTrans, int],
         t2: Tuple[PktProcTrans, int],
-    ) -> TransCheckResult | None:
+    ) -> Tuple[_Network, _Network] | None:
         return None
 
 
@@ -107,12 +121,12 @@ class CTSWCTRaceHandler(RaceHandler[RcfgTrans, RcfgTrans]):
             return False
         return True
 
-    def check(
+    def networks(
         self,
         trace: List[TraceNode],
         t1: Tuple[RcfgTrans, int],
         t2: Tuple[RcfgTrans, int],
-    ) -> TransCheckResult | None:
+    ) -> Tuple[_Network, _Network] | None:
         # Reconstruction is done up to the rcfg (possibly including the other rcfg
         # as well!). This is because not all pairs of racing rcfgs may be harmful,
         # e.g. when the rcfgs target different flow tables of the same element.
@@ -120,13 +134,8 @@ class CTSWCTRaceHandler(RaceHandler[RcfgTrans, RcfgTrans]):
         pol1 = self._reconstructRcfg(swFts, t1[0].policy, t1[0].dstPos, t1[0].channel)
         swFts = reconstructElementFTs(trace, self.tc.elsMetadata, t2[1], t2[0].dstPos)
         pol2 = self._reconstructRcfg(swFts, t2[0].policy, t2[0].dstPos, t2[0].channel)
-
         # harmful if the new policy of CT1 is not equivalent to the new policy from CT2
-        res1 = self.tc.katchComm.checkProperty(self.tc.safetyProps[self.raceType], pol1)
-        res2 = self.tc.katchComm.checkProperty(self.tc.safetyProps[self.raceType], pol2)
-        if res1 == res2:
-            return None
-        return TransCheckResult(self.raceType, pol1, pol2)
+        return pol1, pol2
 
 
 class CTCTSWRaceHandler(RaceHandler[RcfgTrans, RcfgTrans]):
@@ -161,12 +170,12 @@ class CTCTSWRaceHandler(RaceHandler[RcfgTrans, RcfgTrans]):
             return False
         return True
 
-    def check(
+    def networks(
         self,
         trace: List[TraceNode],
         t1: Tuple[RcfgTrans, int],
         t2: Tuple[RcfgTrans, int],
-    ) -> TransCheckResult | None:
+    ) -> Tuple[_Network, _Network] | None:
         swapped = False
         if t1[1] > t2[1]:
             t1, t2 = t2, t1
@@ -176,15 +185,9 @@ class CTCTSWRaceHandler(RaceHandler[RcfgTrans, RcfgTrans]):
         swFts = reconstructElementFTs(trace, self.tc.elsMetadata, min(t1[1], t2[1]), sw)
         pol1 = self._reconstructRcfg(swFts, ct1Rcfg.policy, sw, ct1Rcfg.channel)
         pol2 = self._reconstructRcfg(swFts, ct2Rcfg.policy, sw, ct1Rcfg.channel)
-
-        res1 = self.tc.katchComm.checkProperty(self.tc.safetyProps[self.raceType], pol1)
-        res2 = self.tc.katchComm.checkProperty(self.tc.safetyProps[self.raceType], pol2)
-        # harmful if one of the policies satisfies the property, but the other does not
-        if res1 == res2:
-            return None
         if swapped:
-            pol1, pol2 = pol2, pol1
-        return TransCheckResult(self.raceType, pol1, pol2)
+            return pol2, pol1
+        return pol1, pol2
 
 
 class CTSWRaceHandler(RaceHandler[RcfgTrans, PktProcTrans]):
@@ -210,23 +213,15 @@ class CTSWRaceHandler(RaceHandler[RcfgTrans, PktProcTrans]):
             return False
         return True
 
-    def check(
+    def networks(
         self,
         trace: List[TraceNode],
         t1: Tuple[RcfgTrans, int],
         t2: Tuple[PktProcTrans, int],
-    ) -> TransCheckResult | None:
+    ) -> Tuple[_Network, _Network] | None:
         swFts = reconstructElementFTs(trace, self.tc.elsMetadata, t1[1], t1[0].dstPos)
         pol1 = self._reconstructRcfg(swFts, t1[0].policy, t1[0].dstPos, t1[0].channel)
-
-        res1 = self.tc.katchComm.checkProperty(self.tc.safetyProps[self.raceType], pol1)
-        res2 = self.tc.katchComm.checkProperty(
-            self.tc.safetyProps[self.raceType], t2[0].policy
-        )
-        # harmful if one of the policies satisfies the property, but the other does not
-        if res1 == res2:
-            return None
-        return TransCheckResult(self.raceType, pol1, t2[0].policy)
+        return pol1, t2[0].policy
 
 
 class SWCTRaceHandler(RaceHandler[PktProcTrans, RcfgTrans]):
@@ -242,16 +237,16 @@ class SWCTRaceHandler(RaceHandler[PktProcTrans, RcfgTrans]):
     ) -> bool:
         return self.handler.validate(trace, t2, t1)
 
-    def check(
+    def networks(
         self,
         trace: List[TraceNode],
         t1: Tuple[PktProcTrans, int],
         t2: Tuple[RcfgTrans, int],
-    ) -> TransCheckResult | None:
-        res = self.handler.check(trace, t2, t1)
+    ) -> Tuple[_Network, _Network] | None:
+        res = self.handler.networks(trace, t2, t1)
         if res is not None:
-            # reverse network policies to match input parameters
-            return TransCheckResult(res.raceType, res.netPolicy2, res.netPolicy1)
+            # reverse networks to match input parameters
+            return res[1], res[0]
         return res
 
 
@@ -285,6 +280,11 @@ class TransitionsChecker:
             [] if skippedRaces is None else skippedRaces
         )
         self._skippedRaces.append(RaceType.SW_SW)
+        # flow table policies mapped to ids, used to key the verdicts of networks
+        self._ftIds: dict[str, int] = {}
+        self._verdicts: dict[Tuple[RaceType, Hashable], bool] = {}
+        # policies of the networks whose checks were prefetched, until checked
+        self._prefetchedPolicies: dict[Tuple[RaceType, Hashable], str] = {}
 
         self._handlers: _RaceHandlersDict = cast(_RaceHandlersDict, {})
         self._handlers[(PktProcTrans, PktProcTrans)] = [SWSWRaceHandler(self)]
@@ -298,6 +298,16 @@ class TransitionsChecker:
     def check(
         self, trace: List[TraceNode], t1Pos: int, t2Pos: int
     ) -> TransCheckResult | None:
+        candidate = self.candidate(trace, t1Pos, t2Pos)
+        if candidate is None:
+            return None
+        return self.checkCandidate(candidate)
+
+    def candidate(
+        self, trace: List[TraceNode], t1Pos: int, t2Pos: int
+    ) -> RaceCandidate | None:
+        """Returns the race between the given transitions of the trace without
+        checking it, or None if the transitions cannot race harmfully."""
         t1 = trace[t1Pos].trans
         t2 = trace[t2Pos].trans
         key = (type(t1), type(t2))
@@ -309,11 +319,111 @@ class TransitionsChecker:
             if not handler.validate(*args):
                 continue
             if handler.raceType in self._skippedRaces:
-                self._addSkippedRace(handler.raceType)
+                return RaceCandidate(handler.raceType, None)
+            networks = handler.networks(*args)
+            if networks is None:
                 return None
-            return handler.check(*args)
+            return RaceCandidate(handler.raceType, networks)
         return None
 
+    def checkCandidate(self, candidate: RaceCandidate) -> TransCheckResult | None:
+        """Returns the result of the given race if it is harmful, i.e. if
+        one of its networks satisfies the property, but the other does not."""
+        if candidate.networks is None:
+            self._addSkippedRace(candidate.raceType)
+            return None
+        net1, net2 = candidate.networks
+        res1, res2 = self.checkNetworks(candidate.raceType, [net1, net2])
+        if res1 == res2:
+            return None
+        return TransCheckResult(
+            candidate.raceType, self.networkPolicy(net1), self.networkPolicy(net2)
+        )
+
+    def prefetchCandidates(self, candidates: List[RaceCandidate]) -> None:
+        """Starts the checks of the networks of the given races whose verdicts
+        are not known yet in the background, see KATchComm.prefetchProperties."""
+        policies: dict[RaceType, List[str]] = {}
+        for candidate in candidates:
+            if candidate.networks is None:
+                continue
+            for network in candidate.networks:
+                key = (candidate.raceType, self._networkKey(network))
+                if key in self._verdicts or key in self._prefetchedPolicies:
+                    continue
+                policy = self.networkPolicy(network)
+                self._prefetchedPolicies[key] = policy
+                policies.setdefault(candidate.raceType, []).append(policy)
+        for raceType, exprs in policies.items():
+            self.katchComm.prefetchProperties(self.safetyProps[raceType], exprs)
+
+    def precomputeNetworks(self, maxNetworksPerElement: int) -> int:
+        """Checks the safety property of every race type against all networks
+        that can be reached by reconfiguring the switches of an element, so that
+        the verdicts of these networks are known before any trace is analyzed.
+        Elements with more reachable networks than the given maximum are skipped.
+        Returns the number of precomputed verdicts."""
+        networks: List[NetworkFTs | str] = []
+        for elPos, metadata in enumerate(self.elsMetadata):
+            if metadata.pType != ElementType.SW or not metadata.reachableFTs:
+                continue
+            if prod(len(fts) for fts in metadata.reachableFTs) > maxNetworksPerElement:
+                continue
+            networks.extend(
+                NetworkFTs(elPos, fts) for fts in product(*metadata.reachableFTs)
+            )
+        if not networks:
+            return 0
+        count = 0
+        for raceType in self.safetyProps:
+            if raceType in self._skippedRaces:
+                continue
+            self.checkNetworks(raceType, networks)
+            count += len(networks)
+        return count
+
+    def checkNetworks(
+        self, raceType: RaceType, networks: List[NetworkFTs | str]
+    ) -> List[bool]:
+        """Checks the safety property of the given race type against every given
+        network, or network policy. Verdicts are keyed by the flow table ids of
+        the networks, so network policies are only built for unseen networks."""
+        keys = [(raceType, self._networkKey(net)) for net in networks]
+        missing = [i for i, key in enumerate(keys) if key not in self._verdicts]
+        if missing:
+            policies = [self._missingPolicy(keys[i], networks[i]) for i in missing]
+            for i, res in zip(missing, self.checkProperties(raceType, policies)):
+                self._verdicts[keys[i]] = res
+        return [self._verdicts[key] for key in keys]
+
+    def _missingPolicy(self, key: Tuple[RaceType, Hashable], network: _Network) -> str:
+        policy = self._prefetchedPolicies.pop(key, None)
+        if policy is None:
+            return self.networkPolicy(network)
+        return policy
+
+    def networkPolicy(self, network: NetworkFTs | str) -> str:
+        if isinstance(network, str):
+            return network
+        return network.policy(self.elsMetadata)
+
+    def _networkKey(self, network: NetworkFTs | str) -> Hashable:
+        if isinstance(network, str):
+            return network
+        return (network.elPos, tuple(self._ftId(ft) for ft in network.fts))
+
+    def _ftId(self, ft: str) -> int:
+        ftId = self._ftIds.get(ft)
+        if ftId is None:
+            ftId = len(self._ftIds)
+            self._ftIds[ft] = ftId
+        return ftId
+
+    def checkProperties(self, raceType: RaceType, policies: List[str]) -> List[bool]:
+        """Checks the safety property of the given race type against every
+        given network policy using a single KATch run."""
+        return self.katchComm.checkProperties(self.safetyProps[raceType], policies)
+
     def _addSkippedRace(self, rt: RaceType) -> None:
         if rt not in self._skipped:
             self._skipped[rt] = 1
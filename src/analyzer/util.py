@@ -1,4 +1,5 @@
-from typing import List
+from dataclasses import dataclass
+from typing import List, Tuple
 
 from src.model.dnk_maude_model import ElementMetadata
 from src.trace.node import TraceNode
@@ -15,6 +16,18 @@ def buildNetworkPolicy(fts: List[str], link: str) -> str:
     return f"({oneStepStr}) {sym.AND} ({oneStepStr}){sym.STAR}"
 
 
+@dataclass(frozen=True)
+class NetworkFTs:
+    """Network of an element, given by the flow tables of its switches.
+    The network policy is only built when it is needed."""
+
+    elPos: int
+    fts: Tuple[str, ...]
+
+    def policy(self, elsMetadata: List[ElementMetadata]) -> str:
+        return buildNetworkPolicy(list(self.fts), elsMetadata[self.elPos].link)
+
+
 def reconstructElementFTs(
     trace: List[TraceNode], elsMetadata: List[ElementMetadata], end: int, targetEl: int
 ) -> List[str]:
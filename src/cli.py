@@ -19,6 +19,27 @@ class CLIArguments(StatsGenerator):
     threads: int
     verbose: bool
     strategy: TraceGenOption
+    katchSession: bool
+    katchWorkers: int
+    katchCacheDir: str | None
+    katchCacheSize: int
+    katchTimeout: int
+    precomputeLimit: int
+    stateGraph: bool
+    partialOrderReduction: bool
+    genCacheSize: int
+    genCacheDir: str | None
+    streamTraces: bool
+    saveFrontier: str | None
+    extendFrontier: str | None
+    pbfsChunkSize: int
+    frontierMemory: int
+    checkpointInterval: int
+    resume: str | None
+    maxHarmfulRaces: int
+    maxNodes: int
+    maxMemory: int
+    timeBudget: int
 
     def getStats(self) -> List[StatsEntry]:
         return [
@@ -55,8 +76,11 @@ def buildArgsParser() -> argparse.ArgumentParser:
         type=int,
         dest="threads",
         default=1,
-        help="Number of threads to use when generating traces "
-        + f"(only used for the '{TraceGenOption.PBFS}' generation strategy)",
+        help="Number of threads to use when generating traces (the "
+        + f"'{TraceGenOption.DFS}' and '{TraceGenOption.BFS}' generation strategies "
+        + "run one Maude process per thread. With more than one thread, "
+        + f"'{TraceGenOption.DFS}' expands one node per thread at once, so the "
+        + "traces come out in a slightly different order)",
     )
     parser.add_argument(
         "-v",
@@ -77,6 +101,197 @@ def buildArgsParser() -> argparse.ArgumentParser:
         help="Strategy used to generate the traces (default is "
         + f"'{TraceGenOption.BFS}')",
     )
+    parser.add_argument(
+        "--no-katch-session",
+        dest="katchSession",
+        default=True,
+        action="store_false",
+        help="Start a new KATch process for every check instead of "
+        + "keeping a single KATch process running during the analysis",
+    )
+    parser.add_argument(
+        "--katch-workers",
+        type=int,
+        dest="katchWorkers",
+        default=1,
+        help="Number of KATch checks to run concurrently during the trace analysis "
+        + "(default is 1)",
+    )
+    parser.add_argument(
+        "--katch-cache-dir",
+        dest="katchCacheDir",
+        default=None,
+        help="Directory where the results of KATch checks are stored, so they can "
+        + "be reused by later runs (disabled by default)",
+    )
+    parser.add_argument(
+        "--katch-cache-size",
+        type=int,
+        dest="katchCacheSize",
+        default=256,
+        help="Maximum size in MB of the KATch results stored in the directory "
+        + "given by --katch-cache-dir (default is 256)",
+    )
+    parser.add_argument(
+        "--katch-timeout",
+        type=int,
+        dest="katchTimeout",
+        default=0,
+        metavar="SECONDS",
+        help="Stop a KATch check that takes longer than SECONDS seconds. A timed "
+        + "out check fails the analysis (default is 0, i.e. unlimited)",
+    )
+    parser.add_argument(
+        "--precompute-verdicts",
+        type=int,
+        dest="precomputeLimit",
+        default=0,
+        metavar="MAX_NETWORKS",
+        help="Before analyzing the traces, check the safety properties against all "
+        + "networks reachable by reconfiguring the switches, if there are at most "
+        + "MAX_NETWORKS of them (default is 0, i.e. disabled)",
+    )
+    parser.add_argument(
+        "--state-graph",
+        dest="stateGraph",
+        default=False,
+        action="store_true",
+        help="Merge trace nodes reaching the same DNK state with the same vector "
+        + "clocks, storing the traces as a DAG instead of a tree",
+    )
+    parser.add_argument(
+        "--por",
+        dest="partialOrderReduction",
+        default=False,
+        action="store_true",
+        help="Generate only one of the interleavings that differ in the order of "
+        + "independent reconfigurations (partial-order reduction using sleep sets)",
+    )
+    parser.add_argument(
+        "--gen-cache-size",
+        type=int,
+        dest="genCacheSize",
+        default=0,
+        help="Maximum size in MB of the Maude results cached during trace "
+        + "generation, evicting the least recently used ones. The DNK states "
+        + "no longer referenced by the cache or by the nodes to expand are "
+        + "released as well, except with --state-graph "
+        + "(default is 0, i.e. unbounded)",
+    )
+    parser.add_argument(
+        "--gen-cache-dir",
+        dest="genCacheDir",
+        default=None,
+        help="Directory where the Maude results computed during trace generation "
+        + "are stored, so they can be reused by later runs on the same model "
+        + "(disabled by default)",
+    )
+    parser.add_argument(
+        "--stream",
+        dest="streamTraces",
+        default=False,
+        action="store_true",
+        help="Analyze the traces while they are generated instead of keeping the "
+        + "whole trace tree in memory (only the "
+        + f"'{TraceGenOption.DFS}' and '{TraceGenOption.BFS}' generation strategies "
+        + "without --state-graph stream the traces during the generation)",
+    )
+    parser.add_argument(
+        "--save-frontier",
+        dest="saveFrontier",
+        default=None,
+        metavar="FILE",
+        help="Save the generated trace tree and its leaves at the maximum depth to "
+        + "the given file, so a later run can extend the traces with --extend",
+    )
+    parser.add_argument(
+        "--extend",
+        dest="extendFrontier",
+        default=None,
+        metavar="FILE",
+        help="Extend the traces saved with --save-frontier to the given depth "
+        + "instead of generating them again. If the saved traces were analyzed, "
+        + "only the races involving the new transitions are checked",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        dest="pbfsChunkSize",
+        default=0,
+        metavar="CHUNK_SIZE",
+        help="Number of DNK states sent at once to a Maude worker by the "
+        + f"'{TraceGenOption.PBFS}' generation strategy. Workers take the next chunk "
+        + "once they are done with their last one, which balances uneven layers "
+        + "(default is 0, i.e. every layer is split evenly between the workers)",
+    )
+    parser.add_argument(
+        "--frontier-memory",
+        type=int,
+        dest="frontierMemory",
+        default=0,
+        help="Maximum size in MB of the queue of trace nodes waiting to be expanded "
+        + f"by the '{TraceGenOption.BFS}' and '{TraceGenOption.PBFS}' generation "
+        + "strategies that is kept in memory. The ids of the other nodes are written "
+        + "to disk in the run output directory until they are expanded, while the "
+        + "nodes stay in the trace tree (default is 0, i.e. unbounded)",
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=int,
+        dest="checkpointInterval",
+        default=0,
+        metavar="SECONDS",
+        help="Save the state of the trace generation to the run output directory "
+        + "every SECONDS seconds, so it can be resumed with --resume if the run "
+        + "does not finish (default is 0, i.e. disabled)",
+    )
+    parser.add_argument(
+        "--resume",
+        dest="resume",
+        default=None,
+        metavar="RUN_DIR",
+        help="Resume the trace generation from the last checkpoint saved in the "
+        + "given run output directory, up to the depth it was started with",
+    )
+    parser.add_argument(
+        "--stop-after-races",
+        type=int,
+        dest="maxHarmfulRaces",
+        default=0,
+        metavar="N",
+        help="Stop the analysis once N distinct harmful races were found. The "
+        + "trace generation only stops early when the traces are streamed with "
+        + "--stream, otherwise all traces are generated before the analysis "
+        + "(default is 0, i.e. analyze all traces)",
+    )
+    parser.add_argument(
+        "--max-nodes",
+        type=int,
+        dest="maxNodes",
+        default=0,
+        metavar="MAX_NODES",
+        help="Stop the trace generation once MAX_NODES trace nodes were created. "
+        + "The traces generated so far are still analyzed (default is 0, i.e. "
+        + "unlimited)",
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=int,
+        dest="maxMemory",
+        default=0,
+        help="Stop the trace generation once the memory used by the process "
+        + "reaches the given size in MB. The traces generated so far are still "
+        + "analyzed (default is 0, i.e. unlimited)",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=int,
+        dest="timeBudget",
+        default=0,
+        metavar="SECONDS",
+        help="Stop the trace generation after SECONDS seconds. The traces "
+        + "generated so far are still analyzed (default is 0, i.e. unlimited)",
+    )
     return parser
 
 
@@ -97,6 +312,54 @@ def validateArgs(args: CLIArguments) -> None:
         raise CLIError("Depth cannot be negative")
     if args.threads < 1:
         raise CLIError("Number of threads must be a positive integer")
+    if args.katchWorkers < 1:
+        raise CLIError("Number of KATch workers must be a positive integer")
+    if args.katchCacheSize < 1:
+        raise CLIError("KATch cache size must be a positive integer")
+    if args.katchTimeout < 0:
+        raise CLIError("KATch timeout cannot be negative")
+    if args.precomputeLimit < 0:
+        raise CLIError("Maximum number of precomputed networks cannot be negative")
+    if args.genCacheSize < 0:
+        raise CLIError("Trace generation cache size cannot be negative")
+    if args.frontierMemory < 0:
+        raise CLIError("Frontier memory size cannot be negative")
+    if args.pbfsChunkSize < 0:
+        raise CLIError("Chunk size cannot be negative")
+    if args.stateGraph and args.partialOrderReduction:
+        raise CLIError("--state-graph cannot be used together with --por")
+    if args.maxNodes < 0:
+        raise CLIError("Maximum number of trace nodes cannot be negative")
+    if args.maxMemory < 0:
+        raise CLIError("Maximum memory size cannot be negative")
+    if args.timeBudget < 0:
+        raise CLIError("Time budget cannot be negative")
+    if args.maxHarmfulRaces < 0:
+        raise CLIError("Number of harmful races to stop after cannot be negative")
+    if args.checkpointInterval < 0:
+        raise CLIError("Checkpoint interval cannot be negative")
+    usesCheckpoints = args.checkpointInterval > 0 or args.resume is not None
+    if usesCheckpoints and args.strategy == TraceGenOption.PBFS:
+        raise CLIError(
+            f"The '{TraceGenOption.PBFS}' generation strategy cannot save or resume "
+            + "checkpoints"
+        )
+    if usesCheckpoints and args.streamTraces:
+        raise CLIError("--stream cannot be used with checkpoints")
+    if args.resume is not None and args.extendFrontier is not None:
+        raise CLIError("--resume cannot be used together with --extend")
+    if args.resume is not None and not os.path.isdir(args.resume):
+        raise CLIError(f"Run output directory not found: '{args.resume}'")
+    usesFrontier = args.saveFrontier is not None or args.extendFrontier is not None
+    if usesFrontier and args.strategy == TraceGenOption.PBFS:
+        raise CLIError(
+            f"The '{TraceGenOption.PBFS}' generation strategy cannot save or extend "
+            + "traces"
+        )
+    if usesFrontier and args.streamTraces:
+        raise CLIError("--stream cannot be used to save or extend traces")
+    if args.extendFrontier is not None and not os.path.isfile(args.extendFrontier):
+        raise CLIError(f"Saved traces file not found: '{args.extendFrontier}'")
     if args.strategy not in TraceGenOption:
         raise CLIError(f"Unknown strategy: '{args.strategy}'")
 
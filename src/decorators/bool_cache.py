@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from abc import ABC
 from functools import wraps
+from threading import Lock
 from typing import Callable, Concatenate, Dict, Hashable, Protocol, Tuple
 
 from src.decorators.cache_stats import CacheStats
@@ -10,12 +11,17 @@ from src.decorators.cache_stats import CacheStats
 class _PBoolCache(Protocol):
     cache: Dict[str, Dict[Tuple[Hashable, ...], bool]]
     cacheStats: Dict[str, CacheStats]
+    cacheLock: Lock
 
 
 class BoolCache(ABC):
+    """Class for caching boolean method results.
+    Results can be looked up and stored from multiple threads."""
+
     def __init__(self) -> None:
         self.cache: Dict[str, Dict[Tuple[Hashable, ...], bool]] = {}
         self.cacheStats: Dict[str, CacheStats] = {}
+        self.cacheLock = Lock()
 
     def getTotalCacheHits(self) -> int:
         return sum([stats.hits for stats in self.cacheStats.values()])
@@ -23,6 +29,34 @@ class BoolCache(ABC):
     def getTotalCacheMisses(self) -> int:
         return sum([stats.misses for stats in self.cacheStats.values()])
 
+    def isCached(self, methodName: str, *args: Hashable) -> bool:
+        """Whether a result is cached for the given method and arguments.
+        Does not count as a cache hit or miss."""
+        with self.cacheLock:
+            return _cacheKey(args, {}) in self.cache.get(methodName, {})
+
+    def lookupCache(self, methodName: str, *args: Hashable) -> bool | None:
+        """Returns the result cached for the given method and arguments, or None
+        if there is no such result. Found results are counted as cache hits."""
+        with self.cacheLock:
+            result = self.cache.get(methodName, {}).get(_cacheKey(args, {}), None)
+            if result is not None:
+                self.cacheStats.setdefault(methodName, CacheStats(0, 0)).hits += 1
+        return result
+
+    def storeCache(self, methodName: str, result: bool, *args: Hashable) -> None:
+        """Caches the result of the given method for the given arguments.
+        Stored results are counted as cache misses."""
+        with self.cacheLock:
+            self.cache.setdefault(methodName, {})[_cacheKey(args, {})] = result
+            self.cacheStats.setdefault(methodName, CacheStats(0, 0)).misses += 1
+
+
+def _cacheKey(
+    args: Tuple[Hashable, ...], kwargs: Dict[str, Hashable]
+) -> Tuple[Hashable, ...]:
+    return (*args, tuple(kwargs.items()))
+
 
 def with_bool_cache[M: _PBoolCache, **P](
     method: Callable[Concatenate[M, P], bool],
@@ -31,17 +65,20 @@ def with_bool_cache[M: _PBoolCache, **P](
 
     @wraps(method)
     def wrapper(self: M, /, *args: P.args, **kwargs: P.kwargs) -> bool:
-        c = self.cache.setdefault(method.__name__, {})
-        cs = self.cacheStats.setdefault(method.__name__, CacheStats(0, 0))
-
-        key = (*args, tuple(**kwargs))
-        if key in c:
-            cs.hits += 1
-            return c[key]
+        key = _cacheKey(args, kwargs)
+        with self.cacheLock:
+            c = self.cache.setdefault(method.__name__, {})
+            cs = self.cacheStats.setdefault(method.__name__, CacheStats(0, 0))
+            if key in c:
+                cs.hits += 1
+                return c[key]
+        # the lock is not held while the method runs, so that other threads
+        # can use the cache meanwhile
         result = method(self, *args, **kwargs)
 
-        c[key] = result
-        cs.misses += 1
+        with self.cacheLock:
+            c[key] = result
+            cs.misses += 1
         return result
 
     return wrapper
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from abc import ABC
+from dataclasses import dataclass
+from functools import wraps
+from math import ceil
+from threading import Lock
+from time import perf_counter
+from typing import Callable, Concatenate, Dict, List, Protocol
+
+
+@dataclass(frozen=True)
+class LatencySummary:
+    count: int
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+    def __str__(self) -> str:
+        return (
+            f"count={self.count};p50={self.p50:.6f};p95={self.p95:.6f};"
+            + f"p99={self.p99:.6f};max={self.max:.6f}"
+        )
+
+
+def _percentile(sortedValues: List[float], p: float) -> float:
+    """Nearest-rank percentile of the given sorted values."""
+    if not sortedValues:
+        return 0.0
+    rank = max(1, ceil(p / 100 * len(sortedValues)))
+    return sortedValues[rank - 1]
+
+
+class _PLatencies(Protocol):
+    def addLatency(self, key: str, latency: float) -> None: ...
+
+
+class Latencies(ABC):
+    """Class for storing the latency of every call of a method.
+    Latencies can be added from multiple threads."""
+
+    def __init__(self) -> None:
+        self._latencies: Dict[str, List[float]] = {}
+        self._latenciesLock = Lock()
+
+    def addLatency(self, key: str, latency: float) -> None:
+        with self._latenciesLock:
+            self._latencies.setdefault(key, []).append(latency)
+
+    def getLatencyKeys(self) -> List[str]:
+        with self._latenciesLock:
+            return list(self._latencies.keys())
+
+    def getLatencySummary(self, key: str) -> LatencySummary:
+        with self._latenciesLock:
+            values = sorted(self._latencies.get(key, []))
+        return LatencySummary(
+            len(values),
+            _percentile(values, 50),
+            _percentile(values, 95),
+            _percentile(values, 99),
+            values[-1] if values else 0.0,
+        )
+
+
+def with_latency[M: _PLatencies, **P, R](
+    method: Callable[Concatenate[M, P], R],
+) -> Callable[Concatenate[M, P], R]:
+    """Decorator to record the latency of every method call."""
+
+    @wraps(method)
+    def wrapper(self: M, /, *args: P.args, **kwargs: P.kwargs) -> R:
+        start_time = perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.addLatency(method.__name__, perf_counter() - start_time)
+
+    return wrapper
@@ -0,0 +1,18 @@
+from functools import wraps
+from typing import Callable
+
+from src.netkat.normalizer import normalizeNetKAT
+
+
+def with_normalized_netkat[M, R](
+    method: Callable[[M, str, str], R],
+) -> Callable[[M, str, str], R]:
+    """Decorator replacing both string arguments of the method with their
+    canonical NetKAT form. Strings that are not NetKAT expressions, e.g. safety
+    properties with NKPL relations, are passed unchanged."""
+
+    @wraps(method)
+    def wrapper(self: M, s1: str, s2: str, /) -> R:
+        return method(self, normalizeNetKAT(s1), normalizeNetKAT(s2))
+
+    return wrapper
@@ -0,0 +1,93 @@
+import os
+import resource
+from enum import StrEnum
+from time import perf_counter
+from typing import List
+
+# seconds between two measurements of the memory of the process
+_MEMORY_CHECK_INTERVAL = 0.1
+
+
+class BudgetKind(StrEnum):
+    NODES = "nodes"
+    MEMORY = "memory"
+    TIME = "time"
+
+
+def processMemoryBytes() -> int:
+    """Returns the resident memory of the current process, or its peak resident
+    memory where the current one cannot be read"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class GenerationBudget:
+    """Limits of a trace generation besides its depth, 0 meaning unlimited.
+    Once one of them is exceeded, the generation stops and keeps the traces
+    generated so far."""
+
+    def __init__(self, maxNodes: int, maxMemoryMB: int, timeBudget: int) -> None:
+        self.maxNodes = maxNodes
+        self.maxMemoryBytes = maxMemoryMB * 1024 * 1024
+        self.timeBudget = timeBudget
+        self.startTime = 0.0
+        self._lastMemoryCheck = 0.0
+
+    def start(self) -> None:
+        self.startTime = perf_counter()
+        self._lastMemoryCheck = -_MEMORY_CHECK_INTERVAL
+
+    def exceeded(self, nodeCount: int) -> BudgetKind | None:
+        """Returns the budget exceeded by a generation having created the given
+        number of trace nodes, if any"""
+        if self.maxNodes > 0 and nodeCount >= self.maxNodes:
+            return BudgetKind.NODES
+        if self.timeBudget <= 0 and self.maxMemoryBytes <= 0:
+            return None
+        now = perf_counter()
+        if self.timeBudget > 0 and now - self.startTime >= self.timeBudget:
+            return BudgetKind.TIME
+        if (
+            self.maxMemoryBytes > 0
+            and now - self._lastMemoryCheck >= _MEMORY_CHECK_INTERVAL
+        ):
+            self._lastMemoryCheck = now
+            if processMemoryBytes() >= self.maxMemoryBytes:
+                return BudgetKind.MEMORY
+        return None
+
+
+class LevelProgress:
+    """Number of trace nodes of each depth level that were expanded, and of the
+    ones left unexpanded when the generation stopped"""
+
+    def __init__(self) -> None:
+        self.expanded: List[int] = []
+        self.remaining: List[int] = []
+
+    def addExpanded(self, level: int, count: int = 1) -> None:
+        self.__grow(level)
+        self.expanded[level] += count
+
+    def addRemaining(self, level: int, count: int = 1) -> None:
+        self.__grow(level)
+        self.remaining[level] += count
+
+    def completion(self, levelCount: int, stopped: bool) -> List[float]:
+        """Returns the fraction of the nodes of each of the given number of levels
+        that were expanded. Levels without nodes were not reached if the
+        generation stopped, and had no nodes to expand otherwise."""
+        self.__grow(levelCount - 1)
+        return [
+            e / (e + r) if e + r > 0 else 0.0 if stopped else 1.0
+            for e, r in zip(self.expanded[:levelCount], self.remaining)
+        ]
+
+    def __grow(self, level: int) -> None:
+        while len(self.expanded) <= level:
+            self.expanded.append(0)
+            self.remaining.append(0)
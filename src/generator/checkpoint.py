@@ -0,0 +1,97 @@
+import os
+import pickle
+from collections.abc import Iterable
+from dataclasses import dataclass
+from itertools import batched
+from typing import List, Tuple, cast
+
+from src.generator.dnk_states import DNKStates
+from src.generator.frontier import FrontierItem
+from src.generator.neighbor_cache import NeighborCache
+from src.generator.partial_order_reduction import SleepSets
+from src.generator.trace_tree import PendingNode, TraceTree
+from src.trace.node import TraceNode
+
+CHECKPOINT_FILE_NAME = "checkpoint.pickle"
+# work list items pickled at once after the checkpoint
+_WORK_LIST_BATCH_SIZE = 4096
+
+# id of the DNK state to expand, its trace node, or its pending node if it was
+# not added to the trace tree yet, and its depth
+type WorkListItem = Tuple[int, TraceNode | PendingNode, int]
+
+
+class CheckpointError(Exception):
+    pass
+
+
+@dataclass
+class Checkpoint:
+    """State of an unfinished trace generation, saved periodically to the run
+    output directory so that the generation can be resumed after a crash."""
+
+    modelHash: str
+    depth: int
+    traceTree: TraceTree
+    # items of the work list that were not expanded yet
+    workList: List[WorkListItem]
+    # trace leaves at the maximum depth found so far
+    frontierItems: List[FrontierItem]
+    states: DNKStates
+    cache: NeighborCache
+    sleepSets: SleepSets | None
+    # id of the next trace node, so resumed trees keep unique node ids
+    nextNodeId: int
+
+
+def checkpointPath(runDirPath: str) -> str:
+    return os.path.join(runDirPath, CHECKPOINT_FILE_NAME)
+
+
+def saveCheckpoint(
+    runDirPath: str, checkpoint: Checkpoint, workList: Iterable[WorkListItem]
+) -> int:
+    """Saves the given checkpoint, replacing the previous one of the run only
+    once it is completely written. The items of the work list are written in
+    batches after the checkpoint, so a work list spilled to disk is not loaded
+    back at once. Returns the size of the checkpoint in bytes."""
+    filePath = checkpointPath(runDirPath)
+    tmpFilePath = f"{filePath}.tmp"
+    with open(tmpFilePath, "wb") as f:
+        # a single pickler, so the items refer to the nodes of the pickled tree
+        pickler = pickle.Pickler(f, pickle.HIGHEST_PROTOCOL)
+        pickler.dump(checkpoint)
+        for batch in batched(workList, _WORK_LIST_BATCH_SIZE):
+            pickler.dump(batch)
+        # an empty batch ends the work list
+        pickler.dump(())
+    os.replace(tmpFilePath, filePath)
+    return os.path.getsize(filePath)
+
+
+def loadCheckpoint(runDirPath: str) -> Checkpoint:
+    """Loads the last checkpoint saved in the given run output directory. Node
+    ids of the current process are moved past the ones of the loaded trace tree."""
+    filePath = checkpointPath(runDirPath)
+    if not os.path.isfile(filePath):
+        raise CheckpointError(f"No checkpoint found in {runDirPath}")
+    with open(filePath, "rb") as f:
+        unpickler = pickle.Unpickler(f)
+        checkpoint: object = unpickler.load()
+        if not isinstance(checkpoint, Checkpoint):
+            raise CheckpointError(f"File {filePath} does not contain a checkpoint")
+        while True:
+            batch: object = unpickler.load()
+            items = cast(tuple[WorkListItem, ...], batch)
+            if not items:
+                break
+            checkpoint.workList.extend(items)
+    TraceNode.reserveIds(checkpoint.nextNodeId)
+    return checkpoint
+
+
+def removeCheckpoint(runDirPath: str) -> None:
+    """Removes the checkpoint of a run whose generation finished"""
+    filePath = checkpointPath(runDirPath)
+    if os.path.isfile(filePath):
+        os.remove(filePath)
@@ -0,0 +1,161 @@
+# mypy: disable-error-code="import-untyped,no-any-unimported,misc"
+from collections.abc import Set
+from typing import List, Tuple, cast
+
+import maude
+
+
+class _TermKey:
+    """Hashable wrapper of a Maude term, compared modulo its equational axioms"""
+
+    __slots__ = ("term", "_hash")
+
+    def __init__(self, term: maude.Term) -> None:
+        self.term = term
+        self._hash: int = term.hash()
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _TermKey) and bool(self.term.equal(other.term))
+
+
+# state whose expression and term were released, compared by value since
+# unpickled states are copies
+_RELEASED: Tuple[str | None, str] = (None, "")
+
+
+class DNKStates:
+    """Interning table of the DNK states reached during trace generation.
+
+    A state is a DNK expression together with the type of the transition that
+    led to it. Every distinct state is stored once and identified by an integer
+    id, so the generators can hash and compare ids instead of long expressions.
+
+    States can also be interned by their Maude term. The expression of such a
+    state is only printed when it is requested.
+
+    States that are no longer referenced can be released. Their ids are not
+    reused, and a released state interned again gets a new id."""
+
+    def __init__(self) -> None:
+        self._states: List[Tuple[str | None, str]] = []
+        self._released = 0
+        self._stateToId: dict[Tuple[str, str], int] = {}
+        self._terms: List[maude.Term | None] = []
+        self._termToId: dict[Tuple[_TermKey, str], int] = {}
+        # whether some states were interned by expression
+        self._hasExprStates = False
+
+    def intern(self, dnkExpr: str, transType: str) -> int:
+        """Returns the id of the given state, adding it if it is new"""
+        self._hasExprStates = True
+        state = (dnkExpr, transType)
+        stateId = self._stateToId.get(state)
+        if stateId is None:
+            stateId = len(self._states)
+            self._states.append(state)
+            self._terms.append(None)
+            self._stateToId[state] = stateId
+        return stateId
+
+    def internTerm(self, dnkTerm: maude.Term, transType: str) -> int:
+        """Returns the id of the state of the given term, adding it if it is new.
+        If states were interned by expression, the term is printed to find out
+        whether it matches one of them."""
+        key = (_TermKey(dnkTerm), transType)
+        stateId = self._termToId.get(key)
+        if stateId is not None:
+            return stateId
+        if self._hasExprStates:
+            stateId = self.intern(dnkTerm.prettyPrint(maude.PRINT_MIXFIX), transType)
+            if self._terms[stateId] is None:
+                self._terms[stateId] = dnkTerm
+        else:
+            stateId = len(self._states)
+            self._states.append((None, transType))
+            self._terms.append(dnkTerm)
+        self._termToId[key] = stateId
+        return stateId
+
+    def get(self, stateId: int) -> Tuple[str, str]:
+        """Returns the DNK expression and transition type of the given state"""
+        if self._states[stateId] == _RELEASED:
+            raise KeyError(f"DNK state {stateId} was released")
+        dnkExpr, transType = self._states[stateId]
+        if dnkExpr is None:
+            dnkExpr = cast(maude.Term, self._terms[stateId]).prettyPrint(
+                maude.PRINT_MIXFIX
+            )
+            self._states[stateId] = (dnkExpr, transType)
+            self._stateToId.setdefault((dnkExpr, transType), stateId)
+        return dnkExpr, transType
+
+    def getTerm(self, stateId: int) -> Tuple[maude.Term | None, str]:
+        """Returns the Maude term of the given state, if it is known, and its
+        transition type"""
+        return self._terms[stateId], self._states[stateId][1]
+
+    def setTerm(self, stateId: int, dnkTerm: maude.Term) -> None:
+        """Sets the Maude term of a state interned by expression"""
+        self._terms[stateId] = dnkTerm
+        self._termToId[(_TermKey(dnkTerm), self._states[stateId][1])] = stateId
+
+    def __len__(self) -> int:
+        """Returns the number of states interned so far, including the released
+        ones"""
+        return len(self._states)
+
+    def liveCount(self) -> int:
+        """Returns the number of states that were not released"""
+        return len(self._states) - self._released
+
+    def release(self, keep: Set[int]) -> int:
+        """Drops the expressions and terms of the states missing from the given
+        ids and returns the number of released states"""
+        released = 0
+        for stateId, state in enumerate(self._states):
+            if state == _RELEASED or stateId in keep:
+                continue
+            self._states[stateId] = _RELEASED
+            self._terms[stateId] = None
+            released += 1
+        if released > 0:
+            self._stateToId = {
+                s: stateId for s, stateId in self._stateToId.items() if stateId in keep
+            }
+            self._termToId = {
+                k: stateId for k, stateId in self._termToId.items() if stateId in keep
+            }
+            self._released += released
+        return released
+
+    def forgetTerms(self) -> None:
+        """Replaces the Maude terms of the states with their expressions, e.g.
+        before the Maude module of the terms is declared again"""
+        self.__printExprs()
+        self._terms = [None for _ in self._states]
+        self._termToId = {}
+        self._hasExprStates = True
+
+    def __getstate__(self) -> dict[str, object]:
+        # Maude terms cannot be pickled, so the states are kept as expressions
+        self.__printExprs()
+        return {
+            "_states": self._states,
+            "_released": self._released,
+            "_stateToId": self._stateToId,
+        }
+
+    def __setstate__(self, state: dict[str, object]) -> None:
+        self._released = 0
+        self.__dict__.update(state)
+        self._terms = [None for _ in self._states]
+        self._termToId = {}
+        self._hasExprStates = True
+
+    def __printExprs(self) -> None:
+        for stateId, state in enumerate(self._states):
+            if state != _RELEASED:
+                self.get(stateId)
@@ -0,0 +1,54 @@
+import pickle
+from dataclasses import dataclass, field
+from typing import List, Set, Tuple
+
+from src.generator.dnk_states import DNKStates
+from src.generator.neighbor_cache import NeighborCache
+from src.generator.partial_order_reduction import SleepSets
+from src.generator.trace_tree import TraceTree
+from src.trace.node import TraceNode
+
+# id of the DNK state of a trace leaf at the maximum depth, its node and its depth
+type FrontierItem = Tuple[int, TraceNode, int]
+
+
+class FrontierError(Exception):
+    pass
+
+
+@dataclass
+class Frontier:
+    """Trace tree of a finished trace generation together with its leaves at
+    the maximum depth, so that the generation can later be extended to a larger
+    depth by only expanding these leaves. The interned DNK states and the cached
+    neighbors are kept as well, so they are not computed again."""
+
+    modelHash: str
+    depth: int
+    traceTree: TraceTree
+    items: List[FrontierItem]
+    states: DNKStates
+    cache: NeighborCache
+    sleepSets: SleepSets | None
+    # id of the next trace node, so extended trees keep unique node ids
+    nextNodeId: int
+    # whether the traces of the tree were analyzed
+    analyzed: bool = False
+    # racing transitions of the harmful races found in the analyzed traces
+    reportedRaces: Set[Tuple[str, ...]] = field(default_factory=set)
+
+
+def saveFrontier(filePath: str, frontier: Frontier) -> None:
+    with open(filePath, "wb") as f:
+        pickle.dump(frontier, f, pickle.HIGHEST_PROTOCOL)
+
+
+def loadFrontier(filePath: str) -> Frontier:
+    """Loads a frontier saved by 'saveFrontier'. Node ids of the current process
+    are moved past the ones of the loaded trace tree."""
+    with open(filePath, "rb") as f:
+        frontier: object = pickle.load(f)
+    if not isinstance(frontier, Frontier):
+        raise FrontierError(f"File {filePath} does not contain a saved frontier")
+    TraceNode.reserveIds(frontier.nextNodeId)
+    return frontier
@@ -0,0 +1,95 @@
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+from collections.abc import Iterator
+from typing import List, Tuple, cast
+
+_DB_FILE_NAME = "hnf_cache.sqlite"
+# seconds to wait for other runs holding a lock on the database
+_DB_TIMEOUT = 30.0
+
+# transition type, transition label and DNK expression of each neighbor
+type StoredNeighbors = List[Tuple[str, str, str]]
+
+
+def modelHash(modelModule: str, maudeFilesDirPath: str) -> str:
+    """Returns a hash of the given DNK model Maude module and of the Maude files
+    computing the head normal form, so that stored neighbors are not shared
+    between different models or Maude semantics."""
+    h = hashlib.sha256(modelModule.encode("utf-8"))
+    for filePath in sorted(glob.glob(os.path.join(maudeFilesDirPath, "*.maude"))):
+        with open(filePath, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+class HNFStore:
+    """Head normal forms computed by Maude persisted in an SQLite database,
+    so they can be reused by later runs on the same model.
+
+    Neighbors are stored per DNK state and grouped by the hash of the model."""
+
+    def __init__(self, dirPath: str) -> None:
+        self.dbPath = os.path.join(dirPath, _DB_FILE_NAME)
+        os.makedirs(dirPath, exist_ok=True)
+        self._conn = sqlite3.connect(self.dbPath, timeout=_DB_TIMEOUT)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS neighbors ("
+            + "modelHash TEXT NOT NULL, stateKey TEXT NOT NULL, "
+            + "dnkExpr TEXT NOT NULL, transType TEXT NOT NULL, "
+            + "neighbors TEXT NOT NULL, PRIMARY KEY (modelHash, stateKey))"
+        )
+        self._conn.commit()
+
+    def load(self, modelHash: str) -> Iterator[Tuple[str, str, StoredNeighbors]]:
+        """Yields the DNK expression, previous transition type and neighbors
+        of every state stored for the given model."""
+        rows = cast(
+            Iterator[Tuple[str, str, str]],
+            self._conn.execute(
+                "SELECT dnkExpr, transType, neighbors FROM neighbors "
+                + "WHERE modelHash = ?",
+                (modelHash,),
+            ),
+        )
+        for dnkExpr, transType, neighbors in rows:
+            storedNeighbors: object = json.loads(neighbors)
+            yield (
+                dnkExpr,
+                transType,
+                [
+                    cast(Tuple[str, str, str], tuple(n))
+                    for n in cast(List[List[str]], storedNeighbors)
+                ],
+            )
+
+    def put(
+        self, modelHash: str, entries: List[Tuple[str, str, StoredNeighbors]]
+    ) -> None:
+        """Stores the neighbors of the given states of the model"""
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO neighbors "
+            + "(modelHash, stateKey, dnkExpr, transType, neighbors) "
+            + "VALUES (?, ?, ?, ?, ?)",
+            (
+                (
+                    modelHash,
+                    _stateKey(dnkExpr, transType),
+                    dnkExpr,
+                    transType,
+                    json.dumps(neighbors),
+                )
+                for dnkExpr, transType, neighbors in entries
+            ),
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def _stateKey(dnkExpr: str, transType: str) -> str:
+    return hashlib.sha256(f"{transType}\n{dnkExpr}".encode("utf-8")).hexdigest()
@@ -0,0 +1,178 @@
+# mypy: disable-error-code="import-untyped,no-any-unimported,misc"
+import multiprocessing
+import multiprocessing.pool
+from time import perf_counter
+from typing import List, Tuple
+
+import maude
+from src.errors import MaudeError
+from src.generator.neighbor_cache import Neighbors
+from src.generator.sequential_trace_generator import (SequentialTraceGenerator,
+                                                      WorkListItem,
+                                                      newBFSQueue)
+from src.generator.trace_generator import _MAUDE_EXEC_TIME_KEY, initMaude
+from src.generator.trace_tree import TraceTree, newTraceTree
+from src.generator.util import computeNeighbors, getSort, getTransDataSorts
+from src.generator.worklist import Stack
+from src.maude_encoder import MaudeEncoder
+from src.maude_encoder import MaudeModules as mm
+from src.maude_encoder import MaudeOps as mo
+from src.maude_encoder import MaudeSorts as ms
+from src.model.dnk_maude_model import DNKMaudeModel
+from src.trace.node import TraceNode
+from src.trace.vector_clocks import newVectorClocks
+from src.tracer_config import TracerConfig
+
+# number of work list items popped at once for every worker process
+_BATCH_ITEMS_PER_WORKER = 16
+
+# entry Maude module of the worker process
+_workerMod: maude.Module | None = None
+# sorts of the transition data terms, looked up once per worker
+_workerTDataSort: maude.Sort | None = None
+_workerExpSorts: List[maude.Sort] | None = None
+
+
+def _initWorker(
+    maudeFilesDirPath: str, verbose: bool, modelModule: str, entryModule: str
+) -> None:
+    global _workerMod, _workerTDataSort, _workerExpSorts
+    initMaude(maudeFilesDirPath, verbose)
+    maude.input(modelModule)
+    if maude.getModule(mm.DNK_MODEL) is None:
+        raise MaudeError("Failed to declare module for given DyNetKAT model!")
+    maude.input(entryModule)
+    _workerMod = maude.getModule(mm.ENTRY)
+    if _workerMod is None:
+        raise MaudeError("Failed to declare entry module!")
+    _workerTDataSort = getSort(_workerMod, ms.TDATA)
+    _workerExpSorts = getTransDataSorts(_workerMod)
+
+
+def _workerComputeNeighbors(key: Tuple[str, str]) -> List[Tuple[str, str, str]]:
+    if _workerMod is None:
+        raise MaudeError("Maude worker process was not initialized!")
+    return computeNeighbors(
+        _workerMod, key[0], key[1], _workerTDataSort, _workerExpSorts
+    )
+
+
+class MultiProcessTraceGenerator(SequentialTraceGenerator):
+    """Sequential trace generator computing the neighbors of the work list
+    items in a pool of worker processes, each running its own Maude instance.
+
+    Batches of items are popped from the work list and the neighbors of their
+    (uncached) DNK expressions are sharded across the workers. The results are
+    merged into a single trace tree by the main process, in the order the items
+    were popped.
+
+    Depth-first generators pop one item per worker and merge them in reverse
+    order, so the first popped item is expanded next, as close to the order of
+    the sequential generator as batching allows."""
+
+    # whether the work list is a stack explored depth-first
+    _depthFirst: bool = False
+
+    def _generateTraces(
+        self, model: DNKMaudeModel, mod: maude.Module, depth: int
+    ) -> TraceTree:
+        startDnkExpr = MaudeEncoder.parallelSeq(model.getElementTerms())
+        startVC = newVectorClocks(len(model.getElementTerms()))
+        startNode = TraceNode.fromTuple(("", startVC))
+        traceTree = newTraceTree(model, self.config.stateGraph, self._onTrace)
+        traceTree.addNode(startNode)
+
+        self._resetWorkList(traceTree)
+        startState = self.states.intern(startDnkExpr, mo.TRANS_TYPE_NONE)
+        self._pushItem((startState, startNode, 0))
+        self._expandWorkList(traceTree, model, mod, depth)
+        return traceTree
+
+    def _expandWorkList(
+        self, traceTree: TraceTree, model: DNKMaudeModel, mod: maude.Module, depth: int
+    ) -> None:
+        workers = self.config.threads
+        ctx = multiprocessing.get_context("spawn")
+        initArgs = (
+            self.config.maudeFilesDirPath,
+            self.config.verbose,
+            model.toMaudeModule(),
+            self._getEntryMaudeModule(mm.ENTRY),
+        )
+        with ctx.Pool(workers, _initWorker, initArgs) as pool:
+            while not self.workList.isEmpty() and not self._shouldStop():
+                batchSize = workers
+                if not self._depthFirst:
+                    batchSize *= _BATCH_ITEMS_PER_WORKER
+                batch = self.__popBatch(batchSize)
+                batchNeighbors = self.__computeBatchNeighbors(pool, batch)
+                if self._depthFirst:
+                    # the children of the first popped item end on top of the stack
+                    batch.reverse()
+
+                for item in batch:
+                    parentNode = self._addPendingNode(traceTree, item)
+                    if parentNode is None:
+                        continue
+                    (stateId, _, d) = item
+                    neighbors = batchNeighbors[stateId]
+                    self._addNeighbors(traceTree, parentNode, neighbors, d, depth)
+                    self.levels.addExpanded(d)
+                self._checkpointIfDue(traceTree, self.workList)
+                self._checkBudget(traceTree)
+                self._releaseUnusedStates(self._pendingStates.keys)
+        self._finishExpansion(traceTree)
+
+    def __popBatch(self, size: int) -> List[WorkListItem]:
+        batch: List[WorkListItem] = []
+        while len(batch) < size and not self.workList.isEmpty():
+            batch.append(self._popItem())
+        return batch
+
+    def __computeBatchNeighbors(
+        self,
+        pool: multiprocessing.pool.Pool,
+        batch: List[WorkListItem],
+    ) -> dict[int, Neighbors]:
+        """Returns the neighbors of the batch items. The ones missing from the
+        cache are computed in the worker processes and stored in the cache."""
+        batchNeighbors: dict[int, Neighbors] = {}
+        stateIds: List[int] = []
+        seen: set[int] = set()
+        for stateId, _, _ in batch:
+            if stateId in seen:
+                self.cacheStats.hits += 1
+                continue
+            seen.add(stateId)
+            if stateId in self.cache:
+                self.cacheStats.hits += 1
+                batchNeighbors[stateId] = self.cache[stateId]
+                continue
+            self.cacheStats.misses += 1
+            stateIds.append(stateId)
+        if not stateIds:
+            return batchNeighbors
+
+        startTime = perf_counter()
+        states = [self.states.get(stateId) for stateId in stateIds]
+        chunkSize = max(1, len(states) // (self.config.threads * 4))
+        results = pool.map(_workerComputeNeighbors, states, chunkSize)
+        endTime = perf_counter()
+        self.addExecTime(_MAUDE_EXEC_TIME_KEY, endTime - startTime)
+        for stateId, result in zip(stateIds, results):
+            neighbors = self._internNeighbors(result)
+            self.cache[stateId] = neighbors
+            batchNeighbors[stateId] = neighbors
+        return batchNeighbors
+
+
+class MultiProcessDFSTraceGenerator(MultiProcessTraceGenerator):
+    _depthFirst = True
+
+    def __init__(self, config: TracerConfig) -> None:
+        super().__init__(config, Stack[WorkListItem]())
+
+
+class MultiProcessBFSTraceGenerator(MultiProcessTraceGenerator):
+    def __init__(self, config: TracerConfig) -> None:
+        super().__init__(config, newBFSQueue(config))
@@ -0,0 +1,135 @@
+import sys
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from typing import List, Tuple
+
+# id of the DNK state whose neighbors are cached
+type CacheKey = int
+# transition label and id of the DNK state reached by each transition
+type Neighbors = List[Tuple[str, int]]
+type CacheEntries = List[Tuple[CacheKey, Neighbors]]
+# budget, size, evictions, entries, logging flag and log of a pickled cache
+type _CacheState = Tuple[
+    int, int, int, OrderedDict[CacheKey, Tuple[Neighbors, int]], bool, CacheEntries
+]
+
+# number of new entries logged before they are handed to storeNewEntries
+NEW_ENTRIES_BATCH_SIZE = 1024
+
+
+def _entrySize(key: CacheKey, neighbors: Neighbors) -> int:
+    """Approximate number of bytes held by a cache entry"""
+    size = sys.getsizeof(key) + sys.getsizeof(neighbors)
+    for neighbor in neighbors:
+        size += sys.getsizeof(neighbor) + sum(sys.getsizeof(s) for s in neighbor)
+    return size
+
+
+class NeighborCache:
+    """Neighbors of the DNK states computed during trace generation.
+
+    When a memory budget is given, the least recently used entries are evicted
+    once the approximate size of the cached entries exceeds it. Entries larger
+    than the whole budget are not cached."""
+
+    def __init__(self, maxSizeBytes: int = 0, logNewEntries: bool = False) -> None:
+        # 0 means that the cache is unbounded
+        self.maxSizeBytes = maxSizeBytes
+        self.sizeBytes = 0
+        self.evictions = 0
+        self._entries: OrderedDict[CacheKey, Tuple[Neighbors, int]] = OrderedDict()
+        # entries added since they were last stored, except for the loaded ones
+        self._logNewEntries = logNewEntries
+        self.newEntries: CacheEntries = []
+        # stores each batch of new entries, so the log does not keep them alive
+        self.storeNewEntries: Callable[[CacheEntries], None] | None = None
+
+    def __contains__(self, key: CacheKey) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getitem__(self, key: CacheKey) -> Neighbors:
+        neighbors, _ = self._entries[key]
+        self._entries.move_to_end(key)
+        return neighbors
+
+    def __setitem__(self, key: CacheKey, neighbors: Neighbors) -> None:
+        if self._logNewEntries:
+            self.newEntries.append((key, neighbors))
+            if len(self.newEntries) >= NEW_ENTRIES_BATCH_SIZE:
+                self.flushNewEntries()
+        self.load(key, neighbors)
+
+    def flushNewEntries(self) -> None:
+        """Hands the logged new entries to storeNewEntries and clears the log"""
+        if self.storeNewEntries is None or not self.newEntries:
+            return
+        self.storeNewEntries(self.newEntries)
+        self.newEntries = []
+
+    def load(self, key: CacheKey, neighbors: Neighbors) -> None:
+        """Adds the given entry without logging it as a new entry"""
+        size = 0
+        if self.maxSizeBytes > 0:
+            size = _entrySize(key, neighbors)
+            if size > self.maxSizeBytes:
+                return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.sizeBytes -= old[1]
+        self._entries[key] = (neighbors, size)
+        self.sizeBytes += size
+        self.__evictIfTooLarge()
+
+    def stateIds(self) -> Iterator[int]:
+        """Yields the ids of the states referenced by the cached and the logged
+        entries, keys and neighbors alike"""
+        for key, (neighbors, _) in self._entries.items():
+            yield key
+            yield from (stateId for _, stateId in neighbors)
+        for key, neighbors in self.newEntries:
+            yield key
+            yield from (stateId for _, stateId in neighbors)
+
+    def get(self, key: CacheKey, default: Neighbors) -> Neighbors:
+        if key not in self._entries:
+            return default
+        return self[key]
+
+    def setdefault(self, key: CacheKey, default: Neighbors) -> Neighbors:
+        if key in self._entries:
+            return self[key]
+        self[key] = default
+        return default
+
+    def __getstate__(self) -> _CacheState:
+        # the store callback belongs to the generation run using the cache
+        return (
+            self.maxSizeBytes,
+            self.sizeBytes,
+            self.evictions,
+            self._entries,
+            self._logNewEntries,
+            self.newEntries,
+        )
+
+    def __setstate__(self, state: _CacheState) -> None:
+        (
+            self.maxSizeBytes,
+            self.sizeBytes,
+            self.evictions,
+            self._entries,
+            self._logNewEntries,
+            self.newEntries,
+        ) = state
+        self.storeNewEntries = None
+
+    def __evictIfTooLarge(self) -> None:
+        if self.maxSizeBytes <= 0:
+            return
+        while self.sizeBytes > self.maxSizeBytes:
+            _, (_, size) = self._entries.popitem(last=False)
+            self.sizeBytes -= size
+            self.evictions += 1
@@ -1,82 +1,147 @@
 # mypy: disable-error-code="import-untyped,no-any-unimported,misc"
 import logging
+from collections.abc import Callable, Iterable, Iterator
 from dataclasses import dataclass, field
 from time import perf_counter
-from typing import Hashable, List, Tuple
+from typing import List, Tuple, cast
 
 import maude
 from src.decorators.cache_stats import CacheStats
 from src.errors import MaudeError
-from src.generator.trace_generator import _MAUDE_EXEC_TIME_KEY, TraceGenerator
-from src.generator.trace_tree import TraceTree
-from src.generator.util import extractListTerms, extractTransData, getSort
+from src.generator.budget import LevelProgress
+from src.generator.dnk_states import DNKStates
+from src.generator.neighbor_cache import NeighborCache, Neighbors
+from src.generator.partial_order_reduction import SleepSets
+from src.generator.trace_generator import (_MAUDE_EXEC_TIME_KEY,
+                                           TraceGenerator, workerStatsEntries)
+from src.generator.trace_tree import PendingNode, TraceTree, newTraceTree
+from src.generator.util import (extractListTerms, extractTransData, getSort,
+                                getTransDataSorts)
+from src.generator.worklist import SpillingQueue
 from src.maude_encoder import MaudeBuilder, MaudeEncoder, MaudeModules
 from src.maude_encoder import MaudeOps as mo
 from src.maude_encoder import MaudeSorts as ms
 from src.model.dnk_maude_model import DNKMaudeModel
+from src.stats import StatsEntry
 from src.trace.node import TraceNode
-from src.trace.transition import newTraceTransition
 from src.trace.vector_clocks import newVectorClocks
 from src.tracer_config import TracerConfig
-from src.util import uniformSplit
+from src.util import chunkSplit, uniformSplit
 
 logger = logging.getLogger("Generator")
 
 _HOOK_MAUDE_NAME = "storeOutputGetNextInput"
+_BACKGROUND_HOOK_MAUDE_NAME = "runBackgroundWork"
+_WORKER_STARTED_MAUDE_NAME = "workerStarted"
+_WORKER_FINISHED_MAUDE_NAME = "workerFinished"
 _ENTRY_MAUDE_EQUATION = "entry"
 
 
+# trace node of a layer, or its pending node if it was not added to the trace
+# tree yet, and the id of its DNK state
+type LayerItem = Tuple[TraceNode | PendingNode, int]
+
+
 @dataclass
 class GeneratorState:
+    currLayer: SpillingQueue[LayerItem]
     depth: int = 0
-    currLayer: dict[TraceNode, Tuple[str, str]] = field(default_factory=dict)
-    results: List[Tuple[List[Tuple[str, str, str]], bool]] = field(default_factory=list)
-    nodeToIndex: dict[TraceNode, int] = field(default_factory=dict)
-    uniqueDNKData: List[Tuple[str, str]] = field(default_factory=list)
-
+    # neighbors of the distinct DNK states of the current layer
+    layerNeighbors: dict[int, Neighbors] = field(default_factory=dict)
+    # neighbors used to add the children of the current layer, while the
+    # addition is pending
+    pendingNeighbors: dict[int, Neighbors] | None = None
+    # ids of the distinct DNK states passed to Maude, indexed by the parent id
+    # of the Maude results
+    uniqueDNKData: List[int] = field(default_factory=list)
+
+
+class ProcessHook(maude.Hook):
+    """Hook called by Maude with the head normal forms of the last input, which
+    returns the next input.
+
+    The layers are pipelined: the DNK states of the next layer are found from
+    the neighbors of the states of the current layer and passed to Maude right
+    away. The nodes of the next layer are only added to the trace tree once the
+    input was sent to the workers, by the background hook. With a memory budget
+    for the layers, the nodes to expand are kept as pending nodes instead, and
+    only added to the trace tree once they are expanded."""
 
-class ProcessHook(maude.Hook):  # type: ignore
     def __init__(
         self,
-        cache: dict[Tuple[Hashable, ...], List[Tuple[str, str, str]]],
+        cache: NeighborCache,
         cacheStats: CacheStats,
+        states: DNKStates,
         threads: int,
+        stateGraph: bool = False,
+        sleepSets: SleepSets | None = None,
+        chunkSize: int = 0,
+        layerMaxSizeBytes: int = 0,
+        layerDirPath: str = "",
     ) -> None:
         super().__init__()
         self.__threads = threads
+        self.__chunkSize = chunkSize
+        self.layerMaxSizeBytes = layerMaxSizeBytes
+        self.layerDirPath = layerDirPath
+        self.__stateGraph = stateGraph
+        self.__sleepSets = sleepSets
         self.cache = cache
         self.cacheStats = cacheStats
+        self.states = states
         self.__isInit = False
         self.__model = DNKMaudeModel()
-        self.traceTree = TraceTree(self.__model)
-        self.__state = GeneratorState()
+        self.traceTree = newTraceTree(self.__model, stateGraph)
+        self.__state = GeneratorState(self.__newLayer())
         self.pythonExecTime: float = 0.0
+        # layer items written to disk
+        self.spilledItems = 0
+        # time spent by Python while the workers had no input, per layer
+        self.workerIdleTimes: List[float] = []
+        # time spent by Python while the workers processed an input
+        self.overlappedTime: float = 0.0
+        self.maxDepth = 0
+        self.levels = LevelProgress()
+        # called before expanding a node, returns whether the generation stops
+        self.shouldStop: Callable[[], bool] = lambda: False
+        # called between layers with the states still referenced by the layers
+        self.releaseUnusedStates: Callable[[Callable[[], Iterable[int]]], None] = (
+            lambda pendingStates: None
+        )
 
-    def __initGen(self) -> None:
+    def __initGen(self) -> int:
         startDnkExpr = MaudeEncoder.parallelSeq(self.__model.getElementTerms())
         startVC = newVectorClocks(len(self.__model.getElementTerms()))
         startNode = TraceNode.fromTuple(("", startVC))
         self.traceTree.addNode(startNode)
 
-        # currNode to (dnkExpr, previous transition type)
-        self.__state.currLayer = {startNode: (startDnkExpr, mo.TRANS_TYPE_NONE)}
+        startState = self.states.intern(startDnkExpr, mo.TRANS_TYPE_NONE)
+        self.__state.currLayer.append((startNode, startState))
         self.__isInit = True
+        return self.__setNextStates([startState])
 
     def reset(
         self,
         newModel: DNKMaudeModel,
         newDepth: int,
-        cache: dict[Tuple[Hashable, ...], List[Tuple[str, str, str]]],
+        cache: NeighborCache,
         cacheStats: CacheStats,
+        states: DNKStates,
     ) -> None:
         self.__isInit = False
         self.__model = newModel
-        self.traceTree = TraceTree(self.__model)
-        self.__state = GeneratorState()
+        self.traceTree = newTraceTree(self.__model, self.__stateGraph)
+        self.__state = GeneratorState(self.__newLayer())
         self.__state.depth = newDepth
+        self.maxDepth = newDepth
+        self.levels = LevelProgress()
         self.cache = cache
         self.cacheStats = cacheStats
+        self.states = states
         self.pythonExecTime = 0.0
+        self.spilledItems = 0
+        self.workerIdleTimes = []
+        self.overlappedTime = 0.0
 
     def run(self, term: maude.Term, data: maude.HookData) -> maude.Term:
         s = self.__state
@@ -89,44 +154,41 @@ class ProcessHook(maude.Hook):  # type: ignore
         # result list calculated by Maude
         resultListTerm = term.arguments().argument()
 
+        remInputs = 0
         if not self.__isInit:
-            self.__initGen()
+            remInputs = self.__initGen()
         else:
             logger.info("Processing Maude result...")
             self.__processMaudeResult(module, resultListTerm)
 
-        remInputs = 0
         while remInputs == 0:
-            if s.results:
-                s.currLayer = self.__addNewNodes()
-                s.depth -= 1
-                logger.info("---------- Done ----------")
-                if s.depth <= 0:
-                    endTime = perf_counter()
-                    self.pythonExecTime += endTime - startTime
-                    return module.parseTerm(MaudeEncoder.emptyTermList())
+            self.__addPendingNodes()
+            self.releaseUnusedStates(self.__layerStates)
+            if s.depth <= 0 or s.currLayer.isEmpty() or self.shouldStop():
+                if s.depth > 0:
+                    logger.info("Stopping...")
+                    self.__dropCurrentLayer()
+                self.__addWorkerIdleTime(startTime)
+                return module.parseTerm(MaudeEncoder.emptyTermList())
 
             logger.info("---------- Calculating depth %d ----------", s.depth)
             logger.info("Current layer contains: %d nodes", len(s.currLayer))
-            self.__setUniqueDNKData()
-            logger.info("Total unique DNK data entries: %d", len(s.uniqueDNKData))
-            if not s.uniqueDNKData:
-                logger.info("Stopping...")
-                logger.info("---------- Done ----------")
-                return module.parseTerm(MaudeEncoder.emptyTermList())
-
-            # list of (results, is computed)
-            s.results = [([], False) for _ in range(len(s.uniqueDNKData))]
-            self.__addCachedResults()
-
-            cachedEntries = sum([1 if computed else 0 for _li, computed in s.results])
-            remInputs = len(s.uniqueDNKData) - cachedEntries
-            logger.info("Cached entries: %d", cachedEntries)
-            logger.info("Remaining inputs for Maude: %d", remInputs)
+            s.pendingNeighbors = s.layerNeighbors
+            s.layerNeighbors = {}
+            if s.depth > 1:
+                # the states of the next layer are expanded as well
+                remInputs = self.__setNextStates(
+                    list(
+                        dict.fromkeys(
+                            stateId
+                            for neighbors in s.pendingNeighbors.values()
+                            for _, stateId in neighbors
+                        )
+                    )
+                )
 
         termList = MaudeEncoder.toTermList(self.__makeMaudeInput())
-        endTime = perf_counter()
-        self.pythonExecTime += endTime - startTime
+        self.__addWorkerIdleTime(startTime)
 
         inputTerm = module.parseTerm(termList)
         if inputTerm is None:
@@ -134,99 +196,275 @@ class ProcessHook(maude.Hook):  # type: ignore
         logger.info("Passing input to Maude...")
         return inputTerm
 
-    def __addNewNodes(self) -> dict[TraceNode, Tuple[str, str]]:
-        nextLayer: dict[TraceNode, Tuple[str, str]] = {}
-        for parentNode, index in self.__state.nodeToIndex.items():
-            res = self.__state.results[index][0]
-            for prevTransType, transLabel, dnkExpr in res:
-                node = self.__addNewNode(transLabel, parentNode)
-                nextLayer[node] = (dnkExpr, prevTransType)
-        return nextLayer
-
-    def __addNewNode(self, transLabel: str, parentNode: TraceNode) -> TraceNode:
-        trans = newTraceTransition(transLabel)
-        vc = trans.updateVC(parentNode.vectorClocks)
-        node = TraceNode(trans, vc)
-        self.traceTree.addNode(node, parentNode.id)
-        return node
-
-    def __addCachedResults(self) -> None:
-        for i, entry in enumerate(self.__state.uniqueDNKData):
-            cachedNeighbors = self.cache.get(entry, [])
-            if not cachedNeighbors:
-                self.cacheStats.misses += 1
+    def runBackgroundWork(self) -> None:
+        """Adds the pending nodes to the trace tree, while the workers compute
+        the head normal forms of the next layer"""
+        startTime = perf_counter()
+        self.__addPendingNodes()
+        execTime = perf_counter() - startTime
+        self.pythonExecTime += execTime
+        self.overlappedTime += execTime
+
+    def __addWorkerIdleTime(self, startTime: float) -> None:
+        execTime = perf_counter() - startTime
+        self.pythonExecTime += execTime
+        self.workerIdleTimes.append(execTime)
+        logger.info("Workers idle for: %.3fs", execTime)
+
+    def __addPendingNodes(self) -> None:
+        s = self.__state
+        if s.pendingNeighbors is None:
+            return
+        nextLayer = self.__newLayer()
+        level = self.maxDepth - s.depth
+        # the nodes of the last layer are not expanded, so they are added at once
+        defersNodes = self.layerMaxSizeBytes > 0 and s.depth > 1
+        while not s.currLayer.isEmpty():
+            if self.shouldStop():
+                self.__dropCurrentLayer()
+                break
+            item = s.currLayer.pop()
+            parentNode = self.__addLayerNode(item)
+            if parentNode is None:
                 continue
-            self.cacheStats.hits += 1
-            self.__state.results[i] = (cachedNeighbors, True)
-
-    def __setUniqueDNKData(self) -> None:
+            parentStateId = item[1]
+            self.levels.addExpanded(level)
+            res = s.pendingNeighbors[parentStateId]
+            expanded = [(n, frozenset[str]()) for n in res]
+            if self.__sleepSets is not None:
+                expanded = self.__sleepSets.expand(parentNode.id, res)
+            for (transLabel, stateId), sleepSet in expanded:
+                if defersNodes:
+                    pending = self.traceTree.addPendingTransition(
+                        parentNode, transLabel, stateId, s.depth
+                    )
+                    if pending is None:
+                        continue
+                    nextLayer.append((pending, stateId))
+                    nodeId = pending.nodeId
+                else:
+                    node = self.traceTree.addTransition(
+                        parentNode, transLabel, stateId, s.depth
+                    )
+                    if node is None or s.depth <= 1:
+                        continue
+                    nextLayer.append((node, stateId))
+                    nodeId = node.id
+                if self.__sleepSets is not None:
+                    self.__sleepSets.setSleepSet(nodeId, sleepSet)
+        self.spilledItems += s.currLayer.spilledItems
+        s.currLayer = nextLayer
+        s.pendingNeighbors = None
+        s.depth -= 1
+        logger.info("---------- Done ----------")
+
+    def __layerStates(self) -> Iterator[int]:
+        """Yields the states still referenced once the pending nodes were added.
+        The states of the current layer are the ones whose neighbors were looked
+        up, so the layer itself is not walked."""
+        for stateId, neighbors in self.__state.layerNeighbors.items():
+            yield stateId
+            yield from (nextStateId for _, nextStateId in neighbors)
+
+    def __dropCurrentLayer(self) -> None:
+        """Leaves the remaining nodes of the current layer unexpanded, once the
+        generation stops before the maximum depth. Pending nodes are added to the
+        trace tree as leaves."""
         s = self.__state
-        s.nodeToIndex = {}
-        s.uniqueDNKData = []
-        if not s.currLayer:
+        if s.currLayer.isEmpty():
             return
-
-        dnkDataToIndex: dict[Tuple[str, str], int] = {}
-        nextIndex = 0
-        for node, dnkTup in s.currLayer.items():
-            i = dnkDataToIndex.get(dnkTup, -1)
-            if i == -1:
-                dnkDataToIndex[dnkTup] = nextIndex
-                s.nodeToIndex[node] = nextIndex
-                nextIndex += 1
+        self.levels.addRemaining(self.maxDepth - s.depth, len(s.currLayer))
+        for item in s.currLayer.items():
+            self.__addLayerNode(item)
+        self.spilledItems += s.currLayer.spilledItems
+        s.currLayer.reset()
+
+    def __addLayerNode(self, item: LayerItem) -> TraceNode | None:
+        """Returns the trace node of the given layer item, adding it to the trace
+        tree if it is pending. Returns None if an existing node was reused, so
+        the item must not be expanded."""
+        (node, stateId) = item
+        if not isinstance(node, PendingNode):
+            return node
+        # the pending nodes of a layer are one level below the current depth
+        treeNode = self.traceTree.addPendingNode(node, stateId, self.__state.depth + 1)
+        if treeNode is None and self.__sleepSets is not None:
+            self.__sleepSets.discard(node.nodeId)
+        return treeNode
+
+    def __newLayer(self) -> SpillingQueue[LayerItem]:
+        """Returns an empty layer. Spilled items refer to the nodes of the trace
+        tree by id, since the tree keeps them anyway, while pending nodes are
+        written as they are."""
+        layer = SpillingQueue[LayerItem](self.layerMaxSizeBytes, self.layerDirPath)
+        layer.toDisk = self.__layerItemToDisk
+        layer.fromDisk = self.__layerItemFromDisk
+        return layer
+
+    def __layerItemToDisk(self, item: LayerItem) -> object:
+        (node, stateId) = item
+        if isinstance(node, PendingNode):
+            return item
+        return (node.id, stateId)
+
+    def __layerItemFromDisk(self, item: object) -> LayerItem:
+        (node, stateId) = cast(Tuple[int | PendingNode, int], item)
+        if isinstance(node, PendingNode):
+            return (node, stateId)
+        return (self.traceTree.getNode(node), stateId)
+
+    def __setNextStates(self, nextStates: List[int]) -> int:
+        """Looks up the neighbors of the given distinct DNK states in the cache.
+        Returns the number of states whose neighbors must be computed by Maude."""
+        s = self.__state
+        s.uniqueDNKData = []
+        for stateId in nextStates:
+            cachedNeighbors = self.cache.get(stateId, [])
+            if not cachedNeighbors:
+                self.cacheStats.misses += 1
+                s.uniqueDNKData.append(stateId)
+                s.layerNeighbors[stateId] = []
                 continue
-            s.nodeToIndex[node] = i
-        s.uniqueDNKData = list(dnkDataToIndex.keys())
+            self.cacheStats.hits += 1
+            s.layerNeighbors[stateId] = cachedNeighbors
+        logger.info("Total unique DNK data entries: %d", len(nextStates))
+        logger.info("Cached entries: %d", len(nextStates) - len(s.uniqueDNKData))
+        logger.info("Remaining inputs for Maude: %d", len(s.uniqueDNKData))
+        return len(s.uniqueDNKData)
 
     def __processMaudeResult(
         self,
         mod: maude.Module,
         result: maude.Term,
     ) -> None:
+        s = self.__state
         neighbors = extractListTerms(result, getSort(mod, ms.TDATA))
+        expSorts = getTransDataSorts(mod)
         for n in neighbors:
-            (index, transType, transLabel, dnkExpr) = extractTransData(n, mod)
-            self.__state.results[index][0].append((transType, transLabel, dnkExpr))
-        for i, entry in enumerate(self.__state.uniqueDNKData):
-            self.cache.setdefault(entry, self.__state.results[i][0])
-            self.__state.results[i] = (self.__state.results[i][0], True)
+            index, transType, transLabel, dnkExpr = extractTransData(n, mod, expSorts)
+            stateId = self.states.intern(dnkExpr, transType)
+            s.layerNeighbors[s.uniqueDNKData[index]].append((transLabel, stateId))
+        for entry in s.uniqueDNKData:
+            self.cache.setdefault(entry, s.layerNeighbors[entry])
 
     def __makeMaudeInput(self) -> List[str]:
-        if not self.__state.uniqueDNKData:
-            return []
         inputs: List[str] = []
-        for i, t in enumerate(self.__state.uniqueDNKData):
-            if self.__state.results[i][1]:
-                continue
-            inputs.append(MaudeEncoder.hnfInput(i, t[1], t[0]))
-        splitInputs = uniformSplit(inputs, self.__threads)
+        for i, stateId in enumerate(self.__state.uniqueDNKData):
+            dnkExpr, prevTransType = self.states.get(stateId)
+            inputs.append(MaudeEncoder.hnfInput(i, prevTransType, dnkExpr))
+        if self.__chunkSize > 0:
+            # the workers take the next chunk once they are done with their last one
+            splitInputs = chunkSplit(inputs, self.__chunkSize)
+        else:
+            splitInputs = uniformSplit(inputs, self.__threads)
         return [MaudeEncoder.parallelHnfWorkerInputTerm(li) for li in splitInputs]
 
 
+class BackgroundHook(maude.Hook):
+    """Hook called by Maude once an input was sent to the workers"""
+
+    def __init__(self, processHook: ProcessHook) -> None:
+        super().__init__()
+        self.__processHook = processHook
+
+    def run(self, term: maude.Term, data: maude.HookData) -> maude.Term:
+        self.__processHook.runBackgroundWork()
+        return term.symbol().getModule().parseTerm("(none).Configuration")
+
+
+class WorkerStatsHook(maude.Hook):
+    """Hook called by Maude when a worker receives an input and when it returns
+    its result, measuring how long each worker is busy"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.reset()
+
+    def reset(self) -> None:
+        # worker to the time at which it received its current input
+        self.__startTimes: dict[str, float] = {}
+        self.busyTimes: dict[str, float] = {}
+        self.chunks: dict[str, int] = {}
+
+    def run(self, term: maude.Term, data: maude.HookData) -> maude.Term:
+        now = perf_counter()
+        worker = str(next(iter(term.arguments())))
+        if str(term.symbol()) == _WORKER_STARTED_MAUDE_NAME:
+            self.__startTimes[worker] = now
+        else:
+            startTime = self.__startTimes.pop(worker, now)
+            self.busyTimes[worker] = self.busyTimes.get(worker, 0.0) + now - startTime
+            self.chunks[worker] = self.chunks.get(worker, 0) + 1
+        return term.symbol().getModule().parseTerm("(none).Configuration")
+
+
 class ParallelBFSTraceGenerator(TraceGenerator):
     def __init__(self, config: TracerConfig) -> None:
         super().__init__(config)
-        self.maudeHook = ProcessHook(self.cache, self.cacheStats, self.config.threads)
+        # time the Maude workers waited for Python, per layer of the trace tree
+        self.workerIdleTimes: List[float] = []
+        # time spent by Python while the Maude workers were busy
+        self.overlappedPythonTime = 0.0
+        # time each Maude worker spent on its inputs and number of inputs it took
+        self.workerBusyTimes: List[float] = []
+        self.workerChunks: List[int] = []
+        self.maudeHook = ProcessHook(
+            self.cache,
+            self.cacheStats,
+            self.states,
+            self.config.threads,
+            self.config.stateGraph,
+            self.sleepSets,
+            self.config.pbfsChunkSize,
+            self.config.frontierMemoryMB * 1024 * 1024,
+            self.config.outputDirPath,
+        )
+        self.maudeHook.shouldStop = lambda: self._checkBudget(self.maudeHook.traceTree)
+        self.maudeHook.releaseUnusedStates = self._releaseUnusedStates
+        self.backgroundHook = BackgroundHook(self.maudeHook)
+        self.workerStatsHook = WorkerStatsHook()
         maude.connectEqHook(_HOOK_MAUDE_NAME, self.maudeHook)
+        maude.connectEqHook(_BACKGROUND_HOOK_MAUDE_NAME, self.backgroundHook)
+        maude.connectEqHook(_WORKER_STARTED_MAUDE_NAME, self.workerStatsHook)
+        maude.connectEqHook(_WORKER_FINISHED_MAUDE_NAME, self.workerStatsHook)
 
     def reset(self) -> None:
         super().reset()
+        self.workerIdleTimes = []
+        self.overlappedPythonTime = 0.0
+        self.workerBusyTimes = []
+        self.workerChunks = []
 
     def _generateTraces(
         self, model: DNKMaudeModel, mod: maude.Module, depth: int
     ) -> TraceTree:
-        self.maudeHook.reset(model, depth, self.cache, self.cacheStats)
+        self.maudeHook.reset(model, depth, self.cache, self.cacheStats, self.states)
+        self.workerStatsHook.reset()
 
         startTime = perf_counter()
 
         term = mod.parseTerm(_ENTRY_MAUDE_EQUATION)
-        (res, _) = term.erewrite()
+        res, _ = term.erewrite()
 
         endTime = perf_counter()
         maudeExecTime = endTime - startTime - self.maudeHook.pythonExecTime
         self.addExecTime(_MAUDE_EXEC_TIME_KEY, maudeExecTime)
+        self.workerIdleTimes = self.maudeHook.workerIdleTimes
+        self.overlappedPythonTime = self.maudeHook.overlappedTime
+        self.spilledFrontierItems = self.maudeHook.spilledItems
+        self.workerBusyTimes = list(self.workerStatsHook.busyTimes.values())
+        self.workerChunks = list(self.workerStatsHook.chunks.values())
+        self.levels = self.maudeHook.levels
         return self.maudeHook.traceTree
 
+    def _getWorkerStats(self) -> List[StatsEntry]:
+        return workerStatsEntries(
+            self.workerIdleTimes,
+            self.overlappedPythonTime,
+            self.workerBusyTimes,
+            self.workerChunks,
+        )
+
     def _getEntryMaudeModule(self, name: str) -> str:
         me = MaudeBuilder()
         me.addProtImport(MaudeModules.DNK_MODEL)
@@ -0,0 +1,76 @@
+from typing import FrozenSet, List, Tuple
+
+from src.trace.transition import ITransition, RcfgTrans, newTraceTransition
+
+# neighbor of a DNK state: (transition label, id of the reached DNK state)
+type Neighbor = Tuple[str, int]
+
+
+def areIndependent(t1: ITransition, t2: ITransition) -> bool:
+    """Whether executing the given transitions in any order leads to the same
+    state. Only reconfigurations between disjoint elements are independent.
+    Packet processing transitions depend on every other transition, since the
+    head normal form does not take them right after another packet processing
+    transition, so the previous transition type is part of the state."""
+    if not isinstance(t1, RcfgTrans) or not isinstance(t2, RcfgTrans):
+        return False
+    return t1.getElements().isdisjoint(t2.getElements())
+
+
+class SleepSets:
+    """Partial-order reduction using sleep sets.
+
+    The sleep set of a node holds the transitions that are not taken from it,
+    because they were already taken before reaching it from a previous node and
+    are independent of all the transitions taken since. Interleavings that only
+    reorder independent transitions are therefore generated only once."""
+
+    def __init__(self) -> None:
+        self.prunedBranches = 0
+        # node id to labels of the transitions in the sleep set of the node
+        self._sleepSets: dict[int, FrozenSet[str]] = {}
+        self._transitions: dict[str, ITransition] = {}
+
+    def reset(self) -> None:
+        self.prunedBranches = 0
+        self._sleepSets = {}
+        self._transitions = {}
+
+    def expand(
+        self, nodeId: int, neighbors: List[Neighbor]
+    ) -> List[Tuple[Neighbor, FrozenSet[str]]]:
+        """Returns the neighbors of the given node that are not in its sleep set,
+        together with the sleep sets of the nodes reached through them."""
+        sleepSet = self._sleepSets.pop(nodeId, frozenset())
+        explored: List[str] = []
+        result: List[Tuple[Neighbor, FrozenSet[str]]] = []
+        for neighbor in neighbors:
+            label = neighbor[0]
+            if label in sleepSet:
+                self.prunedBranches += 1
+                continue
+            trans = self.__transition(label)
+            childSleepSet = frozenset(
+                other
+                for other in [*sleepSet, *explored]
+                if areIndependent(trans, self.__transition(other))
+            )
+            result.append((neighbor, childSleepSet))
+            explored.append(label)
+        return result
+
+    def setSleepSet(self, nodeId: int, sleepSet: FrozenSet[str]) -> None:
+        """Sets the sleep set of a node that will be expanded later"""
+        if sleepSet:
+            self._sleepSets[nodeId] = sleepSet
+
+    def discard(self, nodeId: int) -> None:
+        """Forgets the sleep set of a node that is not expanded after all"""
+        self._sleepSets.pop(nodeId, None)
+
+    def __transition(self, label: str) -> ITransition:
+        trans = self._transitions.get(label)
+        if trans is None:
+            trans = newTraceTransition(label)
+            self._transitions[label] = trans
+        return trans
@@ -1,28 +1,35 @@
 # mypy: disable-error-code="import-untyped,no-any-unimported,misc"
+from collections import Counter
 from time import perf_counter
-from typing import List, Tuple
+from typing import List, Tuple, cast
 
 import maude
+from src.generator.checkpoint import Checkpoint, WorkListItem
+from src.generator.frontier import Frontier
+from src.generator.neighbor_cache import Neighbors
 from src.generator.trace_generator import _MAUDE_EXEC_TIME_KEY, TraceGenerator
-from src.generator.trace_tree import TraceTree
-from src.generator.util import extractListTerms, extractTransData, getSort
-from src.generator.worklist import Queue, Stack, WorkList
+from src.generator.trace_tree import (PendingNode, StreamingTraceTree,
+                                      TraceTree, newTraceTree)
+from src.generator.util import HNFTerms
+from src.generator.worklist import SpillingQueue, Stack, WorkList
 from src.maude_encoder import MaudeBuilder, MaudeEncoder, MaudeModules
 from src.maude_encoder import MaudeOps as mo
-from src.maude_encoder import MaudeSorts as ms
 from src.model.dnk_maude_model import DNKMaudeModel
 from src.trace.node import TraceNode
-from src.trace.transition import newTraceTransition
 from src.trace.vector_clocks import newVectorClocks
 from src.tracer_config import TracerConfig
 
 
 class SequentialTraceGenerator(TraceGenerator):
-    def __init__(
-        self, config: TracerConfig, workList: WorkList[Tuple[str, str, TraceNode, int]]
-    ):
+    _extensible = True
+    _resumable = True
+
+    def __init__(self, config: TracerConfig, workList: WorkList[WorkListItem]):
         super().__init__(config)
         self.workList = workList
+        # number of work list items of each DNK state, kept up to date so the
+        # pending states are known without walking the work list
+        self._pendingStates = Counter[int]()
 
     def _getEntryMaudeModule(self, name: str) -> str:
         me = MaudeBuilder()
@@ -36,54 +43,223 @@ class SequentialTraceGenerator(TraceGenerator):
         startDnkExpr = MaudeEncoder.parallelSeq(model.getElementTerms())
         startVC = newVectorClocks(len(model.getElementTerms()))
         startNode = TraceNode.fromTuple(("", startVC))
-        traceTree = TraceTree(model)
+        traceTree = newTraceTree(model, self.config.stateGraph, self._onTrace)
         traceTree.addNode(startNode)
 
-        self.workList.reset()
-        self.workList.append((startDnkExpr, mo.TRANS_TYPE_NONE, startNode, 0))
-        while not self.workList.isEmpty():
-            (dnkExpr, prevTransType, parentNode, d) = self.workList.pop()
-            neighbors = self.__computeNeighbors(mod, dnkExpr, prevTransType)
-
-            for prevTransType, transLabel, dnkExpr in neighbors:
-                trans = newTraceTransition(transLabel)
-                vc = trans.updateVC(parentNode.vectorClocks)
-                node = TraceNode(trans, vc)
-                traceTree.addNode(node, parentNode.id)
-                if d + 1 < depth:
-                    self.workList.append((dnkExpr, prevTransType, node, d + 1))
+        self._resetWorkList(traceTree)
+        hnfTerms = HNFTerms(mod)
+        startTerm = hnfTerms.parse(startDnkExpr)
+        if self.loadedHNFs > 0:
+            # the start state is stored by the expression it was generated from
+            startState = self.states.intern(startDnkExpr, mo.TRANS_TYPE_NONE)
+            self.states.setTerm(startState, startTerm)
+        else:
+            startState = self.states.internTerm(startTerm, mo.TRANS_TYPE_NONE)
+        self._pushItem((startState, startNode, 0))
+        self._expandWorkList(traceTree, model, mod, depth)
         return traceTree
 
-    def __computeNeighbors(
-        self, mod: maude.Module, dnkExpr: str, prevTransType: str
-    ) -> List[Tuple[str, str, str]]:
-        key = (dnkExpr, prevTransType)
-        if key in self.cache:
+    def _extendTraces(
+        self, frontier: Frontier, model: DNKMaudeModel, mod: maude.Module, depth: int
+    ) -> TraceTree:
+        self._resetWorkList(frontier.traceTree)
+        for item in frontier.items:
+            self._pushItem(item)
+        self._expandWorkList(frontier.traceTree, model, mod, depth)
+        return frontier.traceTree
+
+    def _resumeTraces(
+        self, checkpoint: Checkpoint, model: DNKMaudeModel, mod: maude.Module
+    ) -> TraceTree:
+        self._resetWorkList(checkpoint.traceTree)
+        for item in checkpoint.workList:
+            self._pushItem(item)
+        self._expandWorkList(checkpoint.traceTree, model, mod, checkpoint.depth)
+        return checkpoint.traceTree
+
+    def _resetWorkList(self, traceTree: TraceTree) -> None:
+        """Empties the work list before expanding the nodes of the given trace
+        tree. Spilled items refer to the nodes of the tree by id, since the tree
+        keeps them anyway, while pending nodes are written as they are."""
+        self.workList.reset()
+        self._pendingStates.clear()
+        if not isinstance(self.workList, SpillingQueue):
+            return
+
+        def toDisk(item: WorkListItem) -> object:
+            (stateId, node, d) = item
+            if isinstance(node, PendingNode):
+                return item
+            return (stateId, node.id, d)
+
+        def fromDisk(item: object) -> WorkListItem:
+            (stateId, node, d) = cast(Tuple[int, int | PendingNode, int], item)
+            if isinstance(node, PendingNode):
+                return (stateId, node, d)
+            return (stateId, traceTree.getNode(node), d)
+
+        self.workList.toDisk = toDisk
+        self.workList.fromDisk = fromDisk
+
+    def _defersNodes(self) -> bool:
+        """Whether the nodes to expand are only added to the trace tree once
+        they are popped, so that a work list spilling to disk does not keep
+        them in memory"""
+        return (
+            isinstance(self.workList, SpillingQueue) and self.workList.maxSizeBytes > 0
+        )
+
+    def _addPendingNode(
+        self, traceTree: TraceTree, item: WorkListItem
+    ) -> TraceNode | None:
+        """Returns the trace node of the given work list item, adding it to the
+        trace tree if it is pending. Returns None if an existing node was reused,
+        so the item must not be expanded."""
+        (stateId, node, d) = item
+        if not isinstance(node, PendingNode):
+            return node
+        treeNode = traceTree.addPendingNode(node, stateId, d)
+        if treeNode is None and self.sleepSets is not None:
+            self.sleepSets.discard(node.nodeId)
+        return treeNode
+
+    def _expandWorkList(
+        self, traceTree: TraceTree, model: DNKMaudeModel, mod: maude.Module, depth: int
+    ) -> None:
+        """Expands the work list items until the work list is empty, a stop is
+        requested or a budget is exceeded"""
+        hnfTerms = HNFTerms(mod)
+        while not self.workList.isEmpty() and not self._shouldStop():
+            item = self._popItem()
+            parentNode = self._addPendingNode(traceTree, item)
+            if parentNode is None:
+                continue
+            (stateId, _, d) = item
+            neighbors = self.__computeNeighbors(hnfTerms, stateId)
+            self._addNeighbors(traceTree, parentNode, neighbors, d, depth)
+            self.levels.addExpanded(d)
+            self._checkpointIfDue(traceTree, self.workList)
+            self._checkBudget(traceTree)
+            self._releaseUnusedStates(self._pendingStates.keys)
+        self._finishExpansion(traceTree)
+
+    def _pushItem(self, item: WorkListItem) -> None:
+        self.workList.append(item)
+        self._pendingStates[item[0]] += 1
+
+    def _popItem(self) -> WorkListItem:
+        item = self.workList.pop()
+        stateId = item[0]
+        self._pendingStates[stateId] -= 1
+        if self._pendingStates[stateId] == 0:
+            del self._pendingStates[stateId]
+        return item
+
+    def _finishExpansion(self, traceTree: TraceTree) -> None:
+        """Counts the items left in the work list and those written to disk. The
+        nodes of the remaining items stay leaves of the trace tree, and their
+        traces are handed out unless the consumer asked to stop."""
+        if isinstance(self.workList, SpillingQueue):
+            self.spilledFrontierItems = self.workList.spilledItems
+        if self.workList.isEmpty():
+            return
+        for item in self.workList.items():
+            self.levels.addRemaining(item[2])
+            node = self._addPendingNode(traceTree, item)
+            if node is not None and not self._stopRequested:
+                traceTree.closeNode(node)
+        self.workList.reset()
+        self._pendingStates.clear()
+
+    def _addNeighbors(
+        self,
+        traceTree: TraceTree,
+        parentNode: TraceNode,
+        neighbors: Neighbors,
+        d: int,
+        depth: int,
+    ) -> None:
+        """Adds the neighbors of the parent node to the trace tree and appends
+        the new nodes to the work list, or to the frontier if the maximum depth
+        is reached. Nodes to expand are appended as pending nodes instead, if
+        the work list defers them."""
+        expanded = [(n, frozenset[str]()) for n in neighbors]
+        if self.sleepSets is not None:
+            expanded = self.sleepSets.expand(parentNode.id, neighbors)
+        defersNodes = self._defersNodes()
+        for (transLabel, stateId), sleepSet in expanded:
+            if defersNodes and d + 1 < depth:
+                pending = traceTree.addPendingTransition(
+                    parentNode, transLabel, stateId, d + 1
+                )
+                if pending is None:
+                    continue
+                self._pushItem((stateId, pending, d + 1))
+                nodeId = pending.nodeId
+            else:
+                node = traceTree.addTransition(parentNode, transLabel, stateId, d + 1)
+                if node is None:
+                    continue
+                if d + 1 >= depth:
+                    traceTree.closeNode(node)
+                    if isinstance(traceTree, StreamingTraceTree):
+                        continue
+                    # kept to extend the trace tree to a larger depth later
+                    self.frontier.append((stateId, node, d + 1))
+                else:
+                    self._pushItem((stateId, node, d + 1))
+                nodeId = node.id
+            if self.sleepSets is not None:
+                self.sleepSets.setSleepSet(nodeId, sleepSet)
+        traceTree.closeNode(parentNode)
+
+    def _internNeighbors(self, neighbors: List[Tuple[str, str, str]]) -> Neighbors:
+        """Replaces the DNK expressions of the neighbors computed by Maude
+        with the ids of their states."""
+        return [
+            (transLabel, self.states.intern(dnkExpr, transType))
+            for transType, transLabel, dnkExpr in neighbors
+        ]
+
+    def __computeNeighbors(self, hnfTerms: HNFTerms, stateId: int) -> Neighbors:
+        """Returns the neighbors of the given state. They are computed on the
+        Maude terms of the states, which are kept by the interning table."""
+        if stateId in self.cache:
             self.cacheStats.hits += 1
-            return self.cache[key]
+            return self.cache[stateId]
 
+        dnkTerm, prevTransType = self.states.getTerm(stateId)
         startTime = perf_counter()
-        term = mod.parseTerm(MaudeEncoder.hnfCall(0, dnkExpr, prevTransType))
-        term.reduce()
+        if dnkTerm is None:
+            # state loaded from the persisted head normal forms
+            dnkTerm = hnfTerms.parse(self.states.get(stateId)[0])
+            self.states.setTerm(stateId, dnkTerm)
+        neighbors = hnfTerms.computeNeighbors(dnkTerm, prevTransType)
         endTime = perf_counter()
         self.addExecTime(_MAUDE_EXEC_TIME_KEY, endTime - startTime)
 
-        neighbors = extractListTerms(term, getSort(mod, ms.TDATA))
-        result: List[Tuple[str, str, str]] = []
-        for n in neighbors:
-            (_, prevTransType, transLabel, dnkExpr) = extractTransData(n, mod)
-            result.append((prevTransType, transLabel, dnkExpr))
-
-        self.cache[key] = result
+        result = [
+            (transLabel, self.states.internTerm(nextDnkTerm, transType))
+            for transType, transLabel, nextDnkTerm in neighbors
+        ]
+        self.cache[stateId] = result
         self.cacheStats.misses += 1
         return result
 
 
 class DFSTraceGenerator(SequentialTraceGenerator):
     def __init__(self, config: TracerConfig) -> None:
-        super().__init__(config, Stack[Tuple[str, str, TraceNode, int]]())
+        super().__init__(config, Stack[WorkListItem]())
 
 
 class BFSTraceGenerator(SequentialTraceGenerator):
     def __init__(self, config: TracerConfig) -> None:
-        super().__init__(config, Queue[Tuple[str, str, TraceNode, int]]())
+        super().__init__(config, newBFSQueue(config))
+
+
+def newBFSQueue(config: TracerConfig) -> SpillingQueue[WorkListItem]:
+    """Returns the work list of the BFS generators, spilling to the run output
+    directory once it exceeds the configured memory budget"""
+    return SpillingQueue[WorkListItem](
+        config.frontierMemoryMB * 1024 * 1024, config.outputDirPath
+    )
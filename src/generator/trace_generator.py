@@ -1,33 +1,140 @@
 # mypy: disable-error-code="import-untyped,no-any-unimported,misc"
 
+import copy
 import os
 from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable
+from functools import partial
 from time import perf_counter
-from typing import Dict, Hashable, List, Tuple
+from typing import List, Tuple
 
 import maude
 from src.decorators.cache_stats import CacheStats
 from src.decorators.exec_time import ExecTimes, with_time_execution
 from src.errors import MaudeError
-from src.generator.trace_tree import TraceTree
+from src.generator.budget import BudgetKind, GenerationBudget, LevelProgress
+from src.generator.checkpoint import (Checkpoint, CheckpointError,
+                                      WorkListItem, removeCheckpoint,
+                                      saveCheckpoint)
+from src.generator.dnk_states import DNKStates
+from src.generator.frontier import Frontier, FrontierError, FrontierItem
+from src.generator.hnf_store import HNFStore, StoredNeighbors, modelHash
+from src.generator.neighbor_cache import CacheEntries, NeighborCache
+from src.generator.partial_order_reduction import SleepSets
+from src.generator.trace_tree import StreamingTraceTree, TraceTree
+from src.generator.worklist import WorkList
 from src.maude_encoder import MaudeModules as mm
 from src.model.dnk_maude_model import DNKMaudeModel
 from src.stats import StatsEntry, StatsGenerator
+from src.trace.node import TraceNode
 from src.tracer_config import TracerConfig
 
 _MAUDE_EXEC_TIME_KEY = "maudeExecTime"
+_CHECKPOINT_TIME_KEY = "checkpointTime"
+# live DNK states below which the unreferenced ones are never released
+_MIN_STATES_TO_RELEASE = 4096
+
+
+def workerStatsEntries(
+    idleTimes: List[float],
+    overlappedPythonTime: float,
+    busyTimes: List[float],
+    chunks: List[int],
+) -> List[StatsEntry]:
+    return [
+        StatsEntry("workerIdleTime", "Maude workers idle time", sum(idleTimes)),
+        StatsEntry(
+            "layerWorkerIdleTimes",
+            "Maude workers idle time per layer",
+            ";".join(f"{t:.4f}" for t in idleTimes),
+        ),
+        StatsEntry(
+            "overlappedPythonTime",
+            "Python time overlapped with the Maude workers",
+            overlappedPythonTime,
+        ),
+        StatsEntry(
+            "workerBusyTimes",
+            "Maude workers busy time",
+            ";".join(f"{t:.4f}" for t in busyTimes),
+        ),
+        StatsEntry(
+            "workerChunks",
+            "Maude workers input chunks",
+            ";".join(str(c) for c in chunks),
+        ),
+    ]
+
+
+def initMaude(maudeFilesDirPath: str, verbose: bool) -> None:
+    """Initializes the Maude library of the current process
+    and loads the head normal form Maude files."""
+    success = maude.init(advise=False)
+    if not success:
+        raise MaudeError(
+            "Failed to initialize Maude library! "
+            + "Initialization should happen once, maybe it is done multiple times?"
+        )
+
+    filePath = os.path.join(maudeFilesDirPath, "parallel_head_normal_form.maude")
+    success = maude.load(filePath)
+    if not success:
+        raise MaudeError(f"Failed to load Maude file: {filePath}.")
+    if verbose:
+        maude.input("set print attribute on .")
 
 
 class TraceGenerator(ExecTimes, StatsGenerator, ABC):
     maudeInitialized: bool = False
+    # whether the generator collects the frontier of its trace trees
+    _extensible: bool = False
+    # whether the generator saves checkpoints and resumes from them
+    _resumable: bool = False
 
     def __init__(self, config: TracerConfig) -> None:
         ExecTimes.__init__(self)
         StatsGenerator.__init__(self)
         self.config = config
-        self.cache: Dict[Tuple[Hashable, ...], List[Tuple[str, str, str]]] = {}
+        self.hnfStore: HNFStore | None = None
+        if config.genCacheDirPath is not None:
+            self.hnfStore = HNFStore(config.genCacheDirPath)
+        self.cache = self.__newCache()
+        self.states = DNKStates()
+        # the states are released only if the cache does not keep all of them
+        # and if no state graph merges nodes by state
+        self._releasesStates = config.genCacheSizeMB > 0 and not config.stateGraph
+        # number of live states from which the unreferenced ones are released
+        self._releaseThreshold = _MIN_STATES_TO_RELEASE
+        self.releasedStates = 0
+        self.loadedHNFs = 0
         self.cacheStats = CacheStats(0, 0)
         self.generatedTraces = 0
+        self.traceNodes = 0
+        self.peakTraceNodes = 0
+        self.mergedTraceNodes = 0
+        # work list or layer items written to disk during the last generation
+        self.spilledFrontierItems = 0
+        self.checkpoints = 0
+        self.checkpointBytes = 0
+        # model hash and depth of the running generation
+        self._currentRun: Tuple[str, int] | None = None
+        self._lastCheckpointTime = 0.0
+        self._onTrace: Callable[[List[TraceNode]], None] | None = None
+        # whether the consumer of the traces asked to stop the running generation
+        self._stopRequested = False
+        self.budget = GenerationBudget(
+            config.maxNodes, config.maxMemoryMB, config.timeBudget
+        )
+        # budget that stopped the last generation
+        self.budgetHit: BudgetKind | None = None
+        self.levels = LevelProgress()
+        # trace leaves at the maximum depth of the last generation
+        self.frontier: List[FrontierItem] = []
+        # model hash, depth and trace tree of the last generation
+        self._lastRun: Tuple[str, int, TraceTree] | None = None
+        self.sleepSets: SleepSets | None = None
+        if config.partialOrderReduction:
+            self.sleepSets = SleepSets()
         self.__initMaude()
 
     @abstractmethod
@@ -38,37 +145,221 @@ class TraceGenerator(ExecTimes, StatsGenerator, ABC):
     @abstractmethod
     def _getEntryMaudeModule(self, name: str) -> str: ...
 
+    def _extendTraces(
+        self, frontier: Frontier, model: DNKMaudeModel, mod: maude.Module, depth: int
+    ) -> TraceTree:
+        raise FrontierError(f"{type(self).__name__} cannot extend trace trees")
+
+    def _resumeTraces(
+        self, checkpoint: Checkpoint, model: DNKMaudeModel, mod: maude.Module
+    ) -> TraceTree:
+        raise CheckpointError(f"{type(self).__name__} cannot resume trace generation")
+
     def __initMaude(self) -> None:
         if TraceGenerator.maudeInitialized:
             return
 
-        success = maude.init(advise=False)
-        if not success:
-            raise MaudeError(
-                "Failed to initialize Maude library! "
-                + "Initialization should happen once, maybe it is done multiple times?"
-            )
-
-        filePath = os.path.join(
-            self.config.maudeFilesDirPath, "parallel_head_normal_form.maude"
-        )
-        success = maude.load(filePath)
-        if not success:
-            raise MaudeError(f"Failed to load Maude file: {filePath}.")
-        if self.config.verbose:
-            maude.input("set print attribute on .")
+        initMaude(self.config.maudeFilesDirPath, self.config.verbose)
         TraceGenerator.maudeInitialized = True
 
     @with_time_execution
-    def run(self, model: DNKMaudeModel, depth: int) -> TraceTree:
-        """Returns the trace tree collected during the run"""
+    def run(
+        self,
+        model: DNKMaudeModel,
+        depth: int,
+        onTrace: Callable[[List[TraceNode]], None] | None = None,
+    ) -> TraceTree:
+        """Returns the trace tree collected during the run. If a trace consumer
+        is given, the traces are handed to it while they are generated and the
+        returned tree only holds their statistics, unless the tree cannot release
+        its nodes (e.g. it is a state graph). In that case, the traces are handed
+        to the consumer once the generation ends."""
         self.reset()
-        self.__declareModelMaudeModule(model)
-        mod = self.__declareEntryMaudeModule()
+        self._onTrace = onTrace
+        mod, hnfsHash = self.__declareModel(model)
+        self.__startRun(hnfsHash, depth)
         traceTree = self._generateTraces(model, mod, depth)
-        self.generatedTraces = traceTree.traceCount()
+        if onTrace is not None and not isinstance(traceTree, StreamingTraceTree):
+            for trace in traceTree.getTraceIterator():
+                if self._stopRequested:
+                    break
+                onTrace(trace)
+        self.__finishRun(traceTree, hnfsHash, depth)
+        return traceTree
+
+    @with_time_execution
+    def extend(self, model: DNKMaudeModel, frontier: Frontier, depth: int) -> TraceTree:
+        """Extends the trace tree of the given frontier, generated for the same
+        model, to the given depth. Only the leaves at the maximum depth of the
+        tree are expanded, reusing the DNK states and the cache of the frontier.
+        The trace tree of the frontier is extended in place."""
+        if not self._extensible:
+            raise FrontierError(f"{type(self).__name__} cannot extend trace trees")
+        if depth <= frontier.depth:
+            raise FrontierError(
+                f"Cannot extend traces of depth {frontier.depth} to depth {depth}"
+            )
+        # the sleep sets of the frontier may be the ones reset by this generator
+        sleepSets = copy.copy(frontier.sleepSets)
+        self.reset()
+        self.states = frontier.states
+        # the modules of the kept Maude terms are replaced when declaring the model
+        self.states.forgetTerms()
+        self.cache = frontier.cache
+        if self.sleepSets is not None and sleepSets is not None:
+            sleepSets.prunedBranches = 0
+            self.sleepSets = sleepSets
+        mod, hnfsHash = self.__declareModel(model)
+        if hnfsHash != frontier.modelHash:
+            raise FrontierError("The frontier was generated for a different model")
+        self.__startRun(hnfsHash, depth)
+        traceTree = self._extendTraces(frontier, model, mod, depth)
+        self.__finishRun(traceTree, hnfsHash, depth)
         return traceTree
 
+    @with_time_execution
+    def resume(self, model: DNKMaudeModel, checkpoint: Checkpoint) -> TraceTree:
+        """Resumes the generation saved in the given checkpoint, generated for the
+        same model, until the depth of the checkpoint. The trace tree of the
+        checkpoint is extended in place."""
+        if not self._resumable:
+            raise CheckpointError(
+                f"{type(self).__name__} cannot resume trace generation"
+            )
+        sleepSets = copy.copy(checkpoint.sleepSets)
+        self.reset()
+        self.states = checkpoint.states
+        self.states.forgetTerms()
+        self.cache = checkpoint.cache
+        self.frontier = list(checkpoint.frontierItems)
+        if self.sleepSets is not None and sleepSets is not None:
+            self.sleepSets = sleepSets
+        mod, hnfsHash = self.__declareModel(model)
+        if hnfsHash != checkpoint.modelHash:
+            raise CheckpointError("The checkpoint was saved for a different model")
+        self.__startRun(hnfsHash, checkpoint.depth)
+        traceTree = self._resumeTraces(checkpoint, model, mod)
+        self.__finishRun(traceTree, hnfsHash, checkpoint.depth)
+        return traceTree
+
+    def requestStop(self) -> None:
+        """Asks the running generation to stop expanding its work list, e.g. once
+        the consumer of the traces does not need more of them. The trace tree
+        generated so far is returned."""
+        self._stopRequested = True
+
+    def _shouldStop(self) -> bool:
+        return self._stopRequested or self.budgetHit is not None
+
+    def _checkBudget(self, traceTree: TraceTree) -> bool:
+        """Returns whether the running generation should stop, because it was
+        requested or because one of the configured budgets was exceeded"""
+        if self.budgetHit is None:
+            self.budgetHit = self.budget.exceeded(traceTree.nodeCount())
+        return self._shouldStop()
+
+    def _checkpointIfDue(
+        self, traceTree: TraceTree, workList: WorkList[WorkListItem]
+    ) -> None:
+        """Saves a checkpoint of the running generation to the run output
+        directory, if the configured interval passed since the last one"""
+        interval = self.config.checkpointInterval
+        if interval <= 0 or self._currentRun is None:
+            return
+        if perf_counter() - self._lastCheckpointTime < interval:
+            return
+        if isinstance(traceTree, StreamingTraceTree):
+            # the streamed traces cannot be generated again
+            return
+        startTime = perf_counter()
+        hnfsHash, depth = self._currentRun
+        checkpoint = Checkpoint(
+            hnfsHash,
+            depth,
+            traceTree,
+            [],
+            self.frontier,
+            self.states,
+            self.cache,
+            self.sleepSets,
+            TraceNode.nextId(),
+        )
+        self.checkpointBytes = saveCheckpoint(
+            self.config.outputDirPath, checkpoint, workList.items()
+        )
+        self.checkpoints += 1
+        endTime = perf_counter()
+        self.addExecTime(_CHECKPOINT_TIME_KEY, endTime - startTime)
+        self._lastCheckpointTime = endTime
+
+    def _releaseUnusedStates(self, pendingStates: Callable[[], Iterable[int]]) -> None:
+        """Releases the DNK states that are neither pending expansion, in the
+        frontier nor referenced by the cache, once the number of live states
+        doubled since the last release, so the bounded cache also bounds the
+        states kept alive for it"""
+        if not self._releasesStates or self.states.liveCount() < self._releaseThreshold:
+            return
+        keep = set(pendingStates())
+        keep.update(stateId for stateId, _, _ in self.frontier)
+        keep.update(self.cache.stateIds())
+        self.releasedStates += self.states.release(keep)
+        self._releaseThreshold = max(
+            _MIN_STATES_TO_RELEASE, 2 * self.states.liveCount()
+        )
+
+    def getFrontier(self) -> Frontier:
+        """Returns the frontier of the last generation, to extend it later"""
+        if self._lastRun is None:
+            raise FrontierError("No traces were generated yet")
+        hnfsHash, depth, traceTree = self._lastRun
+        if not self._extensible or isinstance(traceTree, StreamingTraceTree):
+            raise FrontierError("The generated trace tree cannot be extended")
+        if self._shouldStop():
+            raise FrontierError("The trace generation was stopped before the end")
+        return Frontier(
+            hnfsHash,
+            depth,
+            traceTree,
+            self.frontier,
+            self.states,
+            self.cache,
+            self.sleepSets,
+            TraceNode.nextId(),
+        )
+
+    def __declareModel(self, model: DNKMaudeModel) -> Tuple[maude.Module, str]:
+        """Declares the Maude modules of the given model and returns the entry
+        module and the hash of the model"""
+        modelModule = model.toMaudeModule()
+        self.__declareModelMaudeModule(modelModule)
+        mod = self.__declareEntryMaudeModule()
+        hnfsHash = modelHash(modelModule, self.config.maudeFilesDirPath)
+        if self.hnfStore is not None:
+            self.__loadStoredHNFs(self.hnfStore, hnfsHash)
+        return mod, hnfsHash
+
+    def __startRun(self, hnfsHash: str, depth: int) -> None:
+        self._currentRun = (hnfsHash, depth)
+        self._lastCheckpointTime = perf_counter()
+        self.budget.start()
+        if self.hnfStore is not None:
+            self.cache.storeNewEntries = partial(
+                self.__storeNewHNFs, self.hnfStore, hnfsHash
+            )
+
+    def __finishRun(self, traceTree: TraceTree, hnfsHash: str, depth: int) -> None:
+        # a generation stopped before the end can still be resumed
+        if self.config.checkpointInterval > 0 and not self._shouldStop():
+            removeCheckpoint(self.config.outputDirPath)
+        self._currentRun = None
+        self.cache.flushNewEntries()
+        self.cache.storeNewEntries = None
+        self.generatedTraces = traceTree.traceCount()
+        self.traceNodes = traceTree.nodeCount()
+        self.peakTraceNodes = traceTree.peakNodeCount()
+        self.mergedTraceNodes = traceTree.mergedNodes
+        self._lastRun = (hnfsHash, depth, traceTree)
+
     def __declareEntryMaudeModule(self) -> maude.Module:
         maude.input(self._getEntryMaudeModule(mm.ENTRY))
         mod = maude.getModule(mm.ENTRY)
@@ -76,9 +367,37 @@ class TraceGenerator(ExecTimes, StatsGenerator, ABC):
             raise MaudeError("Failed to declare entry module!")
         return mod
 
-    def __declareModelMaudeModule(self, model: DNKMaudeModel) -> None:
+    def __loadStoredHNFs(self, store: HNFStore, hnfsHash: str) -> None:
+        """Warms up the cache with the neighbors stored by previous runs"""
+        for dnkExpr, transType, neighbors in store.load(hnfsHash):
+            stateId = self.states.intern(dnkExpr, transType)
+            self.cache.load(
+                stateId,
+                [(label, self.states.intern(e, t)) for t, label, e in neighbors],
+            )
+            self.loadedHNFs += 1
+
+    def __storeNewHNFs(
+        self, store: HNFStore, hnfsHash: str, newEntries: CacheEntries
+    ) -> None:
+        entries: List[Tuple[str, str, StoredNeighbors]] = []
+        for stateId, neighbors in newEntries:
+            storedNeighbors: StoredNeighbors = []
+            for label, nextStateId in neighbors:
+                nextDnkExpr, nextTransType = self.states.get(nextStateId)
+                storedNeighbors.append((nextTransType, label, nextDnkExpr))
+            dnkExpr, transType = self.states.get(stateId)
+            entries.append((dnkExpr, transType, storedNeighbors))
+        store.put(hnfsHash, entries)
+
+    def __newCache(self) -> NeighborCache:
+        return NeighborCache(
+            self.config.genCacheSizeMB * 1024 * 1024, self.hnfStore is not None
+        )
+
+    def __declareModelMaudeModule(self, modelModule: str) -> None:
         startTime = perf_counter()
-        maude.input(model.toMaudeModule())
+        maude.input(modelModule)
         mod = maude.getModule(mm.DNK_MODEL)
         if mod is None:
             raise MaudeError("Failed to declare module for given DyNetKAT model!")
@@ -86,11 +405,35 @@ class TraceGenerator(ExecTimes, StatsGenerator, ABC):
         self.addExecTime(_MAUDE_EXEC_TIME_KEY, endTime - startTime)
 
     def reset(self) -> None:
-        self.cache = {}
+        self.cache = self.__newCache()
+        self.states = DNKStates()
+        self._releaseThreshold = _MIN_STATES_TO_RELEASE
+        self.releasedStates = 0
+        self.loadedHNFs = 0
         self.cacheStats = CacheStats(0, 0)
         self.generatedTraces = 0
+        self.traceNodes = 0
+        self.peakTraceNodes = 0
+        self.mergedTraceNodes = 0
+        self.spilledFrontierItems = 0
+        self.checkpoints = 0
+        self.checkpointBytes = 0
+        self._currentRun = None
+        self._onTrace = None
+        self._stopRequested = False
+        self.budgetHit = None
+        self.levels = LevelProgress()
+        self.frontier = []
+        self._lastRun = None
+        if self.sleepSets is not None:
+            self.sleepSets.reset()
         self.resetExecTimes()
 
+    def __levelCompletion(self) -> List[float]:
+        if self._lastRun is None:
+            return []
+        return self.levels.completion(self._lastRun[1], self._shouldStop())
+
     def getStats(self) -> List[StatsEntry]:
         return [
             StatsEntry(
@@ -113,5 +456,68 @@ class TraceGenerator(ExecTimes, StatsGenerator, ABC):
                 "Trace generation cache misses",
                 self.cacheStats.misses,
             ),
+            StatsEntry(
+                "traceGenCacheLoaded",
+                "Trace generation cache entries loaded from previous runs",
+                self.loadedHNFs,
+            ),
+            StatsEntry(
+                "traceGenCacheEvictions",
+                "Trace generation cache evictions",
+                self.cache.evictions,
+            ),
             StatsEntry("generatedTraces", "Generated traces", self.generatedTraces),
-        ]
+            StatsEntry("dnkStates", "Distinct DNK states", len(self.states)),
+            StatsEntry(
+                "releasedDnkStates",
+                "DNK states released once unreferenced",
+                self.releasedStates,
+            ),
+            StatsEntry("traceNodes", "Trace nodes", self.traceNodes),
+            StatsEntry(
+                "peakTraceNodes",
+                "Peak trace nodes held in memory",
+                self.peakTraceNodes,
+            ),
+            StatsEntry(
+                "mergedTraceNodes",
+                "Trace nodes merged in the state graph",
+                self.mergedTraceNodes,
+            ),
+            StatsEntry(
+                "porPrunedBranches",
+                "Branches pruned by partial-order reduction",
+                self.sleepSets.prunedBranches if self.sleepSets is not None else 0,
+            ),
+            StatsEntry(
+                "spilledFrontierItems",
+                "Nodes to expand written to disk",
+                self.spilledFrontierItems,
+            ),
+            StatsEntry("checkpoints", "Checkpoints saved", self.checkpoints),
+            StatsEntry(
+                _CHECKPOINT_TIME_KEY,
+                "Checkpoints saving time",
+                self.getExecTime(_CHECKPOINT_TIME_KEY),
+            ),
+            StatsEntry(
+                "checkpointBytes",
+                "Size of the last checkpoint in bytes",
+                self.checkpointBytes,
+            ),
+            StatsEntry(
+                "budgetHit",
+                "Generation budget exceeded",
+                self.budgetHit if self.budgetHit is not None else "-",
+            ),
+            StatsEntry(
+                "levelCompletion",
+                "Expanded fraction of each depth level",
+                ";".join(f"{c:.4f}" for c in self.__levelCompletion()),
+            ),
+        ] + self._getWorkerStats()
+
+    def _getWorkerStats(self) -> List[StatsEntry]:
+        """Stats of the Maude workers. Generators without Maude workers report
+        empty values, so that every strategy has the same stats."""
+        return workerStatsEntries([], 0.0, [], [])
@@ -1,6 +1,8 @@
 from enum import StrEnum
 from typing import Dict
 
+from src.generator.multiprocess_trace_generator import (
+    MultiProcessBFSTraceGenerator, MultiProcessDFSTraceGenerator)
 from src.generator.parallel_trace_generator import ParallelBFSTraceGenerator
 from src.generator.sequential_trace_generator import (BFSTraceGenerator,
                                                       DFSTraceGenerator)
@@ -21,5 +23,14 @@ _generators: Dict[TraceGenOption, type[TraceGenerator]] = {
 }
 
 
+# generators used instead when trace generation runs on multiple processes
+_multiProcessGenerators: Dict[TraceGenOption, type[TraceGenerator]] = {
+    TraceGenOption.DFS: MultiProcessDFSTraceGenerator,
+    TraceGenOption.BFS: MultiProcessBFSTraceGenerator,
+}
+
+
 def newTraceGenerator(option: TraceGenOption, config: TracerConfig) -> TraceGenerator:
+    if config.threads > 1 and option in _multiProcessGenerators:
+        return _multiProcessGenerators[option](config)
     return _generators[option](config)
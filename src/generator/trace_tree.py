@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-from collections.abc import Iterator
-from typing import List, Tuple
+from collections.abc import Callable, Iterator
+from typing import Hashable, List, NamedTuple, Tuple
 
 from src.model.dnk_maude_model import DNKMaudeModel
 from src.trace.node import TraceNode
+from src.trace.transition import newTraceTransition
 from src.util import indexInBounds
 
 
@@ -12,12 +13,24 @@ class TracesBuilderError(Exception):
     pass
 
 
+class PendingNode(NamedTuple):
+    """Node of a transition taken from the parent node, which is only added to
+    the trace tree once it is expanded. It holds the data of the node, so it can
+    be written to disk instead of keeping the node in memory."""
+
+    nodeId: int
+    parentId: int
+    transLabel: str
+    vectorClocks: List[List[int]]
+
+
 class TraceTree:
     def __init__(self, dnkModel: DNKMaudeModel) -> None:
         self.dnkModel = dnkModel
         self._nodes: List[Tuple[TraceNode, int]] = []
         self._nodeIdToIndex: dict[int, int] = {}
         self._isLeaf: List[bool] = []
+        self.mergedNodes = 0
 
     def addNode(self, node: TraceNode, parentId: int | None = None) -> None:
         if node.id in self._nodeIdToIndex:
@@ -40,6 +53,59 @@ class TraceTree:
             self._isLeaf[parentIndex] = False
         self._nodeIdToIndex[node.id] = index
 
+    def addTransition(
+        self, parentNode: TraceNode, transLabel: str, stateId: int, depth: int
+    ) -> TraceNode | None:
+        """Adds a node for the given transition taken from the parent node, which
+        leads to the DNK state with the given id at the given depth. Returns the new
+        node, or None if an existing node was reused, so it must not be expanded
+        again."""
+        trans = newTraceTransition(transLabel)
+        vc = trans.updateVC(parentNode.vectorClocks)
+        node = TraceNode(trans, vc)
+        self.addNode(node, parentNode.id)
+        return node
+
+    def addPendingTransition(
+        self, parentNode: TraceNode, transLabel: str, stateId: int, depth: int
+    ) -> PendingNode | None:
+        """Same as 'addTransition', but the new node is only added to the tree by
+        'addPendingNode', e.g. once it is expanded. The parent node is no longer
+        a leaf in the meantime."""
+        self._isLeaf[self._nodeIdToIndex[parentNode.id]] = False
+        return self._newPendingNode(parentNode, transLabel)
+
+    def addPendingNode(
+        self, pending: PendingNode, stateId: int, depth: int
+    ) -> TraceNode | None:
+        """Adds the node of a pending transition to the tree. Returns the node,
+        or None if an existing node was reused, so it must not be expanded."""
+        trans = newTraceTransition(pending.transLabel)
+        node = TraceNode(trans, pending.vectorClocks, pending.nodeId)
+        self.addNode(node, pending.parentId)
+        return node
+
+    def _newPendingNode(self, parentNode: TraceNode, transLabel: str) -> PendingNode:
+        trans = newTraceTransition(transLabel)
+        vc = trans.updateVC(parentNode.vectorClocks)
+        return PendingNode(TraceNode.newId(), parentNode.id, transLabel, vc)
+
+    def closeNode(self, node: TraceNode) -> None:
+        """Called by the generators once all the children of the given node
+        were added to the tree"""
+        pass
+
+    def getNode(self, nodeId: int) -> TraceNode:
+        """Returns the node of the tree with the given id"""
+        return self._nodes[self._nodeIdToIndex[nodeId]][0]
+
+    def nodeCount(self) -> int:
+        return len(self._nodes)
+
+    def peakNodeCount(self) -> int:
+        """Maximum number of nodes held by the tree at once"""
+        return self.nodeCount()
+
     def traceCount(self) -> int:
         count: int = 0
         for v in self._isLeaf:
@@ -48,14 +114,249 @@ class TraceTree:
             count += 1
         return count
 
-    def getTraceIterator(self) -> TraceIterator:
-        return TraceIterator(self)
+    def getTraceIterator(self, fromNode: int = 0) -> Iterator[List[TraceNode]]:
+        """Returns an iterator over the traces whose leaf is one of the nodes
+        added after the first 'fromNode' nodes of the tree"""
+        return TraceIterator(self, fromNode)
+
+
+class TraceGraph(TraceTree):
+    """Trace tree where nodes with the same transition, DNK state, depth and
+    vector clocks are merged, so traces sharing them form a DAG instead of
+    separate paths. Traces are the paths from the root to the leaves of the DAG,
+    and they are only built when iterating over them."""
+
+    def __init__(self, dnkModel: DNKMaudeModel) -> None:
+        super().__init__(dnkModel)
+        self._children: List[List[int]] = []
+        self._keyToIndex: dict[Tuple[Hashable, ...], int] = {}
+
+    def addNode(self, node: TraceNode, parentId: int | None = None) -> None:
+        super().addNode(node, parentId)
+        self._children.append([])
+        parentIndex = self._nodes[-1][1]
+        if parentIndex >= 0:
+            self._children[parentIndex].append(len(self._nodes) - 1)
+
+    def addTransition(
+        self, parentNode: TraceNode, transLabel: str, stateId: int, depth: int
+    ) -> TraceNode | None:
+        trans = newTraceTransition(transLabel)
+        vc = trans.updateVC(parentNode.vectorClocks)
+        key = _nodeKey(transLabel, stateId, depth, vc)
+        if self.__merge(parentNode.id, key):
+            return None
+        node = TraceNode(trans, vc)
+        self.addNode(node, parentNode.id)
+        self._keyToIndex[key] = len(self._nodes) - 1
+        return node
+
+    def addPendingTransition(
+        self, parentNode: TraceNode, transLabel: str, stateId: int, depth: int
+    ) -> PendingNode | None:
+        # nodes are merged with the ones added to the tree so far, and the pending
+        # nodes once they are added
+        pending = self._newPendingNode(parentNode, transLabel)
+        key = _nodeKey(transLabel, stateId, depth, pending.vectorClocks)
+        if self.__merge(parentNode.id, key):
+            return None
+        self._isLeaf[self._nodeIdToIndex[parentNode.id]] = False
+        return pending
+
+    def addPendingNode(
+        self, pending: PendingNode, stateId: int, depth: int
+    ) -> TraceNode | None:
+        key = _nodeKey(pending.transLabel, stateId, depth, pending.vectorClocks)
+        if self.__merge(pending.parentId, key):
+            return None
+        node = super().addPendingNode(pending, stateId, depth)
+        self._keyToIndex[key] = len(self._nodes) - 1
+        return node
+
+    def __merge(self, parentId: int, key: Tuple[Hashable, ...]) -> bool:
+        """Makes the node with the given key a child of the parent node, if the
+        tree has one. Returns whether the node was found."""
+        index = self._keyToIndex.get(key, -1)
+        if index < 0:
+            return False
+        parentIndex = self._nodeIdToIndex[parentId]
+        self._children[parentIndex].append(index)
+        self._isLeaf[parentIndex] = False
+        self.mergedNodes += 1
+        return True
+
+    def traceCount(self) -> int:
+        # number of paths from each node to the leaves, computed children first
+        paths: List[int] = [0 for _ in self._nodes]
+        done: List[bool] = [False for _ in self._nodes]
+        for root in range(len(self._nodes)):
+            stack = [root]
+            while stack:
+                i = stack[-1]
+                if done[i]:
+                    stack.pop()
+                    continue
+                pending = [c for c in self._children[i] if not done[c]]
+                if pending:
+                    stack.extend(pending)
+                    continue
+                paths[i] = sum(paths[c] for c in self._children[i]) or 1
+                done[i] = True
+                stack.pop()
+        roots = [i for i, (_, parent) in enumerate(self._nodes) if parent < 0]
+        return sum(paths[i] for i in roots)
+
+    def getTraceIterator(self, fromNode: int = 0) -> Iterator[List[TraceNode]]:
+        for i, (_, parent) in enumerate(self._nodes):
+            if parent < 0:
+                yield from self.__pathsFrom(i, fromNode)
+
+    def __pathsFrom(self, root: int, fromNode: int) -> Iterator[List[TraceNode]]:
+        path: List[int] = [root]
+        # position of the next child to visit for each node of the path
+        nextChild: List[int] = [0]
+        while path:
+            children = self._children[path[-1]]
+            if not children and path[-1] >= fromNode:
+                yield [self._nodes[i][0] for i in path]
+            if nextChild[-1] >= len(children):
+                path.pop()
+                nextChild.pop()
+                continue
+            child = children[nextChild[-1]]
+            nextChild[-1] += 1
+            path.append(child)
+            nextChild.append(0)
+
+
+def _nodeKey(
+    transLabel: str, stateId: int, depth: int, vc: List[List[int]]
+) -> Tuple[Hashable, ...]:
+    return (transLabel, stateId, depth, tuple(tuple(v) for v in vc))
+
+
+class _StreamedNode:
+    __slots__ = ("node", "parent", "pendingChildren", "hasChildren", "closed")
+
+    def __init__(self, node: TraceNode, parent: _StreamedNode | None) -> None:
+        self.node = node
+        self.parent = parent
+        self.pendingChildren = 0
+        self.hasChildren = False
+        self.closed = False
+
+
+class StreamingTraceTree(TraceTree):
+    """Trace tree handing every trace to a consumer as soon as its leaf is
+    closed, instead of keeping all traces until the generation ends. Nodes are
+    released once all the traces going through them were handed out, so only
+    the nodes of the traces still being generated are held in memory."""
+
+    def __init__(
+        self, dnkModel: DNKMaudeModel, onTrace: Callable[[List[TraceNode]], None]
+    ) -> None:
+        super().__init__(dnkModel)
+        self._onTrace = onTrace
+        self._liveNodes: dict[int, _StreamedNode] = {}
+        self._addedNodes = 0
+        self._peakNodes = 0
+        self._traces = 0
+
+    def addNode(self, node: TraceNode, parentId: int | None = None) -> None:
+        if node.id in self._liveNodes:
+            raise TracesBuilderError(
+                "Nodes added to the trace tree must have unique IDs"
+            )
+        node.trans.policy = self.dnkModel.netkatRepl.restore(node.trans.policy)
+        parent = None
+        if parentId is not None:
+            parent = self._liveNodes.get(parentId)
+            if parent is None:
+                raise TracesBuilderError("Parent id not found")
+            parent.pendingChildren += 1
+            parent.hasChildren = True
+        self._liveNodes[node.id] = _StreamedNode(node, parent)
+        self._addedNodes += 1
+        self._peakNodes = max(self._peakNodes, len(self._liveNodes))
+
+    def addPendingTransition(
+        self, parentNode: TraceNode, transLabel: str, stateId: int, depth: int
+    ) -> PendingNode | None:
+        # the parent is released only once the pending node was added and closed
+        parent = self._liveNodes[parentNode.id]
+        parent.pendingChildren += 1
+        parent.hasChildren = True
+        return self._newPendingNode(parentNode, transLabel)
+
+    def addPendingNode(
+        self, pending: PendingNode, stateId: int, depth: int
+    ) -> TraceNode | None:
+        node = super().addPendingNode(pending, stateId, depth)
+        # the node was counted as a child of its parent when it became pending
+        self._liveNodes[pending.parentId].pendingChildren -= 1
+        return node
+
+    def closeNode(self, node: TraceNode) -> None:
+        streamed = self._liveNodes[node.id]
+        streamed.closed = True
+        if not streamed.hasChildren:
+            self._onTrace(self.__trace(streamed))
+            self._traces += 1
+        self.__release(streamed)
+
+    def __trace(self, leaf: _StreamedNode) -> List[TraceNode]:
+        trace: List[TraceNode] = []
+        curr: _StreamedNode | None = leaf
+        while curr is not None:
+            trace.append(curr.node)
+            curr = curr.parent
+        trace.reverse()
+        return trace
+
+    def __release(self, streamed: _StreamedNode) -> None:
+        """Releases the given node and its ancestors whose subtrees are done"""
+        curr: _StreamedNode | None = streamed
+        while curr is not None and curr.closed and curr.pendingChildren == 0:
+            del self._liveNodes[curr.node.id]
+            curr = curr.parent
+            if curr is not None:
+                curr.pendingChildren -= 1
+
+    def getNode(self, nodeId: int) -> TraceNode:
+        # only the nodes that were not released can be looked up
+        return self._liveNodes[nodeId].node
+
+    def nodeCount(self) -> int:
+        return self._addedNodes
+
+    def peakNodeCount(self) -> int:
+        return self._peakNodes
+
+    def traceCount(self) -> int:
+        return self._traces
+
+    def getTraceIterator(self, fromNode: int = 0) -> Iterator[List[TraceNode]]:
+        # the traces were already handed to the consumer
+        return iter([])
+
+
+def newTraceTree(
+    dnkModel: DNKMaudeModel,
+    stateGraph: bool,
+    onTrace: Callable[[List[TraceNode]], None] | None = None,
+) -> TraceTree:
+    if stateGraph:
+        # merged nodes are shared by traces, so they cannot be released
+        return TraceGraph(dnkModel)
+    if onTrace is not None:
+        return StreamingTraceTree(dnkModel, onTrace)
+    return TraceTree(dnkModel)
 
 
 class TraceIterator(Iterator[List[TraceNode]]):
-    def __init__(self, traceTree: TraceTree) -> None:
+    def __init__(self, traceTree: TraceTree, fromNode: int = 0) -> None:
         self.__traceTree = traceTree
-        self.__head = self.__getNextLeafPos(0)
+        self.__head = self.__getNextLeafPos(fromNode)
 
     def __next__(self) -> List[TraceNode]:
         if not indexInBounds(self.__head, len(self.__traceTree._isLeaf)):
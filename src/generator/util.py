@@ -3,6 +3,8 @@ from typing import List, Tuple
 
 import maude
 from src.errors import MaudeError
+from src.maude_encoder import MaudeEncoder
+from src.maude_encoder import MaudeOps as mo
 from src.maude_encoder import MaudeSorts as ms
 from src.trace.node import TraceNode
 
@@ -25,27 +27,125 @@ def getSort(mod: maude.Module, sortName: str) -> maude.Sort:
     return sort
 
 
-def extractTransData(term: maude.Term, mod: maude.Module) -> Tuple[int, str, str, str]:
-    expSorts: List[maude.Sort] = [
+def getTransDataSorts(mod: maude.Module) -> List[maude.Sort]:
+    """Returns the expected sorts of the arguments of a transition data term"""
+    return [
         getSort(mod, ms.NAT),
         getSort(mod, ms.TTYPE),
         getSort(mod, ms.STRING),
         getSort(mod, ms.DNK_COMP),
     ]
+
+
+def checkTransDataArgs(
+    term: maude.Term, expSorts: List[maude.Sort]
+) -> List[maude.Term]:
+    args: List[maude.Term] = list(term.arguments())
+    for arg, expSort in zip(args, expSorts):
+        argSort = arg.getSort()
+        if argSort != expSort and not argSort.leq(expSort):
+            raise MaudeError(
+                "Unexpected Maude type when extracting "
+                + "head normal form result. "
+                + f"Found: '{arg.getSort()}', expected: '{expSort}'."
+            )
+    return args
+
+
+def extractTransData(
+    term: maude.Term, mod: maude.Module, expSorts: List[maude.Sort] | None = None
+) -> Tuple[int, str, str, str]:
+    if expSorts is None:
+        expSorts = getTransDataSorts(mod)
     printFormatCodes: List[int] = [
         maude.PRINT_NUMBER,
         maude.PRINT_MIXFIX,
         maude.PRINT_MIXFIX,
         maude.PRINT_MIXFIX,
     ]
-    args: List[str] = []
-    for i, arg in enumerate(term.arguments()):
-        argSort = arg.getSort()
-        if argSort != expSorts[i] and not argSort.leq(expSorts[i]):
-            raise MaudeError(
-                "Unexpected Maude type when extracting "
-                + "head normal form result. "
-                + f"Found: '{arg.getSort()}', expected: '{expSorts[i]}'."
-            )
-        args.append(arg.prettyPrint(printFormatCodes[i]))
+    args = [
+        arg.prettyPrint(printFormatCodes[i])
+        for i, arg in enumerate(checkTransDataArgs(term, expSorts))
+    ]
     return int(args[0]), args[1], args[2].strip('"'), args[3]
+
+
+def computeNeighbors(
+    mod: maude.Module,
+    dnkExpr: str,
+    prevTransType: str,
+    tdataSort: maude.Sort | None = None,
+    expSorts: List[maude.Sort] | None = None,
+) -> List[Tuple[str, str, str]]:
+    """Reduces the head normal form of the given DNK expression and returns
+    its neighbors as (transition type, transition label, DNK expression).
+    The sorts are looked up in the module if they are not given."""
+    hnfCall = MaudeEncoder.hnfCall(0, dnkExpr, prevTransType)
+    term: maude.Term | None = mod.parseTerm(hnfCall)
+    if term is None:
+        raise MaudeError(f"Failed to parse Maude term: {hnfCall}")
+    term.reduce()
+    if tdataSort is None:
+        tdataSort = getSort(mod, ms.TDATA)
+    if expSorts is None:
+        expSorts = getTransDataSorts(mod)
+    neighbors = extractListTerms(term, tdataSort)
+    result: List[Tuple[str, str, str]] = []
+    for n in neighbors:
+        (_, transType, transLabel, nextDnkExpr) = extractTransData(n, mod, expSorts)
+        result.append((transType, transLabel, nextDnkExpr))
+    return result
+
+
+class HNFTerms:
+    """Computes head normal forms on Maude terms, so the reached DNK
+    expressions are never printed and parsed back between steps. The sorts
+    and the hnf symbol are looked up once, and hnf calls are built directly
+    from the terms."""
+
+    def __init__(self, mod: maude.Module) -> None:
+        self.mod = mod
+        self._tdataSort = getSort(mod, ms.TDATA)
+        self._expSorts = getTransDataSorts(mod)
+        _, ttypeSort, _, dnkSort = self._expSorts
+        hnfSymbol: maude.Symbol | None = mod.findSymbol(
+            f"{mo.HNF}(_,_,_)",
+            [self._expSorts[0].kind(), ttypeSort.kind(), dnkSort.kind()],
+            self._tdataSort.kind(),
+        )
+        if hnfSymbol is None:
+            raise MaudeError(f"Could not find operator '{mo.HNF}' in the Maude module")
+        self._hnfSymbol = hnfSymbol
+        self._parentId = self.parse("0")
+        self._transTypes: dict[str, maude.Term] = {}
+
+    def parse(self, expr: str) -> maude.Term:
+        term: maude.Term | None = self.mod.parseTerm(expr)
+        if term is None:
+            raise MaudeError(f"Failed to parse Maude term: {expr}")
+        return term
+
+    def computeNeighbors(
+        self, dnkTerm: maude.Term, prevTransType: str
+    ) -> List[Tuple[str, str, maude.Term]]:
+        """Reduces the head normal form of the given DNK term and returns its
+        neighbors as (transition type, transition label, DNK term)."""
+        transTypeTerm = self._transTypes.get(prevTransType)
+        if transTypeTerm is None:
+            transTypeTerm = self.parse(prevTransType)
+            self._transTypes[prevTransType] = transTypeTerm
+        term = self._hnfSymbol.makeTerm([self._parentId, transTypeTerm, dnkTerm])
+        term.reduce()
+        result: List[Tuple[str, str, maude.Term]] = []
+        for n in extractListTerms(term, self._tdataSort):
+            _, transType, transLabel, nextDnkTerm = checkTransDataArgs(
+                n, self._expSorts
+            )
+            result.append(
+                (
+                    str(transType.symbol()),
+                    transLabel.prettyPrint(maude.PRINT_MIXFIX).strip('"'),
+                    nextDnkTerm,
+                )
+            )
+        return result
@@ -1,6 +1,27 @@
+import os
+import pickle
+import shutil
+import sys
+import tempfile
 from abc import ABC, abstractmethod
 from collections import deque
-from typing import List
+from collections.abc import Callable, Iterator
+from typing import List, cast
+
+# fraction of the memory budget of a spilling queue written to each segment
+_SEGMENT_BUDGET_FRACTION = 4
+# number of appended items whose size is measured to estimate the item size
+_SIZE_SAMPLES = 64
+
+
+def _itemSize(el: object) -> int:
+    """Approximate number of bytes held by a queue item. The objects it refers
+    to, e.g. trace nodes, are kept alive elsewhere, so only its numbers and
+    strings are counted, together with the tuples and lists holding them."""
+    size = sys.getsizeof(el)
+    if isinstance(el, (tuple, list)):
+        size += sum(_itemSize(v) for v in el if isinstance(v, (int, str, tuple, list)))
+    return size
 
 
 class WorkList[T](ABC):
@@ -16,6 +37,12 @@ class WorkList[T](ABC):
     @abstractmethod
     def isEmpty(self) -> bool: ...
 
+    @abstractmethod
+    def items(self) -> Iterator[T]:
+        """Yields the items in the order they were appended, so that appending
+        them to an empty work list of the same type restores this one. The work
+        list must not change while its items are iterated."""
+
 
 class Stack[T](WorkList[T]):
     def __init__(self) -> None:
@@ -33,6 +60,9 @@ class Stack[T](WorkList[T]):
     def isEmpty(self) -> bool:
         return not self.stack
 
+    def items(self) -> Iterator[T]:
+        return iter(self.stack)
+
 
 class Queue[T](WorkList[T]):
     def __init__(self) -> None:
@@ -49,3 +79,125 @@ class Queue[T](WorkList[T]):
 
     def isEmpty(self) -> bool:
         return not self.deq
+
+    def items(self) -> Iterator[T]:
+        return iter(self.deq)
+
+
+class SpillingQueue[T](WorkList[T]):
+    """Queue keeping its items in memory while their approximate size fits the
+    given budget. Beyond it, the items appended last are written to
+    append-only segment files in a temporary directory and read back in order,
+    once the items before them were popped. Appended items stay in memory again
+    once enough items were popped. A budget of 0 means that the queue never
+    spills to disk.
+
+    Items are converted with toDisk before being written and with fromDisk
+    once read back, e.g. to write the ids of the trace nodes, which are kept by
+    the trace tree anyway, instead of copies of the nodes."""
+
+    def __init__(self, maxSizeBytes: int, dirPath: str) -> None:
+        self.maxSizeBytes = maxSizeBytes
+        self.dirPath = dirPath
+        self.toDisk: Callable[[T], object] = lambda el: el
+        self.fromDisk: Callable[[object], T] = lambda el: cast(T, el)
+        self.__segmentsDir: str | None = None
+        self.__segments: deque[str] = deque()
+        self.__nextSegment = 0
+        # items popped first, then the segments and then the items of the tail
+        self.deq: deque[T] = deque()
+        self.__tail: List[T] = []
+        self.__length = 0
+        # approximate number of bytes of an item, the largest of the sampled ones
+        self.__itemSize = 0
+        self.__sampledItems = 0
+        # number of items written to disk since the last reset
+        self.spilledItems = 0
+
+    def pop(self) -> T:
+        if not self.deq:
+            if self.__segments:
+                self.deq = deque(self.__readSegment())
+            else:
+                self.deq = deque(self.__tail)
+                self.__tail = []
+        self.__length -= 1
+        el = self.deq.popleft()
+        if self.__length == 0:
+            self.__removeSegments()
+        return el
+
+    def reset(self) -> None:
+        self.__removeSegments()
+        self.deq = deque()
+        self.__tail = []
+        self.__length = 0
+        self.__itemSize = 0
+        self.__sampledItems = 0
+        self.spilledItems = 0
+
+    def append(self, el: T) -> None:
+        self.__length += 1
+        if self.maxSizeBytes > 0 and self.__sampledItems < _SIZE_SAMPLES:
+            self.__itemSize = max(self.__itemSize, _itemSize(el), 1)
+            self.__sampledItems += 1
+        if not self.__segments and not self.__tail and self.__fits(len(self.deq) + 1):
+            self.deq.append(el)
+            return
+        # kept in memory after the items on disk, until they exceed the budget
+        self.__tail.append(el)
+        segmentSize = self.maxSizeBytes // (_SEGMENT_BUDGET_FRACTION * self.__itemSize)
+        if len(self.__tail) >= max(1, segmentSize) and not self.__fits(
+            len(self.deq) + len(self.__tail)
+        ):
+            self.__writeSegment()
+
+    def isEmpty(self) -> bool:
+        return self.__length == 0
+
+    def items(self) -> Iterator[T]:
+        yield from self.deq
+        # one segment at a time is read back, so the walk stays within the budget
+        for filePath in self.__segments:
+            yield from self.__loadSegment(filePath)
+        yield from self.__tail
+
+    def __len__(self) -> int:
+        return self.__length
+
+    def __fits(self, itemCount: int) -> bool:
+        """Returns whether the given number of items held in memory fit the
+        budget"""
+        return (
+            self.maxSizeBytes <= 0 or itemCount * self.__itemSize <= self.maxSizeBytes
+        )
+
+    def __writeSegment(self) -> None:
+        if self.__segmentsDir is None:
+            os.makedirs(self.dirPath, exist_ok=True)
+            self.__segmentsDir = tempfile.mkdtemp(prefix="worklist_", dir=self.dirPath)
+        filePath = os.path.join(self.__segmentsDir, f"{self.__nextSegment}.pickle")
+        self.__nextSegment += 1
+        diskItems: List[object] = [self.toDisk(el) for el in self.__tail]
+        with open(filePath, "wb") as f:
+            pickle.dump(diskItems, f, pickle.HIGHEST_PROTOCOL)
+        self.__segments.append(filePath)
+        self.spilledItems += len(self.__tail)
+        self.__tail = []
+
+    def __readSegment(self) -> List[T]:
+        filePath = self.__segments.popleft()
+        items = self.__loadSegment(filePath)
+        os.remove(filePath)
+        return items
+
+    def __loadSegment(self, filePath: str) -> List[T]:
+        with open(filePath, "rb") as f:
+            diskItems: object = pickle.load(f)
+        return [self.fromDisk(el) for el in cast(List[object], diskItems)]
+
+    def __removeSegments(self) -> None:
+        if self.__segmentsDir is not None:
+            shutil.rmtree(self.__segmentsDir, ignore_errors=True)
+        self.__segmentsDir = None
+        self.__segments = deque()
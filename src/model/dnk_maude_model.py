@@ -40,6 +40,9 @@ class ElementMetadata:
     switchChannels: List[List[str]] = field(default_factory=list)
     link: str = _DEFAULT_LINK_VALUE
     initialFTs: List[str] = field(default_factory=list)
+    # flow tables every switch can hold: the initial one and the ones
+    # received through direct or requested updates
+    reachableFTs: List[List[str]] = field(default_factory=list)
 
     def findSwitchIndex(self, ch: str) -> int:
         """Returns the index of the switch that uses the given channel
@@ -266,12 +269,17 @@ class DNKMaudeModel(StatsGenerator):
                 )
                 for sw in net.Switches.values()
             ]
+            reachableFTs = [
+                self.__collectReachableFTs(sw, initialFT)
+                for sw, initialFT in zip(net.Switches.values(), initialFTs)
+            ]
             mdata = ElementMetadata(
                 elId,
                 ElementType.SW,
                 switchChannels=self._networkChannels[elId],
                 link=link,
                 initialFTs=initialFTs,
+                reachableFTs=reachableFTs,
             )
             elTerms.append(self.__buildBigSwitchTerm(net))
             self.elsMetadata.append(mdata)
@@ -282,6 +290,14 @@ class DNKMaudeModel(StatsGenerator):
             elId += 1
         self.elementTerms = elTerms
 
+    def __collectReachableFTs(self, sw: jm.DNKSwitch, initialFT: str) -> List[str]:
+        fts: dict[str, None] = {initialFT: None}
+        for du in sw.DirectUpdates:
+            fts[self.netkatRepl.restore(du.Policy)] = None
+        for ru in sw.RequestedUpdates:
+            fts[self.netkatRepl.restore(ru.ResponsePolicy)] = None
+        return list(fts.keys())
+
     def __addBranchCount(self, key: str, count: int) -> None:
         while key in self.branchCounts:
             key += "*"
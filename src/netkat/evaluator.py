@@ -0,0 +1,101 @@
+from itertools import product
+from math import prod
+from typing import FrozenSet, Iterator, List, Tuple
+
+from src.netkat.expr import (Assign, FieldTest, NetKATExpr, One, Seq, Star,
+                             Union, Zero)
+
+# value of a packet field standing for all values not used in the expression
+_OTHER_VALUE = -1
+
+type _Packet = Tuple[int, ...]
+
+
+class PacketSpaceTooLargeError(Exception):
+    pass
+
+
+def _collectFieldValues(expr: NetKATExpr, values: dict[str, set[int]]) -> None:
+    match expr:
+        case FieldTest(field, value) | Assign(field, value):
+            values.setdefault(field, set()).add(value)
+        case Union(parts) | Seq(parts):
+            for part in parts:
+                _collectFieldValues(part, values)
+        case Star(body):
+            _collectFieldValues(body, values)
+
+
+class _Evaluator:
+    """Computes the packets produced by an expression for a given input packet.
+
+    Every field only takes the values used in the expression, plus a single
+    value standing for all other ones. This is exact, since tests and
+    assignments cannot tell the other values apart.
+    """
+
+    def __init__(self, expr: NetKATExpr, maxPackets: int) -> None:
+        fieldValues: dict[str, set[int]] = {}
+        _collectFieldValues(expr, fieldValues)
+        self.fields = sorted(fieldValues.keys())
+        self.fieldPos = {field: i for i, field in enumerate(self.fields)}
+        self.domains: List[List[int]] = [
+            sorted(fieldValues[field]) + [_OTHER_VALUE] for field in self.fields
+        ]
+        if prod(len(domain) for domain in self.domains) > maxPackets:
+            raise PacketSpaceTooLargeError(
+                f"Expression uses more than {maxPackets} distinct packets"
+            )
+        self._memo: dict[Tuple[int, _Packet], FrozenSet[_Packet]] = {}
+
+    def packets(self) -> Iterator[_Packet]:
+        return product(*self.domains)
+
+    def eval(self, expr: NetKATExpr, pkt: _Packet) -> FrozenSet[_Packet]:
+        key = (id(expr), pkt)
+        res = self._memo.get(key)
+        if res is None:
+            res = self._eval(expr, pkt)
+            self._memo[key] = res
+        return res
+
+    def _eval(self, expr: NetKATExpr, pkt: _Packet) -> FrozenSet[_Packet]:
+        match expr:
+            case Zero():
+                return frozenset()
+            case One():
+                return frozenset([pkt])
+            case FieldTest(field, value, negated):
+                passes = (pkt[self.fieldPos[field]] == value) != negated
+                return frozenset([pkt]) if passes else frozenset()
+            case Assign(field, value):
+                i = self.fieldPos[field]
+                return frozenset([pkt[:i] + (value,) + pkt[i + 1 :]])
+            case Union(parts):
+                return frozenset().union(*(self.eval(part, pkt) for part in parts))
+            case Seq(parts):
+                curr = frozenset([pkt])
+                for part in parts:
+                    if not curr:
+                        break
+                    curr = frozenset().union(*(self.eval(part, p) for p in curr))
+                return curr
+            case Star(body):
+                reached = {pkt}
+                frontier = [pkt]
+                while frontier:
+                    p = frontier.pop()
+                    for q in self.eval(body, p):
+                        if q not in reached:
+                            reached.add(q)
+                            frontier.append(q)
+                return frozenset(reached)
+        raise TypeError(f"Unknown NetKAT expression: {expr}")
+
+
+def isEmpty(expr: NetKATExpr, maxPackets: int) -> bool:
+    """Whether the given expression drops every packet, i.e. is equivalent
+    to 'zero'. Raises PacketSpaceTooLargeError if the expression would
+    need to be evaluated for more than the given number of packets."""
+    evaluator = _Evaluator(expr, maxPackets)
+    return not any(evaluator.eval(expr, pkt) for pkt in evaluator.packets())
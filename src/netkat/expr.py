@@ -0,0 +1,45 @@
+from dataclasses import dataclass
+from typing import Tuple
+
+
+@dataclass(frozen=True)
+class Zero:
+    pass
+
+
+@dataclass(frozen=True)
+class One:
+    pass
+
+
+@dataclass(frozen=True)
+class FieldTest:
+    """Test of a packet field against a value, e.g. 'port = 1' or 'port != 1'"""
+
+    field: str
+    value: int
+    negated: bool = False
+
+
+@dataclass(frozen=True)
+class Assign:
+    field: str
+    value: int
+
+
+@dataclass(frozen=True)
+class Union:
+    parts: Tuple["NetKATExpr", ...]
+
+
+@dataclass(frozen=True)
+class Seq:
+    parts: Tuple["NetKATExpr", ...]
+
+
+@dataclass(frozen=True)
+class Star:
+    body: "NetKATExpr"
+
+
+type NetKATExpr = Zero | One | FieldTest | Assign | Union | Seq | Star
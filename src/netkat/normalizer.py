@@ -0,0 +1,117 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import List
+
+from src.netkat.expr import (Assign, FieldTest, NetKATExpr, One, Seq, Star,
+                             Union, Zero)
+from src.netkat.parser import NetKATParseError, parseNetKAT
+from src.util import DyNetKATSymbols as sym
+
+_NORMALIZE_CACHE_SIZE = 1 << 12
+_normalizeCache: OrderedDict[str, str] = OrderedDict()
+_normalizeCacheLock = Lock()
+
+
+def normalize(expr: NetKATExpr) -> NetKATExpr:
+    """Returns an equivalent expression in canonical form: nested unions and
+    sequences are flattened, union terms are deduplicated and sorted, and
+    the identities of 'zero' and 'one' are applied."""
+    match expr:
+        case Union(parts):
+            terms: dict[str, NetKATExpr] = {}
+            for part in _flatten(Union, parts):
+                if not isinstance(part, Zero):
+                    terms.setdefault(toNetKAT(part), part)
+            if not terms:
+                return Zero()
+            if len(terms) == 1:
+                return next(iter(terms.values()))
+            return Union(tuple(terms[key] for key in sorted(terms.keys())))
+        case Seq(parts):
+            factors: List[NetKATExpr] = []
+            for part in _flatten(Seq, parts):
+                if isinstance(part, Zero):
+                    return Zero()
+                if isinstance(part, One):
+                    continue
+                # tests are idempotent
+                if isinstance(part, FieldTest) and factors and factors[-1] == part:
+                    continue
+                factors.append(part)
+            if not factors:
+                return One()
+            if len(factors) == 1:
+                return factors[0]
+            return Seq(tuple(factors))
+        case Star(body):
+            body = normalize(body)
+            if isinstance(body, (Zero, One)):
+                return One()
+            if isinstance(body, Star):
+                return body
+            return Star(body)
+    return expr
+
+
+def _flatten(
+    kind: type[Union] | type[Seq], parts: tuple[NetKATExpr, ...]
+) -> List[NetKATExpr]:
+    flat: List[NetKATExpr] = []
+    for part in parts:
+        part = normalize(part)
+        if isinstance(part, kind):
+            flat.extend(part.parts)
+            continue
+        flat.append(part)
+    return flat
+
+
+def toNetKAT(expr: NetKATExpr) -> str:
+    """Returns the given expression in NetKAT syntax, using
+    as few parentheses as possible."""
+    match expr:
+        case Zero():
+            return sym.ZERO.value
+        case One():
+            return sym.ONE.value
+        case FieldTest(field, value, negated):
+            op = sym.NOT_EQUAL if negated else sym.EQUAL
+            return f"{field} {op} {value}"
+        case Assign(field, value):
+            return f"{field} {sym.ASSIGN} {value}"
+        case Union(parts):
+            return f" {sym.OR} ".join(toNetKAT(part) for part in parts)
+        case Seq(parts):
+            return f" {sym.AND} ".join(
+                f"({toNetKAT(part)})" if isinstance(part, Union) else toNetKAT(part)
+                for part in parts
+            )
+        case Star(body):
+            if isinstance(body, (Union, Seq, FieldTest, Assign)):
+                return f"({toNetKAT(body)}){sym.STAR}"
+            return f"{toNetKAT(body)}{sym.STAR}"
+    raise TypeError(f"Unknown NetKAT expression: {expr}")
+
+
+def normalizeNetKAT(s: str) -> str:
+    """Returns the canonical form of the given NetKAT expression, or the
+    expression itself if it uses syntax that is not supported by the parser.
+    The most recently used results are cached."""
+    with _normalizeCacheLock:
+        cached = _normalizeCache.get(s)
+        if cached is not None:
+            _normalizeCache.move_to_end(s)
+            return cached
+    result = _normalize(s)
+    with _normalizeCacheLock:
+        _normalizeCache[s] = result
+        if len(_normalizeCache) > _NORMALIZE_CACHE_SIZE:
+            _normalizeCache.popitem(last=False)
+    return result
+
+
+def _normalize(s: str) -> str:
+    try:
+        return toNetKAT(normalize(parseNetKAT(s)))
+    except NetKATParseError:
+        return s
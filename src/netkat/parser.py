@@ -0,0 +1,119 @@
+import re
+from typing import List
+
+from src.netkat.expr import (Assign, FieldTest, NetKATExpr, One, Seq, Star,
+                             Union, Zero)
+from src.util import DyNetKATSymbols as sym
+
+# NKPL symbols accepted next to their NetKAT equivalents
+_NKPL_ALIASES = {
+    b"\xe2\x86\x90".decode(): sym.ASSIGN,  # ←
+    b"\xe2\x8b\x86".decode(): sym.STAR,  # ⋆
+    b"\xe2\x8a\xa5".decode(): sym.ZERO,  # ⊥
+    b"\xe2\x8a\xa4".decode(): sym.ONE,  # ⊤
+    b"\xe2\x8b\x85".decode(): sym.AND,  # ⋅
+    b"\xe2\x89\xa0".decode(): sym.NOT_EQUAL,  # ≠
+}
+_TOKEN_REGEX = re.compile(
+    r'\s+|"|(<-|!=|[=+.*()]|\w+|' + "|".join(_NKPL_ALIASES.keys()) + r")"
+)
+_FIELD_REGEX = re.compile(r"[a-zA-Z_]\w*")
+
+
+class NetKATParseError(Exception):
+    pass
+
+
+def _tokenize(s: str) -> List[str]:
+    tokens: List[str] = []
+    pos = 0
+    while pos < len(s):
+        match = _TOKEN_REGEX.match(s, pos)
+        if match is None:
+            raise NetKATParseError(f"Unexpected character '{s[pos]}' at {pos}")
+        token = match.group(1)
+        if token is not None:
+            tokens.append(_NKPL_ALIASES.get(token, token))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive descent parser for NetKAT expressions without 'dup'.
+    From lowest to highest precedence: '+', '.', '*'."""
+
+    def __init__(self, tokens: List[str]) -> None:
+        self.tokens = tokens
+        self.pos = 0
+
+    def _peek(self) -> str | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _next(self) -> str:
+        token = self._peek()
+        if token is None:
+            raise NetKATParseError("Unexpected end of expression")
+        self.pos += 1
+        return token
+
+    def parse(self) -> NetKATExpr:
+        expr = self._union()
+        if self._peek() is not None:
+            raise NetKATParseError(f"Unexpected token '{self._peek()}'")
+        return expr
+
+    def _union(self) -> NetKATExpr:
+        parts = [self._seq()]
+        while self._peek() == sym.OR:
+            self._next()
+            parts.append(self._seq())
+        return parts[0] if len(parts) == 1 else Union(tuple(parts))
+
+    def _seq(self) -> NetKATExpr:
+        parts = [self._star()]
+        while self._peek() == sym.AND:
+            self._next()
+            parts.append(self._star())
+        return parts[0] if len(parts) == 1 else Seq(tuple(parts))
+
+    def _star(self) -> NetKATExpr:
+        expr = self._atom()
+        while self._peek() == sym.STAR:
+            self._next()
+            expr = Star(expr)
+        return expr
+
+    def _atom(self) -> NetKATExpr:
+        token = self._next()
+        if token == "(":
+            expr = self._union()
+            if self._next() != ")":
+                raise NetKATParseError("Expected ')'")
+            return expr
+        if token == sym.ZERO:
+            return Zero()
+        if token == sym.ONE:
+            return One()
+        if _FIELD_REGEX.fullmatch(token) is None:
+            raise NetKATParseError(f"Expected a packet field, got '{token}'")
+        op = self._next()
+        value = self._value()
+        if op == sym.EQUAL:
+            return FieldTest(token, value)
+        if op == sym.NOT_EQUAL:
+            return FieldTest(token, value, negated=True)
+        if op == sym.ASSIGN:
+            return Assign(token, value)
+        raise NetKATParseError(f"Unknown operator '{op}'")
+
+    def _value(self) -> int:
+        token = self._next()
+        if not token.isdigit():
+            raise NetKATParseError(f"Expected a numeric value, got '{token}'")
+        return int(token)
+
+
+def parseNetKAT(s: str) -> NetKATExpr:
+    """Parses the given NetKAT expression.
+    Raises NetKATParseError if the expression uses any unsupported syntax."""
+    return _Parser(_tokenize(s)).parse()
@@ -7,9 +7,16 @@ from src.trace.transition import ITransition, newTraceTransition
 class TraceNode:
     __nextId = 0
 
-    def __init__(self, trans: ITransition, vectorClocks: List[List[int]]) -> None:
-        self.__id = TraceNode.__nextId
-        TraceNode.__nextId += 1
+    def __init__(
+        self,
+        trans: ITransition,
+        vectorClocks: List[List[int]],
+        nodeId: int | None = None,
+    ) -> None:
+        """The node gets a new id, unless one returned by 'newId' is given"""
+        if nodeId is None:
+            nodeId = TraceNode.newId()
+        self.__id = nodeId
         self.__trans = trans
         self.__vectorClocks = vectorClocks
         # ids of other nodes having transitions racing with this node's transition
@@ -19,6 +26,24 @@ class TraceNode:
     def id(self) -> int:
         return self.__id
 
+    @classmethod
+    def nextId(cls) -> int:
+        """Returns the id of the next node to be created"""
+        return cls.__nextId
+
+    @classmethod
+    def newId(cls) -> int:
+        """Returns a new node id, e.g. for a node that is only created later"""
+        nodeId = cls.__nextId
+        cls.__nextId += 1
+        return nodeId
+
+    @classmethod
+    def reserveIds(cls, nextId: int) -> None:
+        """Makes the ids of the nodes created from now on start from at least
+        the given id, e.g. after loading nodes created by another process"""
+        cls.__nextId = max(cls.__nextId, nextId)
+
     @property
     def trans(self) -> ITransition:
         return self.__trans
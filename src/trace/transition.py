@@ -1,7 +1,7 @@
 import re
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import List, Self
+from typing import List, Self, Set
 
 from src.errors import ParseError
 from src.model.dnk_maude_model import ElementMetadata
@@ -24,6 +24,11 @@ class ITransition(ABC):
     @abstractmethod
     def getSource(self) -> int | None: ...
 
+    @abstractmethod
+    def getElements(self) -> Set[int]:
+        """Positions of all elements taking part in this transition"""
+        ...
+
     @abstractmethod
     def updateVC(self, vc: List[List[int]]) -> List[List[int]]: ...
 
@@ -42,6 +47,9 @@ class TraceTransition(ITransition):
     def getSource(self) -> int | None:
         return None
 
+    def getElements(self) -> Set[int]:
+        return set()
+
     def updateVC(self, vcs: List[List[int]]) -> List[List[int]]:
         return vcs
 
@@ -62,6 +70,9 @@ class PktProcTrans(ITransition):
     def getSource(self) -> int | None:
         return self.swPos
 
+    def getElements(self) -> Set[int]:
+        return {self.swPos}
+
     @classmethod
     def fromStr(cls, s: str) -> Self:
         res = re.search(r"proc\('([^']*)',([0-9]+)\)", s)
@@ -93,6 +104,9 @@ class RcfgTrans(ITransition):
     def getSource(self) -> int | None:
         return self.srcPos
 
+    def getElements(self) -> Set[int]:
+        return {self.srcPos, self.dstPos}
+
     @classmethod
     def fromStr(cls, s: str) -> Self:
         res = re.search(r"rcfg\(([^,]*), '([^']*)', ([0-9]+), ([0-9]+)\)", s)
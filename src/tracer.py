@@ -1,20 +1,29 @@
 import os
-from typing import List
+import threading
+import time
+from typing import List, Tuple
 
 from src.analyzer.harmful_trace import RaceType
+from src.analyzer.trace_stream import TraceStream, TraceStreamClosedError
 from src.analyzer.traces_analyzer import TracesAnalyzer
+from src.generator.checkpoint import Checkpoint
+from src.generator.frontier import Frontier
 from src.generator.trace_generator_factory import (TraceGenOption,
                                                    newTraceGenerator)
 from src.generator.trace_tree import TraceTree
 from src.KATch_comm import KATchComm
+from src.KATch_verdict_store import KATchVerdictStore, katchHash
 from src.model.dnk_maude_model import DNKMaudeModel
 from src.stats import StatsEntry
+from src.trace.node import TraceNode
 from src.tracer_config import TracerConfig
 from src.util import createDir, exportFile
 
 _TRACES_FILE_NAME = "traces"
 _HARMFUL_TRACES_DIR_NAME = "harmful_traces"
 _HARMFUL_TRACES_RAW_DIR_NAME = "harmful_traces_raw"
+# maximum number of generated traces waiting for the analysis when streaming
+_STREAM_QUEUE_SIZE = 1024
 
 
 class Tracer:
@@ -30,6 +39,12 @@ class Tracer:
         self.safetyProps = safetyProps
         self._traceGen = newTraceGenerator(genStrategy, config)
         self._traceTree: TraceTree = TraceTree(self.dnkModel)
+        # wall time of the overlapping generation and analysis when streaming
+        self._streamExecTime: float | None = None
+        # first node and position of the traces analyzed by 'analyzeTraces'
+        self._analysisStart: Tuple[int, int] = (0, 0)
+        # whether the traces of the trace tree were analyzed
+        self._analyzed = False
         self._initTraceAnalyzer()
 
     def _initTraceAnalyzer(self) -> None:
@@ -39,20 +54,144 @@ class Tracer:
         outputDirDOT = os.path.join(self.config.outputDirPath, _HARMFUL_TRACES_DIR_NAME)
         createDir(outputDirRaw)
         createDir(outputDirDOT)
-        self._katchComm = KATchComm(self.config.katchPath, self.config.outputDirPath)
+        verdictStore = None
+        if self.config.katchCacheDirPath is not None:
+            verdictStore = KATchVerdictStore(
+                self.config.katchCacheDirPath,
+                katchHash(self.config.katchPath),
+                self.config.katchCacheSizeMB,
+            )
+        self._katchComm = KATchComm(
+            self.config.katchPath,
+            self.config.outputDirPath,
+            self.config.katchSessionPath,
+            self.config.katchWorkers,
+            verdictStore,
+            timeout=(
+                self.config.katchTimeout if self.config.katchTimeout > 0 else None
+            ),
+        )
         self._traceAnalyzer = TracesAnalyzer(
-            self._katchComm, self.safetyProps, outputDirRaw, outputDirDOT
+            self._katchComm,
+            self.safetyProps,
+            outputDirRaw,
+            outputDirDOT,
+            self.config.katchWorkers,
+            self.config.precomputeLimit,
+            self.config.maxHarmfulRaces,
         )
 
     def generateTraces(self, depth: int) -> bool:
+        self._traceAnalyzer.startTime = time.perf_counter()
         self._traceTree = self._traceGen.run(self.dnkModel, depth)
+        self._analysisStart = (0, 0)
+        self._analyzed = False
+        self._traceAnalyzer.reportedRaces = set()
 
         if self._traceTree.traceCount() == 0:
             return False
         return True
 
+    def extendTraces(self, depth: int, frontier: Frontier | None = None) -> bool:
+        """Extends the traces of the given frontier, by default the one of the
+        last generation, to the given depth. If the traces of the frontier were
+        analyzed, 'analyzeTraces' then only analyzes the extended traces, checking
+        only races involving their new nodes."""
+        if frontier is None:
+            frontier = self.getFrontier()
+        self._traceAnalyzer.startTime = time.perf_counter()
+        fromNode = frontier.traceTree.nodeCount()
+        self._traceTree = self._traceGen.extend(self.dnkModel, frontier, depth)
+        self._analysisStart = (0, 0)
+        self._traceAnalyzer.reportedRaces = set()
+        if frontier.analyzed:
+            self._analysisStart = (fromNode, frontier.depth + 1)
+            self._traceAnalyzer.reportedRaces = set(frontier.reportedRaces)
+        self._analyzed = False
+
+        if self._traceTree.traceCount() == 0:
+            return False
+        return True
+
+    def resumeTraces(self, checkpoint: Checkpoint) -> bool:
+        """Resumes the trace generation saved in the given checkpoint"""
+        self._traceAnalyzer.startTime = time.perf_counter()
+        self._traceTree = self._traceGen.resume(self.dnkModel, checkpoint)
+        self._analysisStart = (0, 0)
+        self._analyzed = False
+        self._traceAnalyzer.reportedRaces = set()
+
+        if self._traceTree.traceCount() == 0:
+            return False
+        return True
+
+    def getFrontier(self) -> Frontier:
+        """Returns the frontier of the last generation, to extend its traces"""
+        frontier = self._traceGen.getFrontier()
+        frontier.analyzed = self._analyzed
+        if self._analyzed:
+            frontier.reportedRaces = set(self._traceAnalyzer.reportedRaces)
+        return frontier
+
     def analyzeTraces(self) -> None:
-        self._traceAnalyzer.run(self._traceTree, self.dnkModel.getElementsMetadata())
+        fromNode, fromPos = self._analysisStart
+        try:
+            self._traceAnalyzer.run(
+                self._traceTree.getTraceIterator(fromNode),
+                self.dnkModel.getElementsMetadata(),
+                fromPos,
+            )
+            self._analyzed = True
+        finally:
+            self._katchComm.close()
+            self._katchComm.writeLatencyReport(self.config.outputDirPath)
+
+    def generateAndAnalyzeTraces(self, depth: int) -> bool:
+        """Generates the traces and analyzes them at the same time. The generated
+        traces are streamed through a bounded queue to the analyzer running in
+        another thread, and the generator releases the trace nodes once all the
+        traces going through them were handed out. Once the analyzer stops, e.g.
+        after the configured number of harmful races, the generation stops too."""
+        startTime = time.perf_counter()
+        self._traceAnalyzer.startTime = startTime
+        self._traceAnalyzer.reportedRaces = set()
+        stream = TraceStream(_STREAM_QUEUE_SIZE)
+        errors: List[BaseException] = []
+
+        def analyze() -> None:
+            try:
+                self._traceAnalyzer.run(stream, self.dnkModel.getElementsMetadata())
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                stream.stopConsuming()
+
+        def onTrace(trace: List[TraceNode]) -> None:
+            try:
+                stream.put(trace)
+            except TraceStreamClosedError:
+                # the analysis ended, the traces generated so far are kept
+                self._traceGen.requestStop()
+
+        analyzer = threading.Thread(target=analyze, name="trace-analyzer")
+        analyzer.start()
+        try:
+            self._traceTree = self._traceGen.run(self.dnkModel, depth, onTrace)
+        finally:
+            stream.close()
+            analyzer.join()
+            self._katchComm.close()
+            self._katchComm.writeLatencyReport(self.config.outputDirPath)
+            self._streamExecTime = time.perf_counter() - startTime
+        if errors:
+            raise errors[0]
+        self._analysisStart = (0, 0)
+        self._analyzed = True
+        return self._traceTree.traceCount() > 0
+
+    def close(self) -> None:
+        """Stops the KATch workers and sessions, e.g. after a failed run."""
+        self._katchComm.close()
 
     def getTraceGenerationStats(self) -> List[StatsEntry]:
         return self._traceGen.getStats()
@@ -61,6 +200,8 @@ class Tracer:
         return self._katchComm.getStats() + self._traceAnalyzer.getStats()
 
     def getTotalExecTime(self) -> float:
+        if self._streamExecTime is not None:
+            return self._streamExecTime
         return (
             self._traceGen.getWrapperTotalExecTime()
             + self._traceAnalyzer.getWrapperTotalExecTime()
@@ -9,3 +9,21 @@ class TracerConfig:
     threads: int
     verbose: bool
     inputFileName: str
+    katchSessionPath: str | None = None
+    katchWorkers: int = 1
+    katchCacheDirPath: str | None = None
+    katchCacheSizeMB: int = 256
+    katchTimeout: int = 0
+    precomputeLimit: int = 0
+    stateGraph: bool = False
+    partialOrderReduction: bool = False
+    genCacheSizeMB: int = 0
+    genCacheDirPath: str | None = None
+    streamTraces: bool = False
+    pbfsChunkSize: int = 0
+    frontierMemoryMB: int = 0
+    checkpointInterval: int = 0
+    maxHarmfulRaces: int = 0
+    maxNodes: int = 0
+    maxMemoryMB: int = 0
+    timeBudget: int = 0
@@ -1,10 +1,13 @@
+import itertools
 import os
+import signal
 import subprocess
 import time
 from enum import StrEnum
 from typing import List, Tuple
 
 TMP_FILE_NAME = "_tmp"
+_tmpFileCounter = itertools.count()
 
 
 class DyNetKATSymbols(StrEnum):
@@ -32,21 +35,55 @@ def getTempFilePath(dirPath: str, ext: str) -> str:
     """
 
     currTimeMili = int(round(time.time() * 1000))
-    return os.path.join(dirPath, "{}{}.{}".format(TMP_FILE_NAME, currTimeMili, ext))
+    # the counter keeps paths unique for files created within the same millisecond,
+    # e.g. by multiple threads
+    return os.path.join(
+        dirPath,
+        "{}{}_{}.{}".format(TMP_FILE_NAME, currTimeMili, next(_tmpFileCounter), ext),
+    )
 
 
 def executeCmd(cmd: list[str]) -> Tuple[str, str | None]:
     """Executes a given system command and returns the obtained output."""
-    proc = subprocess.run(
+    return waitCmd(startCmd(cmd))
+
+
+def startCmd(cmd: list[str]) -> subprocess.Popen[bytes]:
+    """Starts the given system command without waiting for it to finish.
+    The command runs in its own process group, see 'killCmd'."""
+    return subprocess.Popen(
         cmd,
         stdin=subprocess.PIPE,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
         shell=False,
+        process_group=0,
     )
 
-    error = proc.stderr.decode("utf-8")
-    return proc.stdout.decode("utf-8"), error if error != "" else None
+
+def killCmd(proc: subprocess.Popen[bytes]) -> None:
+    """Kills the process group of the given command, so that the processes
+    started by a wrapper script are killed as well."""
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def waitCmd(
+    proc: subprocess.Popen[bytes], timeout: float | None = None
+) -> Tuple[str, str | None]:
+    """Waits for the given command to finish and returns the obtained output.
+    Raises subprocess.TimeoutExpired if the command did not finish within
+    'timeout' seconds, after killing it."""
+    try:
+        stdout, stderr = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        killCmd(proc)
+        proc.communicate()
+        raise
+    error = stderr.decode("utf-8")
+    return stdout.decode("utf-8"), error if error != "" else None
 
 
 def removeFile(filePath: str) -> None:
@@ -115,5 +152,13 @@ def uniformSplit[T](li: List[T], parts: int) -> List[List[T]]:
     return splitList
 
 
+def chunkSplit[T](li: List[T], chunkSize: int) -> List[List[T]]:
+    """Splits the given list into sublists of 'chunkSize' elements,
+    except for the last one which may be shorter"""
+    if chunkSize < 1:
+        return [li]
+    return [li[i : i + chunkSize] for i in range(0, len(li), chunkSize)]
+
+
 def indexInBounds(index: int, arrayLength: int) -> bool:
     return 0 <= index and index < arrayLength
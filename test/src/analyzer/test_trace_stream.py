@@ -0,0 +1,44 @@
+import threading
+
+import pytest
+
+from src.analyzer.trace_stream import TraceStream, TraceStreamClosedError
+from src.trace.node import TraceNode
+from src.trace.vector_clocks import newVectorClocks
+
+
+def _trace():
+    return [TraceNode.fromTuple(("", newVectorClocks(1)))]
+
+
+def test_traceStream_hands_traces_to_consumer_thread():
+    stream = TraceStream(1)
+    traces = [_trace() for _ in range(5)]
+    consumed = []
+    consumer = threading.Thread(target=lambda: consumed.extend(stream))
+    consumer.start()
+    for trace in traces:
+        stream.put(trace)
+    stream.close()
+    consumer.join()
+
+    assert consumed == traces, "Expected the traces in the order they were added"
+
+
+def test_traceStream_put_fails_once_consumer_stopped():
+    stream = TraceStream(1)
+    stream.put(_trace())
+    stream.stopConsuming()
+
+    with pytest.raises(TraceStreamClosedError):
+        stream.put(_trace())
+    stream.close()
+
+
+def test_traceStream_stays_exhausted_after_its_end():
+    stream = TraceStream(2)
+    stream.put(_trace())
+    stream.close()
+
+    assert len(list(stream)) == 1, "Expected the added trace"
+    assert next(stream, None) is None, "Expected reads past the end not to block"
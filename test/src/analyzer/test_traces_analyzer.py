@@ -0,0 +1,67 @@
+from test.src.analyzer.test_utils.util import raceSafetyDict
+
+from src.analyzer.trace_analyzer import TraceAnalyzer
+from src.analyzer.traces_analyzer import TracesAnalyzer, _AnalyzedPrefix
+from src.trace.node import TraceNode
+from src.trace.transition import TraceTransition
+
+pytest_plugins = [
+    "test.src.test_utils.fixtures",
+    "test.src.analyzer.test_utils.fixtures",
+]
+
+
+def _nodes(count: int):
+    return [TraceNode(TraceTransition(), []) for _ in range(count)]
+
+
+def test_analyzedPrefix_shares_the_common_nodes_of_consecutive_traces():
+    prefix = _AnalyzedPrefix()
+    shared, first, second = _nodes(3), _nodes(2), _nodes(1)
+    prefix.update(shared + first, None)
+
+    assert (
+        prefix.sharedLength(shared + second) == 3
+    ), "Expected only the nodes of the new branch to be checked"
+    assert (
+        prefix.sharedLength(shared[:2]) == 2
+    ), "Expected a shorter trace to be fully shared"
+    assert prefix.sharedLength(_nodes(3)) == 0, "Expected nodes to be compared by id"
+
+
+def test_analyzedPrefix_empty_shares_nothing():
+    assert _AnalyzedPrefix().sharedLength(_nodes(2)) == 0, "Expected no shared nodes"
+
+
+def test_run_with_prefetching_walks_every_trace_once(
+    monkeypatch,
+    tmp_path,
+    katchWithWorkers,
+    trace_1SW_1CT_harmful_CT_SW_race,
+    trace_1SW_1CT_unharmful_CT_SW_race,
+    trace_1SW_1CT_harmful_CT_SW_race2,
+):
+    tds = [
+        trace_1SW_1CT_harmful_CT_SW_race,
+        trace_1SW_1CT_unharmful_CT_SW_race,
+        trace_1SW_1CT_harmful_CT_SW_race2,
+    ]
+    walked = []
+    candidateRaces = TraceAnalyzer.candidateRaces
+
+    def countingCandidateRaces(self, trace, fromPos=0):
+        walked.append(trace)
+        return candidateRaces(self, trace, fromPos)
+
+    monkeypatch.setattr(TraceAnalyzer, "candidateRaces", countingCandidateRaces)
+    analyzer = TracesAnalyzer(
+        katchWithWorkers,
+        raceSafetyDict(tds[0].safetyProp),
+        str(tmp_path),
+        str(tmp_path),
+        katchWorkers=4,
+    )
+    analyzer.run(iter([td.trace for td in tds]), tds[0].metadata)
+
+    assert analyzer.harmfulRacesCount == 2, "Expected both harmful races"
+    assert len(walked) == len(tds), "Expected every trace to be walked once"
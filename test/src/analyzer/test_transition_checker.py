@@ -1,9 +1,10 @@
-from test.src.analyzer.test_utils.util import raceSafetyDict
+from test.src.analyzer.test_utils.util import Metadata, raceSafetyDict
 from typing import List
 
 import pytest
 
 from src.analyzer.trace_analyzer import RaceType
+from src.analyzer.util import NetworkFTs, buildNetworkPolicy
 from src.analyzer.transition_checker import (TransCheckResult,
                                              TransitionsChecker,
                                              elementIsActiveInBetween,
@@ -608,3 +609,84 @@ def test_check_all_races_skipped_returns_none(katch, metadata2SW2CT, safetyProp1
         f"{RaceType.CT_SW}: 1 times\n"
         f"{RaceType.CT_CT_SW}: 1 times"
     )
+
+
+def test_checkNetworks_same_flow_tables_reuse_verdict(
+    monkeypatch, katch, metadata2SW2CT, safetyProp1
+):
+    checked: List[str] = []
+
+    def checkProperties(_prop: str, policies: List[str]) -> List[bool]:
+        checked.extend(policies)
+        return [True for _ in policies]
+
+    monkeypatch.setattr(katch, "checkProperties", checkProperties)
+    props = raceSafetyDict(safetyProp1.prop)
+    tc = TransitionsChecker(katch, props, metadata2SW2CT.elements)
+    frs = safetyProp1.passingFlowRules
+    net1 = NetworkFTs(_SW1, (frs[0], frs[1]))
+    net2 = NetworkFTs(_SW1, (frs[0], frs[2]))
+
+    tc.checkNetworks(RaceType.CT_SW_CT, [net1, net2])
+    result = tc.checkNetworks(RaceType.CT_SW_CT, [NetworkFTs(_SW1, (frs[0], frs[1]))])
+
+    assert result == [True], f"Unexpected results: {result}"
+    assert checked == [
+        tc.networkPolicy(net1),
+        tc.networkPolicy(net2),
+    ], f"Expected every network to be checked once, got {checked}"
+
+
+def test_networkPolicy_matches_buildNetworkPolicy(katch, metadata2SW2CT, safetyProp1):
+    props = raceSafetyDict(safetyProp1.prop)
+    tc = TransitionsChecker(katch, props, metadata2SW2CT.elements)
+    fts = safetyProp1.passingFlowRules[:2]
+    expected = buildNetworkPolicy(fts, metadata2SW2CT.elements[_SW1].link)
+    assert tc.networkPolicy(NetworkFTs(_SW1, tuple(fts))) == expected
+
+
+def test_precomputeNetworks_checks_all_reachable_networks_once(
+    monkeypatch, katch, safetyProp1
+):
+    checked: List[str] = []
+
+    def checkProperties(_prop: str, policies: List[str]) -> List[bool]:
+        checked.extend(policies)
+        return [True for _ in policies]
+
+    monkeypatch.setattr(katch, "checkProperties", checkProperties)
+    frs = safetyProp1.passingFlowRules
+    metadata = (
+        Metadata()
+        .addBigSw(
+            [["ch1"], ["ch2"]],
+            [frs[0], frs[1]],
+            [[frs[0], frs[2]], [frs[1], frs[3]]],
+        )
+        .addCt()
+        .addCt()
+    )
+    props = {RaceType.CT_SW_CT: safetyProp1.prop}
+    tc = TransitionsChecker(katch, props, metadata.elements)
+
+    count = tc.precomputeNetworks(4)
+    assert count == 4, f"Expected 4 precomputed verdicts, got {count}"
+    assert len(checked) == 4, f"Expected 4 checked networks, got {len(checked)}"
+
+    t1 = RcfgTrans(frs[2], 1, 0, "ch1")
+    t2 = RcfgTrans(frs[0], 2, 0, "ch1")
+    result = tc.check(_makeTrace(t1, t2), 0, 1)
+    assert result is None, "Expected no race for networks with the same verdict"
+    assert len(checked) == 4, "Expected precomputed verdicts to be reused"
+
+
+def test_precomputeNetworks_too_many_networks_skips_element(katch, safetyProp1):
+    frs = safetyProp1.passingFlowRules
+    metadata = (
+        Metadata()
+        .addBigSw([["ch1"]], [frs[0]], [[frs[0], frs[1], frs[2]]])
+        .addCt()
+    )
+    props = {RaceType.CT_SW_CT: safetyProp1.prop}
+    tc = TransitionsChecker(katch, props, metadata.elements)
+    assert tc.precomputeNetworks(2) == 0, "Expected no precomputed verdicts"
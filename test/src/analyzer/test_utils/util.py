@@ -40,6 +40,7 @@ class Metadata:
         self,
         channels: List[List[str]] | None = None,
         initialFts: List[str] | None = None,
+        reachableFts: List[List[str]] | None = None,
     ) -> Self:
         """Channels: List of channels for every inner switch.
         Must not repeat between the inner switches!"""
@@ -48,6 +49,7 @@ class Metadata:
             pType=ElementType.SW,
             switchChannels=channels or [],
             initialFTs=initialFts or [sym.ZERO for _chs in channels],
+            reachableFTs=reachableFts or [],
         )
         self.elements.append(metadata)
         return self
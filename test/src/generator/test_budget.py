@@ -0,0 +1,67 @@
+from test.src.test_utils.util import traceLabels
+
+import pytest
+
+from src.generator.budget import BudgetKind, GenerationBudget, LevelProgress
+from src.generator.trace_generator_factory import TraceGenOption, newTraceGenerator
+
+pytest_plugins = [
+    "test.src.test_utils.fixtures",
+]
+
+
+def test_generationBudget_without_limits_is_never_exceeded():
+    budget = GenerationBudget(0, 0, 0)
+    budget.start()
+    assert budget.exceeded(10**9) is None, "Expected no budget to be exceeded"
+
+
+def test_generationBudget_node_limit_is_exceeded_once_reached():
+    budget = GenerationBudget(10, 0, 0)
+    budget.start()
+    assert budget.exceeded(9) is None, "Expected the node budget to be respected"
+    assert budget.exceeded(10) == BudgetKind.NODES, "Expected the node budget hit"
+
+
+def test_generationBudget_memory_limit_is_exceeded_by_process():
+    budget = GenerationBudget(0, 1, 0)
+    budget.start()
+    assert budget.exceeded(0) == BudgetKind.MEMORY, "Expected the memory budget hit"
+
+
+def test_levelProgress_completion_of_stopped_generation():
+    levels = LevelProgress()
+    levels.addExpanded(0)
+    levels.addExpanded(1, 3)
+    levels.addRemaining(1)
+    levels.addRemaining(2, 4)
+
+    assert levels.completion(4, True) == [
+        1.0,
+        0.75,
+        0.0,
+        0.0,
+    ], "Expected unreached levels to be incomplete"
+    assert levels.completion(4, False)[3] == 1.0, "Expected empty levels complete"
+
+
+@pytest.mark.parametrize(
+    "option", [TraceGenOption.DFS, TraceGenOption.BFS, TraceGenOption.PBFS]
+)
+def test_nodeBudget_stops_generation_with_partial_tree(
+    firewallModel, newConfig, option
+):
+    allTraces = traceLabels(
+        newTraceGenerator(TraceGenOption.BFS, newConfig()).run(firewallModel, 5)
+    )
+    config = newConfig(2 if option == TraceGenOption.PBFS else 1, maxNodes=20)
+    generator = newTraceGenerator(option, config)
+    traces = traceLabels(generator.run(firewallModel, 5))
+    completion = generator.levels.completion(5, True)
+
+    assert generator.budgetHit == "nodes", "Expected the node budget to be hit"
+    assert 0 < len(traces) < len(allTraces), "Expected a partial trace tree"
+    assert all(
+        any(full[: len(trace)] == trace for full in allTraces) for trace in traces
+    ), "Expected the partial traces to be prefixes of the full ones"
+    assert completion[0] == 1.0 and completion[-1] < 1.0, "Expected partial levels"
@@ -0,0 +1,146 @@
+import os
+from itertools import count
+from test.src.test_utils.util import traceLabels
+
+import pytest
+
+import src.generator.trace_generator as trace_generator
+from src.generator.checkpoint import (
+    Checkpoint,
+    CheckpointError,
+    checkpointPath,
+    loadCheckpoint,
+)
+from src.generator.sequential_trace_generator import SequentialTraceGenerator
+from src.generator.trace_generator_factory import TraceGenOption, newTraceGenerator
+from src.generator.trace_tree import PendingNode, TraceTree
+from src.generator.worklist import SpillingQueue
+
+pytest_plugins = [
+    "test.src.test_utils.fixtures",
+]
+
+# number of expanded nodes after which the interrupted generation crashes
+_CRASH_AFTER = 12
+
+
+class _Crash(Exception):
+    pass
+
+
+@pytest.mark.parametrize(
+    "option,threads",
+    [(TraceGenOption.DFS, 1), (TraceGenOption.BFS, 1), (TraceGenOption.BFS, 2)],
+)
+def test_resumedTracesMatchGeneratedTraces(
+    tmp_path, monkeypatch, firewallModel, newConfig, option, threads
+):
+    expected = traceLabels(
+        newTraceGenerator(option, newConfig(threads)).run(firewallModel, 5)
+    )
+
+    # every check of the clock sees a second pass, so checkpoints are always due
+    clock = count()
+    monkeypatch.setattr(trace_generator, "perf_counter", lambda: float(next(clock)))
+    addNeighbors = SequentialTraceGenerator._addNeighbors
+    expanded = count()
+
+    def crashingAddNeighbors(self, *args):
+        if next(expanded) == _CRASH_AFTER:
+            raise _Crash()
+        addNeighbors(self, *args)
+
+    monkeypatch.setattr(SequentialTraceGenerator, "_addNeighbors", crashingAddNeighbors)
+    generator = newTraceGenerator(option, newConfig(threads, checkpointInterval=1))
+    with pytest.raises(_Crash):
+        generator.run(firewallModel, 5)
+    assert generator.checkpoints > 0, "Expected checkpoints before the crash"
+    monkeypatch.setattr(SequentialTraceGenerator, "_addNeighbors", addNeighbors)
+
+    checkpoint = loadCheckpoint(str(tmp_path))
+    assert checkpoint.workList, "Expected unexpanded nodes in the checkpoint"
+    resumed = newTraceGenerator(option, newConfig(threads, checkpointInterval=1))
+    traceTree = resumed.resume(firewallModel, checkpoint)
+
+    assert traceLabels(traceTree) == expected, "Expected the traces of depth 5"
+    assert not os.path.exists(
+        checkpointPath(str(tmp_path))
+    ), "The checkpoint should be removed once the generation finished"
+
+
+def test_loadCheckpoint_requires_checkpoint(tmp_path):
+    with pytest.raises(CheckpointError):
+        loadCheckpoint(str(tmp_path))
+
+
+def test_parallelBFS_cannot_resume(firewallModel, newConfig):
+    generator = newTraceGenerator(TraceGenOption.PBFS, newConfig())
+    generator.run(firewallModel, 2)
+    checkpoint = Checkpoint(
+        "",
+        2,
+        TraceTree(firewallModel),
+        [],
+        [],
+        generator.states,
+        generator.cache,
+        None,
+        0,
+    )
+    with pytest.raises(CheckpointError):
+        generator.resume(firewallModel, checkpoint)
+
+
+def test_checkpoint_is_kept_when_a_budget_stops_generation(
+    tmp_path, monkeypatch, firewallModel, newConfig
+):
+    # every check of the clock sees a second pass, so checkpoints are always due
+    clock = count()
+    monkeypatch.setattr(trace_generator, "perf_counter", lambda: float(next(clock)))
+    config = newConfig(checkpointInterval=1, maxNodes=20)
+    generator = newTraceGenerator(TraceGenOption.BFS, config)
+    generator.run(firewallModel, 5)
+
+    assert generator.budgetHit is not None, "Expected the node budget to be hit"
+    assert os.path.exists(
+        checkpointPath(str(tmp_path))
+    ), "The checkpoint should be kept to resume the stopped generation"
+
+
+def test_resumedTracesMatchGeneratedTraces_with_spilled_work_list(
+    tmp_path, monkeypatch, firewallModel, newConfig
+):
+    expected = traceLabels(
+        newTraceGenerator(TraceGenOption.BFS, newConfig()).run(firewallModel, 5)
+    )
+
+    clock = count()
+    monkeypatch.setattr(trace_generator, "perf_counter", lambda: float(next(clock)))
+    addNeighbors = SequentialTraceGenerator._addNeighbors
+    expanded = count()
+
+    def crashingAddNeighbors(self, *args):
+        if next(expanded) == _CRASH_AFTER:
+            raise _Crash()
+        addNeighbors(self, *args)
+
+    monkeypatch.setattr(SequentialTraceGenerator, "_addNeighbors", crashingAddNeighbors)
+    generator = newTraceGenerator(TraceGenOption.BFS, newConfig(checkpointInterval=1))
+    # budget of a few items, far below the MB granularity of the config
+    generator.workList = SpillingQueue(300, str(tmp_path))
+    with pytest.raises(_Crash):
+        generator.run(firewallModel, 5)
+    assert generator.workList.spilledItems > 0, "Expected items written to disk"
+    monkeypatch.setattr(SequentialTraceGenerator, "_addNeighbors", addNeighbors)
+
+    checkpoint = loadCheckpoint(str(tmp_path))
+    pending = [node for _, node, _ in checkpoint.workList]
+    assert all(
+        isinstance(node, PendingNode) for node in pending
+    ), "Nodes to expand should not be added to the trace tree yet"
+    assert all(
+        checkpoint.traceTree.getNode(node.parentId) is not None for node in pending
+    ), "Pending nodes should refer to parents in the saved trace tree"
+    resumed = newTraceGenerator(TraceGenOption.BFS, newConfig(checkpointInterval=1))
+    traceTree = resumed.resume(firewallModel, checkpoint)
+    assert traceLabels(traceTree) == expected, "Expected the traces of depth 5"
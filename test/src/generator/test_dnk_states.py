@@ -0,0 +1,25 @@
+from src.generator.dnk_states import DNKStates
+
+
+def test_intern_same_state_returns_same_id():
+    states = DNKStates()
+    id1 = states.intern("expr", "TNone")
+    id2 = states.intern("expr", "TProc")
+    assert id1 != id2, "States with different transition types should differ"
+    assert states.intern("expr", "TNone") == id1, "Expected the existing id"
+    assert len(states) == 2, f"Expected 2 states, got {len(states)}"
+    assert states.get(id2) == ("expr", "TProc"), "Expected the interned state"
+
+
+def test_release_drops_states_not_kept():
+    states = DNKStates()
+    kept = states.intern("kept", "TNone")
+    released = states.intern("released", "TNone")
+    assert states.release({kept}) == 1, "Expected one released state"
+    assert states.liveCount() == 1, f"Expected 1 live state, got {states.liveCount()}"
+    assert states.get(kept) == ("kept", "TNone"), "Expected the kept state"
+    assert states.intern("kept", "TNone") == kept, "Expected the kept id"
+    assert (
+        states.intern("released", "TNone") != released
+    ), "A released state interned again should get a new id"
+    assert states.release({kept}) == 1, "Released states are only counted once"
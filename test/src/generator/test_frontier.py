@@ -0,0 +1,44 @@
+import os
+from test.src.test_utils.util import traceLabels
+
+import pytest
+
+from src.generator.frontier import FrontierError, loadFrontier, saveFrontier
+from src.generator.trace_generator_factory import TraceGenOption, newTraceGenerator
+
+pytest_plugins = [
+    "test.src.test_utils.fixtures",
+]
+
+
+@pytest.mark.parametrize("stateGraph", [False, True])
+def test_extendedTracesMatchGeneratedTraces(
+    tmp_path, firewallModel, newConfig, stateGraph
+):
+    generator = newTraceGenerator(TraceGenOption.DFS, newConfig(stateGraph=stateGraph))
+    expected = traceLabels(generator.run(firewallModel, 5))
+    expectedMisses = generator.cacheStats.misses
+
+    generator.run(firewallModel, 3)
+    prevMisses = generator.cacheStats.misses
+    filePath = os.path.join(tmp_path, "frontier")
+    saveFrontier(filePath, generator.getFrontier())
+    frontier = loadFrontier(filePath)
+    prevNodes = frontier.traceTree.nodeCount()
+    traceTree = generator.extend(firewallModel, frontier, 5)
+
+    assert traceLabels(traceTree) == expected, "Expected the traces of depth 5"
+    assert (
+        prevMisses + generator.cacheStats.misses == expectedMisses
+    ), "The neighbors computed before the extension should be reused"
+    assert traceLabels(traceTree, prevNodes) == [
+        trace for trace in expected if len(trace) > 4
+    ], "Only the extended traces should end in new nodes"
+
+
+def test_extend_requires_larger_depth(firewallModel, newConfig):
+    generator = newTraceGenerator(TraceGenOption.BFS, newConfig())
+    generator.run(firewallModel, 3)
+
+    with pytest.raises(FrontierError):
+        generator.extend(firewallModel, generator.getFrontier(), 3)
@@ -0,0 +1,33 @@
+from src.generator.hnf_store import HNFStore, modelHash
+
+_NEIGHBORS = [("TProc", "proc('p',0)", "expr2"), ("TComm", "rcfg(ch, 'p', 1, 0)", "e3")]
+
+
+def test_load_returns_stored_neighbors_of_model(tmp_path):
+    store = HNFStore(str(tmp_path))
+    store.put("model1", [("expr1", "TNone", _NEIGHBORS)])
+    store.put("model2", [("expr1", "TNone", [])])
+    store.close()
+
+    store = HNFStore(str(tmp_path))
+    loaded = list(store.load("model1"))
+    store.close()
+    assert loaded == [
+        ("expr1", "TNone", _NEIGHBORS)
+    ], f"Unexpected stored neighbors: {loaded}"
+
+
+def test_modelHash_depends_on_model_and_maude_files(tmp_path):
+    maudeDir = tmp_path / "maude"
+    maudeDir.mkdir()
+    (maudeDir / "hnf.maude").write_text("fmod A is endfm")
+    hash1 = modelHash("mod DNK-MODEL is endm", str(maudeDir))
+    hash2 = modelHash("mod DNK-MODEL is op a : -> Nat . endm", str(maudeDir))
+    (maudeDir / "hnf.maude").write_text("fmod B is endfm")
+    hash3 = modelHash("mod DNK-MODEL is endm", str(maudeDir))
+
+    assert hash1 != hash2, "Different models should have different hashes"
+    assert hash1 != hash3, "Different Maude files should lead to different hashes"
+    assert hash3 == modelHash(
+        "mod DNK-MODEL is endm", str(maudeDir)
+    ), "Expected the same hash for the same inputs"
@@ -0,0 +1,29 @@
+from test.src.test_utils.util import traceLabels
+
+import pytest
+
+from src.generator.multiprocess_trace_generator import MultiProcessTraceGenerator
+from src.generator.trace_generator_factory import TraceGenOption, newTraceGenerator
+
+pytest_plugins = [
+    "test.src.test_utils.fixtures",
+]
+
+
+@pytest.mark.parametrize("option", [TraceGenOption.DFS, TraceGenOption.BFS])
+def test_multiProcessGeneratorMatchesSequential(firewallModel, newConfig, option):
+    seqGen = newTraceGenerator(option, newConfig(1))
+    seqTraces = traceLabels(seqGen.run(firewallModel, 5))
+    mpGen = newTraceGenerator(option, newConfig(3))
+    mpTraces = traceLabels(mpGen.run(firewallModel, 5))
+
+    assert not isinstance(
+        seqGen, MultiProcessTraceGenerator
+    ), "A single thread should not start worker processes"
+    assert isinstance(
+        mpGen, MultiProcessTraceGenerator
+    ), "Multiple threads should start worker processes"
+    assert mpTraces == seqTraces, "Worker processes should generate the same traces"
+    assert (
+        mpGen.cacheStats.misses == seqGen.cacheStats.misses
+    ), "Every DNK expression should be computed once"
@@ -0,0 +1,64 @@
+import pickle
+
+from src.generator.neighbor_cache import (NEW_ENTRIES_BATCH_SIZE, NeighborCache,
+                                          _entrySize)
+
+_NEIGHBORS = [("TProc", "proc('p',0)", "expr")]
+
+
+def test_neighborCache_unbounded_never_evicts():
+    cache = NeighborCache()
+    for i in range(100):
+        cache[(f"expr{i}", "TNone")] = _NEIGHBORS
+    assert len(cache) == 100, f"Expected 100 entries, got {len(cache)}"
+    assert cache.evictions == 0, "An unbounded cache should not evict entries"
+
+
+def test_neighborCache_evicts_least_recently_used_entries():
+    entrySize = _entrySize(("expr0", "TNone"), _NEIGHBORS)
+    cache = NeighborCache(entrySize * 2)
+    cache[("expr0", "TNone")] = _NEIGHBORS
+    cache[("expr1", "TNone")] = _NEIGHBORS
+    # makes expr1 the least recently used entry
+    assert cache.get(("expr0", "TNone"), []) == _NEIGHBORS, "Expected a cache hit"
+    cache[("expr2", "TNone")] = _NEIGHBORS
+
+    assert cache.evictions == 1, f"Expected 1 eviction, got {cache.evictions}"
+    assert ("expr1", "TNone") not in cache, "Expected expr1 to be evicted"
+    assert ("expr0", "TNone") in cache, "Expected expr0 to be kept"
+    assert ("expr2", "TNone") in cache, "Expected expr2 to be kept"
+    assert cache.sizeBytes <= entrySize * 2, "Cache size should be within budget"
+
+
+def test_neighborCache_skips_entries_larger_than_budget():
+    cache = NeighborCache(1)
+    cache[("expr", "TNone")] = _NEIGHBORS
+    assert ("expr", "TNone") not in cache, "Entry larger than budget was cached"
+    assert cache.evictions == 0, "No entries should be evicted"
+
+
+def test_neighborCache_stores_new_entries_in_batches():
+    cache = NeighborCache(logNewEntries=True)
+    batches = []
+    cache.storeNewEntries = batches.append
+    cache.load(-1, [])
+    for i in range(NEW_ENTRIES_BATCH_SIZE + 1):
+        cache[i] = []
+    assert [len(b) for b in batches] == [
+        NEW_ENTRIES_BATCH_SIZE
+    ], "Expected one full batch of new entries to be stored"
+    assert cache.newEntries == [(NEW_ENTRIES_BATCH_SIZE, [])], "Log was not cleared"
+
+    cache.flushNewEntries()
+    assert len(batches) == 2, "Expected the remaining entry to be stored"
+    assert cache.newEntries == [], "Expected an empty log after flushing"
+
+
+def test_neighborCache_pickling_keeps_entries_but_not_the_store_callback():
+    cache = NeighborCache(logNewEntries=True)
+    cache.storeNewEntries = print
+    cache[1] = [("proc('p',0)", 2)]
+    loaded = pickle.loads(pickle.dumps(cache))
+    assert loaded[1] == [("proc('p',0)", 2)], "Expected the cached entry"
+    assert loaded.newEntries == cache.newEntries, "Expected the logged entries"
+    assert loaded.storeNewEntries is None, "The store callback should be dropped"
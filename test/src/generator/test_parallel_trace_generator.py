@@ -0,0 +1,41 @@
+from test.src.test_utils.util import traceLabels
+
+import pytest
+
+from src.generator.trace_generator_factory import TraceGenOption, newTraceGenerator
+
+pytest_plugins = [
+    "test.src.test_utils.fixtures",
+]
+
+
+@pytest.mark.parametrize("chunkSize", [0, 1, 3])
+def test_pipelinedParallelBFSMatchesSequential(firewallModel, newConfig, chunkSize):
+    bfsGen = newTraceGenerator(TraceGenOption.BFS, newConfig())
+    bfsTraces = traceLabels(bfsGen.run(firewallModel, 5))
+    pbfsGen = newTraceGenerator(
+        TraceGenOption.PBFS, newConfig(2, pbfsChunkSize=chunkSize)
+    )
+    pbfsTraces = traceLabels(pbfsGen.run(firewallModel, 5))
+
+    assert pbfsTraces == bfsTraces, "Pipelined layers should generate the same traces"
+    assert (
+        len(pbfsGen.workerIdleTimes) > 1
+    ), "Expected the idle time of the workers to be reported per layer"
+    assert all(
+        t >= 0 for t in pbfsGen.workerIdleTimes
+    ), "Expected non-negative idle times"
+    assert [e.key for e in pbfsGen.getStats()] == [
+        e.key for e in bfsGen.getStats()
+    ], "Expected the same stats for every strategy"
+    assert {e.key: e.value for e in bfsGen.getStats()}["layerWorkerIdleTimes"] == (
+        ""
+    ), "Only the pipelined generator has Maude workers"
+    assert (
+        sum(pbfsGen.workerChunks) >= pbfsGen.cacheStats.misses
+        if chunkSize == 1
+        else sum(pbfsGen.workerChunks) > 0
+    ), "Expected the input chunks taken by the workers to be counted"
+    assert len(pbfsGen.workerBusyTimes) == len(
+        pbfsGen.workerChunks
+    ), "Expected the busy time of every worker"
@@ -0,0 +1,45 @@
+from src.generator.partial_order_reduction import SleepSets, areIndependent
+from src.trace.transition import newTraceTransition
+
+_RCFG_1_0 = "rcfg(ch1, 'p1', 1, 0)"
+_RCFG_3_2 = "rcfg(ch2, 'p2', 3, 2)"
+_RCFG_2_0 = "rcfg(ch3, 'p3', 2, 0)"
+_PROC_4 = "proc('p4',4)"
+
+
+def test_areIndependent_only_rcfgs_between_disjoint_elements():
+    cases = [
+        (_RCFG_1_0, _RCFG_3_2, True),
+        (_RCFG_1_0, _RCFG_2_0, False),
+        (_RCFG_1_0, _PROC_4, False),
+        (_PROC_4, _PROC_4, False),
+    ]
+    for label1, label2, expected in cases:
+        t1 = newTraceTransition(label1)
+        t2 = newTraceTransition(label2)
+        assert (
+            areIndependent(t1, t2) == expected
+        ), f"Expected independence of {label1} and {label2} to be {expected}"
+
+
+def test_sleepSets_prunes_reordered_independent_transitions():
+    sleepSets = SleepSets()
+    neighbors = [(_RCFG_1_0, 1), (_RCFG_3_2, 2)]
+    expanded = sleepSets.expand(0, neighbors)
+    assert [n for n, _ in expanded] == neighbors, "Expected all neighbors of the root"
+    assert expanded[0][1] == frozenset(), "First neighbor should have no sleep set"
+    assert expanded[1][1] == frozenset(
+        {_RCFG_1_0}
+    ), "Second neighbor should sleep on the first one"
+
+    sleepSets.setSleepSet(1, expanded[1][1])
+    expanded = sleepSets.expand(1, [(_RCFG_1_0, 3), (_PROC_4, 4)])
+    assert [n[0] for n, _ in expanded] == [_PROC_4], "Expected the rcfg to be pruned"
+    assert sleepSets.prunedBranches == 1, "Expected 1 pruned branch"
+
+
+def test_sleepSets_keeps_dependent_transitions():
+    sleepSets = SleepSets()
+    neighbors = [(_RCFG_1_0, 1), (_RCFG_2_0, 2)]
+    expanded = sleepSets.expand(0, neighbors)
+    assert all(not s for _, s in expanded), "Dependent rcfgs should not sleep"
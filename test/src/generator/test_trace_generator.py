@@ -0,0 +1,46 @@
+from typing import List
+from test.src.test_utils.util import traceLabels
+
+import pytest
+
+from src.generator.trace_generator_factory import TraceGenOption, newTraceGenerator
+from src.trace.node import TraceNode
+
+pytest_plugins = [
+    "test.src.test_utils.fixtures",
+]
+
+
+@pytest.mark.parametrize("threads", [1, 2])
+def test_streamedTracesMatchTraceTree(firewallModel, newConfig, threads):
+    treeGen = newTraceGenerator(TraceGenOption.DFS, newConfig())
+    treeTraces = traceLabels(treeGen.run(firewallModel, 5))
+    generator = newTraceGenerator(TraceGenOption.DFS, newConfig(threads))
+    streamed: List[List[TraceNode]] = []
+    traceTree = generator.run(firewallModel, 5, streamed.append)
+
+    assert (
+        sorted(tuple(str(node.trans) for node in trace) for trace in streamed)
+        == treeTraces
+    ), "Expected the traces of the trace tree to be streamed"
+    assert traceTree.traceCount() == len(streamed), "Expected the streamed traces"
+    assert (
+        generator.peakTraceNodes < generator.traceNodes
+    ), "Nodes of streamed traces should be released"
+
+
+@pytest.mark.parametrize("threads", [1, 2])
+def test_requestStop_ends_generation_early(firewallModel, newConfig, threads):
+    treeGen = newTraceGenerator(TraceGenOption.DFS, newConfig())
+    treeTraces = traceLabels(treeGen.run(firewallModel, 5))
+    generator = newTraceGenerator(TraceGenOption.DFS, newConfig(threads))
+    streamed: List[List[TraceNode]] = []
+
+    def onTrace(trace: List[TraceNode]) -> None:
+        streamed.append(trace)
+        generator.requestStop()
+
+    traceTree = generator.run(firewallModel, 5, onTrace)
+
+    assert 0 < len(streamed) < len(treeTraces), "Expected the generation to stop"
+    assert traceTree.traceCount() == len(streamed), "Expected the streamed traces"
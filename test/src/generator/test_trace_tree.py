@@ -0,0 +1,82 @@
+from typing import List
+
+from src.generator.trace_tree import StreamingTraceTree, TraceGraph, TraceTree
+from src.model.dnk_maude_model import DNKMaudeModel
+from src.trace.node import TraceNode
+from src.trace.vector_clocks import newVectorClocks
+
+
+def _buildInterleavings(traceTree: TraceTree) -> None:
+    """Adds both interleavings of two packet processing transitions on different
+    switches, each followed by the same transition, reaching the same state."""
+    start = TraceNode.fromTuple(("", newVectorClocks(2)))
+    traceTree.addNode(start)
+    for first, second in [
+        ("proc('a',0)", "proc('b',1)"),
+        ("proc('b',1)", "proc('a',0)"),
+    ]:
+        n1 = traceTree.addTransition(start, first, (first, "T"), 1)
+        assert n1 is not None, "Nodes reaching different states should not be merged"
+        n2 = traceTree.addTransition(n1, second, ("S", "T"), 2)
+        assert n2 is not None, "Nodes with different transitions should not be merged"
+        traceTree.addTransition(n2, "proc('c',0)", ("S2", "T"), 3)
+
+
+def _traces(traceTree: TraceTree):
+    return sorted([str(n) for n in trace] for trace in traceTree.getTraceIterator())
+
+
+def test_traceGraph_merges_nodes_reaching_same_state():
+    tree = TraceTree(DNKMaudeModel())
+    graph = TraceGraph(DNKMaudeModel())
+    _buildInterleavings(tree)
+    _buildInterleavings(graph)
+
+    assert graph.mergedNodes == 1, f"Expected 1 merged node, got {graph.mergedNodes}"
+    assert (
+        graph.nodeCount() == tree.nodeCount() - 1
+    ), "The merged node should not be stored twice"
+    assert graph.traceCount() == tree.traceCount() == 2, "Expected 2 traces"
+    assert _traces(graph) == _traces(tree), "Expected the same traces as the tree"
+
+
+def test_traceGraph_keeps_nodes_with_different_vector_clocks():
+    graph = TraceGraph(DNKMaudeModel())
+    start = TraceNode.fromTuple(("", newVectorClocks(2)))
+    graph.addNode(start)
+    n1 = graph.addTransition(start, "proc('a',0)", ("S", "T"), 1)
+    n2 = graph.addTransition(start, "proc('a',1)", ("S", "T"), 1)
+    assert n1 is not None and n2 is not None, "Expected both nodes to be added"
+    graph.addTransition(n1, "proc('b',1)", ("S2", "T"), 2)
+    graph.addTransition(n2, "proc('b',1)", ("S2", "T"), 2)
+
+    assert graph.mergedNodes == 0, "Nodes with different clocks should not be merged"
+    assert graph.traceCount() == 2, f"Expected 2 traces, got {graph.traceCount()}"
+
+
+def test_streamingTraceTree_hands_out_traces_and_releases_nodes():
+    streamed: List[List[TraceNode]] = []
+    tree = StreamingTraceTree(DNKMaudeModel(), streamed.append)
+    start = TraceNode.fromTuple(("", newVectorClocks(2)))
+    tree.addNode(start)
+    n1 = tree.addTransition(start, "proc('a',0)", 1, 1)
+    n2 = tree.addTransition(start, "proc('b',1)", 2, 1)
+    assert n1 is not None and n2 is not None, "Expected both nodes to be added"
+    tree.closeNode(start)
+    leaf = tree.addTransition(n1, "proc('b',1)", 3, 2)
+    assert leaf is not None, "Expected the node to be added"
+    tree.closeNode(leaf)
+    tree.closeNode(n1)
+
+    assert len(streamed) == 1, f"Expected 1 streamed trace, got {len(streamed)}"
+    assert [n.id for n in streamed[0]] == [
+        start.id,
+        n1.id,
+        leaf.id,
+    ], "Expected the trace from the root to the closed leaf"
+    tree.closeNode(n2)
+    assert len(streamed) == 2, "Expected a trace ending in the node without children"
+    assert tree.traceCount() == 2, f"Expected 2 traces, got {tree.traceCount()}"
+    assert tree.nodeCount() == 4, f"Expected 4 nodes, got {tree.nodeCount()}"
+    assert tree.peakNodeCount() == 4, "All nodes were held before closing n1"
+    assert not tree._liveNodes, "Expected all nodes to be released"
@@ -0,0 +1,76 @@
+import os
+from test.src.test_utils.util import EXAMPLES_DIR, KATCH_PATH, MAUDE_FILES_PATH
+
+import maude
+import pytest
+
+from src.errors import MaudeError
+from src.generator.dnk_states import DNKStates
+from src.generator.trace_generator_factory import TraceGenOption, newTraceGenerator
+from src.generator.util import HNFTerms, computeNeighbors
+from src.maude_encoder import MaudeEncoder
+from src.maude_encoder import MaudeModules as mm
+from src.maude_encoder import MaudeOps as mo
+from src.model.dnk_maude_model import DNKMaudeModel
+from src.tracer_config import TracerConfig
+from src.util import readFile
+
+
+def _declareModel(tmp_path) -> tuple[maude.Module, str]:
+    model = DNKMaudeModel.fromJson(
+        readFile(os.path.join(EXAMPLES_DIR, "firewall", "firewall.json"))
+    )
+    config = TracerConfig(str(tmp_path), KATCH_PATH, MAUDE_FILES_PATH, 1, False, "test")
+    newTraceGenerator(TraceGenOption.DFS, config).run(model, 1)
+    return maude.getModule(mm.ENTRY), MaudeEncoder.parallelSeq(model.getElementTerms())
+
+
+def test_hnfTerms_matches_computeNeighbors(tmp_path):
+    mod, startDnkExpr = _declareModel(tmp_path)
+    hnfTerms = HNFTerms(mod)
+
+    expected = computeNeighbors(mod, startDnkExpr, mo.TRANS_TYPE_NONE)
+    expected += computeNeighbors(mod, expected[0][2], expected[0][0])
+    neighbors = hnfTerms.computeNeighbors(
+        hnfTerms.parse(startDnkExpr), mo.TRANS_TYPE_NONE
+    )
+    neighbors += hnfTerms.computeNeighbors(neighbors[0][2], neighbors[0][0])
+
+    assert len(neighbors) == len(expected), "Expected the same number of neighbors"
+    for (transType, label, term), (expTransType, expLabel, expExpr) in zip(
+        neighbors, expected
+    ):
+        assert transType == expTransType, "Expected the same transition type"
+        assert label == expLabel, "Expected the same transition label"
+        assert (
+            term.prettyPrint(maude.PRINT_MIXFIX) == expExpr
+        ), "Expected the same DNK expression"
+
+
+def test_internTerm_matches_states_interned_by_expression(tmp_path):
+    mod, startDnkExpr = _declareModel(tmp_path)
+    hnfTerms = HNFTerms(mod)
+    neighbors = hnfTerms.computeNeighbors(
+        hnfTerms.parse(startDnkExpr), mo.TRANS_TYPE_NONE
+    )
+    transType, _, term = neighbors[0]
+
+    states = DNKStates()
+    termId = states.internTerm(term, transType)
+    assert states.getTerm(termId) == (term, transType), "Expected the term state"
+    assert states.internTerm(term, transType) == termId, "Expected the existing id"
+    dnkExpr = term.prettyPrint(maude.PRINT_MIXFIX)
+    assert states.get(termId) == (dnkExpr, transType), "Expected the printed term"
+
+    exprStates = DNKStates()
+    exprId = exprStates.intern(dnkExpr, transType)
+    assert (
+        exprStates.internTerm(term, transType) == exprId
+    ), "A term should match the state interned by its expression"
+    assert len(exprStates) == 1, f"Expected 1 state, got {len(exprStates)}"
+
+
+def test_computeNeighbors_unparsable_expression_raises_maude_error(tmp_path):
+    mod, _ = _declareModel(tmp_path)
+    with pytest.raises(MaudeError):
+        computeNeighbors(mod, "(((", mo.TRANS_TYPE_NONE)
@@ -0,0 +1,163 @@
+import os
+import tracemalloc
+from test.src.test_utils.util import traceLabels
+
+import pytest
+
+from src.generator.parallel_trace_generator import ParallelBFSTraceGenerator
+from src.generator.trace_generator_factory import TraceGenOption, newTraceGenerator
+from src.generator.trace_tree import TraceTree
+from src.generator.worklist import SpillingQueue, _itemSize
+from src.model.dnk_maude_model import DNKMaudeModel
+from src.trace.node import TraceNode
+from src.trace.vector_clocks import newVectorClocks
+
+pytest_plugins = [
+    "test.src.test_utils.fixtures",
+]
+
+
+def test_spillingQueue_unbounded_never_spills(tmp_path):
+    queue = SpillingQueue[int](0, str(tmp_path))
+    for i in range(100):
+        queue.append(i)
+    assert len(queue) == 100, f"Expected 100 items, got {len(queue)}"
+    assert [queue.pop() for _ in range(100)] == list(range(100)), "Expected FIFO order"
+    assert queue.spilledItems == 0, "An unbounded queue should not spill items"
+    assert not os.listdir(tmp_path), "No segments should be written"
+
+
+def test_spillingQueue_keeps_order_when_spilling(tmp_path):
+    items = [(i, f"node{i}", i % 3) for i in range(200)]
+    queue = SpillingQueue[tuple](_itemSize(items[0]) * 10, str(tmp_path))
+    popped = []
+    for i, el in enumerate(items):
+        queue.append(el)
+        # items are popped while others are appended, as in the BFS generators
+        if i % 3 == 0:
+            popped.append(queue.pop())
+    assert queue.spilledItems > 0, "Expected items to be written to disk"
+    assert os.listdir(tmp_path), "Expected a directory holding the segments"
+    while not queue.isEmpty():
+        popped.append(queue.pop())
+
+    assert popped == items, "Spilled items should be read back in order"
+    assert not os.listdir(tmp_path), "Segments should be removed once read"
+
+
+def test_spillingQueue_reset_removes_segments(tmp_path):
+    queue = SpillingQueue[int](_itemSize(0), str(tmp_path))
+    for i in range(50):
+        queue.append(i)
+    assert queue.spilledItems > 0, "Expected items to be written to disk"
+    queue.reset()
+    assert queue.isEmpty(), "Expected an empty queue after a reset"
+    assert not os.listdir(tmp_path), "Segments should be removed by a reset"
+
+
+def test_spillingQueue_converts_items_written_to_disk(tmp_path):
+    nodes = {i: object() for i in range(50)}
+    queue = SpillingQueue[tuple](_itemSize((0, nodes[0])), str(tmp_path))
+    queue.toDisk = lambda el: el[0]
+    queue.fromDisk = lambda i: (i, nodes[i])
+    for i, node in nodes.items():
+        queue.append((i, node))
+    assert queue.spilledItems > 0, "Expected items to be written to disk"
+
+    popped = [queue.pop() for _ in range(len(nodes))]
+    assert all(
+        node is nodes[i] for i, node in popped
+    ), "Items read back should refer to the original objects"
+
+
+def test_spillingQueue_keeps_items_in_memory_again_once_drained(tmp_path):
+    queue = SpillingQueue[int](_itemSize(1000) * 8, str(tmp_path))
+    for i in range(1000, 1100):
+        queue.append(i)
+    spilledItems = queue.spilledItems
+    assert spilledItems > 0, "Expected items to be written to disk"
+    for _ in range(95):
+        queue.pop()
+    for i in range(1100, 1103):
+        queue.append(i)
+    assert (
+        queue.spilledItems == spilledItems
+    ), "Items appended once the queue drained should stay in memory"
+    assert [queue.pop() for _ in range(8)] == list(
+        range(1095, 1103)
+    ), "Expected FIFO order"
+
+
+def test_spillingQueue_items_yields_spilled_items_in_order(tmp_path):
+    queue = SpillingQueue[int](_itemSize(1000) * 4, str(tmp_path))
+    for i in range(1000, 1050):
+        queue.append(i)
+    assert queue.spilledItems > 0, "Expected items to be written to disk"
+    assert list(queue.items()) == list(range(1000, 1050)), "Expected FIFO order"
+    assert len(queue) == 50, "Walking the items should not pop them"
+
+
+@pytest.mark.parametrize("option", [TraceGenOption.BFS, TraceGenOption.PBFS])
+def test_spilledFrontierMatchesInMemoryFrontier(
+    tmp_path, firewallModel, newConfig, option
+):
+    memTraces = traceLabels(
+        newTraceGenerator(option, newConfig()).run(firewallModel, 5)
+    )
+    generator = newTraceGenerator(option, newConfig())
+    # budget of a few hundred bytes, far below the MB granularity of the config
+    if isinstance(generator, ParallelBFSTraceGenerator):
+        generator.maudeHook.layerMaxSizeBytes = 500
+        generator.maudeHook.layerDirPath = str(tmp_path)
+    else:
+        generator.workList = SpillingQueue(500, str(tmp_path))
+    spilledTraces = traceLabels(generator.run(firewallModel, 5))
+
+    assert generator.spilledFrontierItems > 0, "Expected nodes to be written to disk"
+    assert spilledTraces == memTraces, "Spilling should not change the traces"
+
+
+def _frontierMemory(maxSizeBytes: int, dirPath: str) -> int:
+    """Memory held by a work list filled with the pending nodes of a frontier"""
+    tree = TraceTree(DNKMaudeModel())
+    root = TraceNode.fromTuple(("", newVectorClocks(8)))
+    tree.addNode(root)
+    tracemalloc.start()
+    try:
+        queue = SpillingQueue[tuple](maxSizeBytes, dirPath)
+        for i in range(5000):
+            pending = tree.addPendingTransition(root, f"proc('a',{i % 8})", i, 1)
+            queue.append((i, pending, 1))
+        memory, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert tree.nodeCount() == 1, "Pending nodes should not be held by the tree"
+    return memory
+
+
+def test_spillingQueue_bounds_memory_of_pending_nodes(tmp_path):
+    budget = 64 * 1024
+    unbounded = _frontierMemory(0, str(tmp_path))
+    bounded = _frontierMemory(budget, str(tmp_path))
+
+    assert unbounded > 10 * budget, f"Expected a large frontier, got {unbounded}B"
+    assert bounded < 4 * budget, f"Expected the budget to bound memory, got {bounded}B"
+    assert (
+        bounded < unbounded / 5
+    ), f"Expected {bounded}B to be far below the {unbounded}B of the frontier"
+
+
+def test_spilledFrontierLowersPeakTraceNodesWhenStreaming(
+    tmp_path, firewallModel, newConfig
+):
+    memGenerator = newTraceGenerator(TraceGenOption.BFS, newConfig())
+    memTraces = traceLabels(memGenerator.run(firewallModel, 6, lambda _: None))
+    generator = newTraceGenerator(TraceGenOption.BFS, newConfig())
+    generator.workList = SpillingQueue(500, str(tmp_path))
+    spilledTraces = traceLabels(generator.run(firewallModel, 6, lambda _: None))
+
+    assert generator.spilledFrontierItems > 0, "Expected nodes to be written to disk"
+    assert spilledTraces == memTraces, "Spilling should not change the traces"
+    assert (
+        generator.peakTraceNodes < memGenerator.peakTraceNodes
+    ), "Spilled frontier nodes should not be held by the trace tree"
@@ -0,0 +1,30 @@
+import pytest
+
+from src.netkat.evaluator import PacketSpaceTooLargeError, isEmpty
+from src.netkat.parser import parseNetKAT
+
+
+@pytest.mark.parametrize(
+    "s, expected",
+    [
+        ("zero", True),
+        ("one", False),
+        ("a = 1 . a = 2", True),
+        ("a != 1 . a = 1", True),
+        ("a != 1 . a != 2", False),
+        ("a = 1 . a <- 2 . a = 2", False),
+        ("a = 1 . a <- 2 . a = 1", True),
+        ("(a = 1 . a <- 2 + a = 2 . a <- 3)* . a = 1 . a = 3", True),
+        ("a = 1 . (a = 1 . a <- 2 + a = 2 . a <- 3)* . a = 3", False),
+        ("(a = 1 + b = 2) . zero", True),
+    ],
+)
+def test_isEmpty_returns_expected_result(s, expected):
+    result = isEmpty(parseNetKAT(s), 1024)
+    assert result is expected, f"Expected {expected} for '{s}'"
+
+
+def test_isEmpty_too_many_packets_raises_error():
+    expr = parseNetKAT("a = 1 . b = 1 . c = 1")
+    with pytest.raises(PacketSpaceTooLargeError):
+        isEmpty(expr, 7)
@@ -0,0 +1,37 @@
+import pytest
+
+from src.netkat.normalizer import normalizeNetKAT
+
+
+@pytest.mark.parametrize(
+    "s1, s2",
+    [
+        ("a = 1 + b = 2", "b=2 + a=1"),
+        ("a = 1 + (b = 2 + c = 3)", "(c = 3 + a = 1) + b = 2"),
+        ("(a = 1) . ((b <- 2))", "a = 1 . b <- 2"),
+        ("a = 1 + a = 1", "a = 1"),
+        ("a = 1 . a = 1 . b <- 2", "a = 1 . b <- 2"),
+        ("one . a = 1 + zero", "a = 1"),
+        ("a = 1 . zero . b <- 2", "zero"),
+        ("(a = 1)**", "(a = 1)*"),
+        ("zero*", "one"),
+    ],
+)
+def test_normalizeNetKAT_equivalent_notations_are_equal(s1, s2):
+    n1, n2 = normalizeNetKAT(s1), normalizeNetKAT(s2)
+    assert n1 == n2, f"Expected same normal form, got '{n1}' and '{n2}'"
+
+
+def test_normalizeNetKAT_keeps_order_of_sequences():
+    n1, n2 = normalizeNetKAT("a <- 1 . b = 1"), normalizeNetKAT("b = 1 . a <- 1")
+    assert n1 != n2, "Sequences are not commutative"
+
+
+def test_normalizeNetKAT_normal_form_is_stable():
+    n = normalizeNetKAT("(b = 2 + a = 1) . (c <- 3 . (d = 1)*)")
+    assert normalizeNetKAT(n) == n, f"Expected '{n}' to be in normal form"
+
+
+def test_normalizeNetKAT_unsupported_syntax_is_unchanged():
+    s = "(ft0+ft1) . @Network ≡ ⊥"
+    assert normalizeNetKAT(s) == s
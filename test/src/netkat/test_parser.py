@@ -0,0 +1,32 @@
+import pytest
+
+from src.netkat.expr import Assign, FieldTest, One, Seq, Star, Union, Zero
+from src.netkat.parser import NetKATParseError, parseNetKAT
+from src.util import DyNetKATSymbols as sym
+
+
+def test_parseNetKAT_precedence_star_then_seq_then_union():
+    expr = parseNetKAT(f"a {sym.EQUAL} 1 {sym.OR} b {sym.ASSIGN} 2 {sym.AND} one*")
+    expected = Union((FieldTest("a", 1), Seq((Assign("b", 2), Star(One())))))
+    assert expr == expected, f"Unexpected expression: {expr}"
+
+
+def test_parseNetKAT_parentheses_and_not_equal():
+    expr = parseNetKAT(f"(a {sym.NOT_EQUAL} 1 {sym.OR} zero){sym.AND}(b{sym.EQUAL}2)")
+    expected = Seq((Union((FieldTest("a", 1, negated=True), Zero())), FieldTest("b", 2)))
+    assert expr == expected, f"Unexpected expression: {expr}"
+
+
+def test_parseNetKAT_nkpl_symbols_are_accepted():
+    expr = parseNetKAT("(a ← 1) ⋅ ⊤⋆ ⋅ ⊥")
+    expected = Seq((Assign("a", 1), Star(One()), Zero()))
+    assert expr == expected, f"Unexpected expression: {expr}"
+
+
+@pytest.mark.parametrize(
+    "s",
+    ["", "(a = 1", "a = b", "a + 1", "a = 1 ∖ b = 2", "dup"],
+)
+def test_parseNetKAT_unsupported_syntax_raises_parse_error(s):
+    with pytest.raises(NetKATParseError):
+        parseNetKAT(s)
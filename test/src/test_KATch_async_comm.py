@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from src.KATch_async_comm import AsyncKATchComm
+from src.KATch_comm import KATchError
+
+
+def _writeScript(path, command: str) -> str:
+    path.write_text(f"#!/bin/sh\n{command}\n")
+    path.chmod(0o755)
+    return str(path)
+
+
+def _maxRunning(logLines):
+    running, maxRunning = 0, 0
+    for line in logLines:
+        running += 1 if line == "start" else -1
+        maxRunning = max(maxRunning, running)
+    return maxRunning
+
+
+def test_checkProperties_runs_at_most_max_concurrency_processes(tmp_path):
+    log = tmp_path / "runs.log"
+    toolPath = _writeScript(
+        tmp_path / "katch.sh",
+        f"echo start >> {log}; sleep 0.2; echo end >> {log}; echo 'Check passed'",
+    )
+    katch = AsyncKATchComm(toolPath, str(tmp_path), max_concurrency=2)
+    results = asyncio.run(katch.checkProperties("@Network", ["a", "b", "c", "d"]))
+
+    assert results == [True, True, True, True], f"Unexpected results: {results}"
+    lines = log.read_text().split()
+    assert len(lines) == 8, f"Expected 4 KATch runs, got: {lines}"
+    assert _maxRunning(lines) == 2, f"Expected 2 concurrent runs, got: {lines}"
+
+
+def test_checkProperty_identical_checks_share_one_run(tmp_path):
+    log = tmp_path / "runs.log"
+    toolPath = _writeScript(
+        tmp_path / "katch.sh", f"echo run >> {log}; echo 'Check failed' >&2"
+    )
+    katch = AsyncKATchComm(toolPath, str(tmp_path), max_concurrency=4)
+
+    async def check():
+        concurrent = await asyncio.gather(
+            *(katch.checkProperty("@Network", "a") for _ in range(3))
+        )
+        return list(concurrent) + [await katch.checkProperty("@Network", "a")]
+
+    assert asyncio.run(check()) == [False] * 4, "Expected failed checks"
+    assert log.read_text().split() == ["run"], "Expected a single KATch run"
+    assert katch.getTotalCacheHits() == 1, "Expected the last check to be cached"
+
+
+def test_runNPKLProgram_timed_out_process_raises_katch_error(tmp_path):
+    toolPath = _writeScript(tmp_path / "katch.sh", "sleep 60")
+    katch = AsyncKATchComm(toolPath, str(tmp_path), timeout=0.1)
+
+    with pytest.raises(KATchError):
+        asyncio.run(katch.checkProperty("@Network", "a"))
+    assert list(tmp_path.glob("*.nkpl")) == [], "Expected the NPKL file to be removed."
@@ -1,8 +1,14 @@
+from test.src.test_utils.util import KATCH_PATH
+
+import threading
+
 import pytest
 
 from src.KATch_comm import (
+    _MAX_SESSION_FAILURES,
     _StatsKey,
     _processCheckOpResult,
+    KATchComm,
     KATchError,
     _toolFormat,
     NKPL_LARROW,
@@ -13,6 +19,8 @@ from src.KATch_comm import (
     NKPL_NOT_EQUIV,
     NKPL_CHECK,
 )
+from src.KATch_verdict_store import KATchVerdictStore
+from src.netkat.normalizer import normalizeNetKAT
 from src.util import DyNetKATSymbols as sym
 
 pytest_plugins = [
@@ -105,6 +113,49 @@ def test_runNPKLProgram_valid_input_but_failed_check_returns_error_with_check_re
     ), "Expected error message to contain 'Check failed'."
 
 
+def test_runNPKLProgram_in_session_valid_input_returns_no_error(katchWithSession):
+    npklProgram = f"{NKPL_CHECK} {NKPL_FALSE} {NKPL_NOT_EQUIV} {NKPL_TRUE}"
+    output, error = katchWithSession._runNPKLProgram(npklProgram)
+    assert error is None, f"Expected no error, got: {error}"
+    assert output.find("Check passed") > -1, "Expected output to contain check result."
+
+
+def test_runNPKLProgram_in_session_failed_check_returns_error_with_check_result(
+    katchWithSession,
+):
+    npklProgram = f"{NKPL_CHECK} {NKPL_FALSE} {NKPL_NOT_EQUIV} {NKPL_FALSE}"
+    output, error = katchWithSession._runNPKLProgram(npklProgram)
+    assert error is not None, f"Expected error, got None."
+    assert (
+        error.find("Check failed") > -1
+    ), "Expected error message to contain 'Check failed'."
+
+
+def test_runNPKLProgram_in_session_multiple_programs_reuse_session(katchWithSession):
+    passing = f"{NKPL_CHECK} {NKPL_FALSE} {NKPL_NOT_EQUIV} {NKPL_TRUE}"
+    failing = f"{NKPL_CHECK} {NKPL_FALSE} {NKPL_NOT_EQUIV} {NKPL_FALSE}"
+    results = [
+        _processCheckOpResult(*katchWithSession._runNPKLProgram(p))
+        for p in [passing, failing, passing]
+    ]
+    assert results == [True, False, True], f"Unexpected check results: {results}"
+
+
+def test_runNPKLProgram_invalid_session_path_falls_back_to_separate_process(
+    tmp_path,
+):
+    katch = KATchComm(KATCH_PATH, str(tmp_path), "/non/existent/katch_session.sh")
+    npklProgram = f"{NKPL_CHECK} {NKPL_FALSE} {NKPL_NOT_EQUIV} {NKPL_TRUE}"
+    for _ in range(_MAX_SESSION_FAILURES):
+        output, error = katch._runNPKLProgram(npklProgram)
+        assert error is None, f"Expected no error, got: {error}"
+        assert (
+            output.find("Check passed") > -1
+        ), "Expected output to contain check result."
+    katch.close()
+    assert katch._sessionPath is None, "Expected sessions to be disabled."
+
+
 def test_isNonEmptyDifference_valid_input_returns_true(
     katch, flowRule1, flowRule2, flowRule3
 ):
@@ -193,6 +244,144 @@ def test_areNotEquiv_empty_expression_does_not_raise_error3(katch):
     assert result is False, "Expected False, got True"
 
 
+def _fakeKATchRuns(monkeypatch, katch, verdicts, stopAtFailure):
+    """Replaces KATch runs with a function deciding every check statement
+    using the given verdicts (statement index to result).
+    Returns the list of programs that were run."""
+    programs = []
+
+    def run(npklProgram):
+        programs.append(npklProgram)
+        passed, failed = [], []
+        for check in npklProgram.splitlines():
+            if verdicts[check]:
+                passed.append("Check passed")
+                continue
+            failed.append("Check failed")
+            if stopAtFailure:
+                break
+        return "\n".join(passed), "\n".join(failed) if failed else None
+
+    monkeypatch.setattr(katch, "_runNPKLProgram", run)
+    return programs
+
+
+@pytest.mark.parametrize("stopAtFailure", [True, False])
+def test_runChecks_maps_results_back_to_checks(monkeypatch, katch, stopAtFailure):
+    verdicts = {f"check {i}": i % 3 != 1 for i in range(10)}
+    _fakeKATchRuns(monkeypatch, katch, verdicts, stopAtFailure)
+    result = katch._runChecks(list(verdicts.keys()))
+    assert result == list(verdicts.values()), f"Unexpected results: {result}"
+
+
+def test_runChecks_all_passing_checks_run_once(monkeypatch, katch):
+    verdicts = {f"check {i}": True for i in range(10)}
+    programs = _fakeKATchRuns(monkeypatch, katch, verdicts, True)
+    result = katch._runChecks(list(verdicts.keys()))
+    assert result == list(verdicts.values()), f"Unexpected results: {result}"
+    assert len(programs) == 1, f"Expected a single KATch run, got {len(programs)}"
+
+
+def test_runChecks_unknown_error_raises_katch_error(monkeypatch, katch):
+    monkeypatch.setattr(katch, "_runNPKLProgram", lambda _p: ("", "Parse error"))
+    with pytest.raises(KATchError):
+        katch._runChecks(["check 0", "check 1"])
+
+
+def test_checkProperties_results_match_checkProperty(katch, flowRule1, flowRule2):
+    prop = f"@Network {NKPL_NOT_EQUIV} {NKPL_FALSE}"
+    exprs = [flowRule1, sym.ZERO, flowRule2, sym.ONE]
+    result = katch.checkProperties(prop, exprs)
+    expected = [katch.checkProperty(prop, expr) for expr in exprs]
+    assert result == expected, f"Expected {expected}, got {result}"
+    assert result == [True, False, True, True], f"Unexpected results: {result}"
+
+
+def test_checkProperties_shares_cache_with_checkProperty(katch, flowRule1, flowRule2):
+    prop = f"@Network {NKPL_NOT_EQUIV} {NKPL_FALSE}"
+    katch.checkProperty(prop, flowRule1)
+    katch.checkProperties(prop, [flowRule1, flowRule2, flowRule2])
+    assert katch.getTotalCacheHits() == 2, "Expected 2 cache hits"
+    assert katch.getTotalCacheMisses() == 2, "Expected 2 cache misses"
+
+
+def test_prefetchProperties_checkProperty_returns_prefetched_results(
+    katchWithWorkers, flowRule1, flowRule2
+):
+    prop = f"@Network {NKPL_NOT_EQUIV} {NKPL_FALSE}"
+    exprs = [flowRule1, sym.ZERO, flowRule2]
+    katchWithWorkers.prefetchProperties(prop, exprs)
+    result = [katchWithWorkers.checkProperty(prop, expr) for expr in exprs]
+    assert result == [True, False, True], f"Unexpected results: {result}"
+    assert katchWithWorkers.getTotalCacheMisses() == 3, "Expected 3 cache misses"
+
+
+def test_prefetchProperties_unrequested_results_are_cached(
+    katchWithWorkers, flowRule1, flowRule2
+):
+    prop = f"@Network {NKPL_NOT_EQUIV} {NKPL_FALSE}"
+    katchWithWorkers.prefetchProperties(prop, [flowRule1, flowRule2])
+    katchWithWorkers._getPool().shutdown(wait=True)
+    assert not katchWithWorkers._inFlight, "Expected done checks to be removed"
+    assert katchWithWorkers.isCached(
+        "checkProperty", prop, normalizeNetKAT(flowRule1)
+    ), "Expected the prefetched result to be cached"
+
+
+def test_cancelPrefetched_cancels_checks_not_started(katchWithWorkers, monkeypatch):
+    started = threading.Semaphore(0)
+    release = threading.Event()
+
+    def slowCheck(prop, expr):
+        started.release()
+        release.wait()
+        return True
+
+    monkeypatch.setattr(katchWithWorkers, "_runPropertyCheck", slowCheck)
+    prop = f"@Network {NKPL_NOT_EQUIV} {NKPL_FALSE}"
+    exprs = [normalizeNetKAT(f"x={i}") for i in range(katchWithWorkers.workers + 2)]
+    katchWithWorkers.prefetchProperties(prop, exprs)
+    for _ in range(katchWithWorkers.workers):
+        started.acquire()
+    katchWithWorkers.cancelPrefetched()
+    release.set()
+    katchWithWorkers._getPool().shutdown(wait=True)
+
+    cached = [katchWithWorkers.isCached("checkProperty", prop, e) for e in exprs]
+    assert not katchWithWorkers._inFlight, "Expected no checks left in flight"
+    assert (
+        cached.count(True) == katchWithWorkers.workers
+    ), "Expected only the started checks to be cached"
+
+
+def test_prefetchProperties_repeated_expressions_are_checked_once(
+    katchWithWorkers, monkeypatch
+):
+    calls: list[str] = []
+
+    def countingCheck(prop, expr):
+        calls.append(expr)
+        return True
+
+    monkeypatch.setattr(katchWithWorkers, "_runPropertyCheck", countingCheck)
+    prop = f"@Network {NKPL_NOT_EQUIV} {NKPL_FALSE}"
+    exprs = [normalizeNetKAT(f"x={i}") for i in range(50)]
+    for _ in range(20):
+        katchWithWorkers.prefetchProperties(prop, exprs)
+    katchWithWorkers._getPool().shutdown(wait=True)
+
+    assert sorted(calls) == sorted(exprs), "Expected every expression checked once"
+    assert all(
+        katchWithWorkers.isCached("checkProperty", prop, e) for e in exprs
+    ), "Expected every prefetched result to be cached"
+
+
+def test_prefetchProperties_single_worker_does_not_run_checks(katch, flowRule1):
+    prop = f"@Network {NKPL_NOT_EQUIV} {NKPL_FALSE}"
+    katch.prefetchProperties(prop, [flowRule1])
+    assert not katch._inFlight, "Expected no checks running in the background"
+
+
 def test_get_stats_tracked_methods_produce_non_zero_stats(
     katch, flowRule1, flowRule2, flowRule3
 ):
@@ -206,6 +395,16 @@ def test_get_stats_tracked_methods_produce_non_zero_stats(
         _StatsKey.execTime: lambda x: x > 0.0,
         _StatsKey.cacheHits: lambda x: x == 2,
         _StatsKey.cacheMisses: lambda x: x == 2,
+        _StatsKey.localChecks: lambda x: x == 0,
+        _StatsKey.runs: lambda x: x == 2,
+        _StatsKey.runLatencyP50: lambda x: x > 0.0,
+        _StatsKey.runLatencyP95: lambda x: x > 0.0,
+        _StatsKey.runLatencyP99: lambda x: x > 0.0,
+        _StatsKey.runLatencyMax: lambda x: x > 0.0,
+        _StatsKey.spawnTime: lambda x: x > 0.0,
+        _StatsKey.ioTime: lambda x: x > 0.0,
+        _StatsKey.verifierTime: lambda x: x > 0.0,
+        _StatsKey.callsPerMethod: lambda x: x == "isNonEmptyDifference:2;areNotEquiv:2",
     }
     stats = katch.getStats()
     assert len(stats) == len(statsPredicates), "Expected the same number of stats"
@@ -216,3 +415,98 @@ def test_get_stats_tracked_methods_produce_non_zero_stats(
         assert statsPredicates[stat.key](
             stat.value
         ), f"Predicate for {stat.key} failed."
+
+
+def test_runChecks_stored_verdicts_are_not_run_again(monkeypatch, katch, tmp_path):
+    katch.verdict_store = KATchVerdictStore(str(tmp_path), "hash", 1)
+    verdicts = {f"check {i}": i % 2 == 0 for i in range(4)}
+    programs = _fakeKATchRuns(monkeypatch, katch, verdicts, True)
+    katch._runChecks(list(verdicts.keys())[:2])
+    programs.clear()
+    result = katch._runChecks(list(verdicts.keys()))
+    assert result == list(verdicts.values()), f"Unexpected results: {result}"
+    assert all(
+        "check 0" not in p and "check 1" not in p for p in programs
+    ), f"Stored verdicts were run again: {programs}"
+    stats = {s.key: s.value for s in katch.getStats()}
+    assert stats[_StatsKey.cacheHits] == 2, "Expected 2 cache hits"
+    assert stats[_StatsKey.cacheMisses] == 4, "Expected 4 cache misses"
+    katch.close()
+
+
+def test_checkProperty_simple_expression_decided_without_katch(
+    monkeypatch, katch, flowRule1
+):
+    def run(_npklProgram):
+        raise AssertionError("KATch should not be run")
+
+    monkeypatch.setattr(katch, "_runNPKLProgram", run)
+    prop = f"port {sym.EQUAL} 1 {sym.AND} @Network {NKPL_NOT_EQUIV} {NKPL_FALSE}"
+    assert katch.checkProperty(prop, flowRule1) is True
+    assert katch.checkProperties(prop, [sym.ZERO, flowRule1]) == [False, True]
+    stats = {s.key: s.value for s in katch.getStats()}
+    assert stats[_StatsKey.localChecks] == 2, "Expected 2 local checks"
+
+
+def test_checkProperty_unsupported_expression_falls_back_to_katch(monkeypatch, katch):
+    prop = f"@Network {NKPL_NOT_EQUIV} {NKPL_FALSE}"
+    check = f"{NKPL_CHECK} ({_toolFormat('a = b')}) {NKPL_NOT_EQUIV} {NKPL_FALSE}"
+    programs = _fakeKATchRuns(monkeypatch, katch, {check: True}, True)
+    assert katch.checkProperty(prop, "a = b") is True
+    assert programs == [check], f"Expected a single KATch run, got {programs}"
+
+
+def test_checkProperty_equivalent_notations_share_cache(katch):
+    prop = f"@Network {NKPL_NOT_EQUIV} {NKPL_FALSE}"
+    katch.checkProperty(prop, f"a {sym.EQUAL} 1 {sym.OR} b {sym.EQUAL} 2")
+    katch.checkProperties(prop, [f"(b{sym.EQUAL}2) {sym.OR} (a{sym.EQUAL}1)"])
+    assert katch.getTotalCacheHits() == 1, "Expected 1 cache hit"
+    assert katch.getTotalCacheMisses() == 1, "Expected 1 cache miss"
+
+
+def test_writeLatencyReport_contains_latencies_and_slowest_programs(tmp_path):
+    toolPath = tmp_path / "fake_katch.sh"
+    toolPath.write_text("#!/bin/bash\necho 'Check passed'\n")
+    toolPath.chmod(0o755)
+    katch = KATchComm(str(toolPath), str(tmp_path), local_checks=False)
+    katch.areNotEquiv("a = 1", "a = 2")
+    katch.checkProperty(f"@Network {NKPL_NOT_EQUIV} {NKPL_FALSE}", "a = 1")
+    katch.checkProperty(f"@Network {NKPL_NOT_EQUIV} {NKPL_FALSE}", "a = 1")
+
+    stats = {s.key: s.value for s in katch.getStats()}
+    assert stats[_StatsKey.runs] == 2, "Expected 2 KATch runs"
+    assert stats[_StatsKey.callsPerMethod] == "areNotEquiv:1;checkProperty:2"
+    katch.writeLatencyReport(str(tmp_path))
+    report = (tmp_path / "katch_latencies.txt").read_text()
+    assert "checkProperty: count=2" in report, "Expected checkProperty latencies"
+    assert "Slowest 2 KATch runs" in report, "Expected the slowest runs"
+    assert f"{NKPL_CHECK} (@a = 1) {NKPL_NOT_EQUIV} (@a = 2)" in report
+
+
+
+def _writeScript(path, command: str) -> str:
+    path.write_text(f"#!/bin/sh\n{command}\n")
+    path.chmod(0o755)
+    return str(path)
+
+
+def test_runNPKLProgram_timed_out_process_raises_katch_error(tmp_path):
+    toolPath = _writeScript(tmp_path / "katch.sh", "sleep 60")
+    katch = KATchComm(toolPath, str(tmp_path), timeout=0.1)
+    npklProgram = f"{NKPL_CHECK} {NKPL_FALSE} {NKPL_NOT_EQUIV} {NKPL_TRUE}"
+    with pytest.raises(KATchError):
+        katch._runNPKLProgram(npklProgram)
+    assert list(tmp_path.glob("*.nkpl")) == [], "Expected the NPKL file to be removed."
+
+
+def test_runNPKLProgram_timed_out_session_raises_katch_error(tmp_path):
+    log = tmp_path / "runs.log"
+    toolPath = _writeScript(tmp_path / "katch.sh", f"echo run >> {log}")
+    sessionPath = _writeScript(tmp_path / "katch_session.sh", "sleep 60")
+    katch = KATchComm(toolPath, str(tmp_path), sessionPath, timeout=0.1)
+    npklProgram = f"{NKPL_CHECK} {NKPL_FALSE} {NKPL_NOT_EQUIV} {NKPL_TRUE}"
+    with pytest.raises(KATchError):
+        katch._runNPKLProgram(npklProgram)
+    katch.close()
+    assert not log.exists(), "The program should not be run again in a new process"
+    assert katch._sessionFailures == 0, "A timeout should not disable sessions"
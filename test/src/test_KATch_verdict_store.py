@@ -0,0 +1,57 @@
+import sqlite3
+
+from src.KATch_verdict_store import KATchVerdictStore, katchHash
+
+
+def test_get_unknown_check_returns_none(tmp_path):
+    store = KATchVerdictStore(str(tmp_path), "hash", 1)
+    assert store.get("check 0") is None, "Expected no verdict"
+    assert store.stats.misses == 1, "Expected 1 miss"
+    store.close()
+
+
+def test_put_verdicts_are_reused_by_new_store(tmp_path):
+    store = KATchVerdictStore(str(tmp_path), "hash", 1)
+    store.put("check 0", True)
+    store.put("check 1", False)
+    store.close()
+
+    store = KATchVerdictStore(str(tmp_path), "hash", 1)
+    assert store.get("check 0") is True, "Expected stored verdict True"
+    assert store.get("check 1") is False, "Expected stored verdict False"
+    assert store.stats.hits == 2, "Expected 2 hits"
+    store.close()
+
+
+def test_get_verdicts_of_other_katch_version_are_not_reused(tmp_path):
+    store = KATchVerdictStore(str(tmp_path), "hash", 1)
+    store.put("check 0", True)
+    store.close()
+
+    store = KATchVerdictStore(str(tmp_path), "otherHash", 1)
+    assert store.get("check 0") is None, "Expected no verdict for other KATch version"
+    store.close()
+
+
+def test_put_size_limit_evicts_least_recently_used_verdicts(tmp_path):
+    store = KATchVerdictStore(str(tmp_path), "hash", 0)
+    store.put("check 0", True)
+    for i in range(1, 100):
+        store.put(f"check {i}", True)
+    conn = sqlite3.connect(store.dbPath)
+    rowCount = conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+    conn.close()
+    assert rowCount < 100, f"Expected evicted verdicts, found {rowCount}"
+    assert store.get("check 0") is None, "Expected oldest verdict to be evicted"
+    assert store.get("check 99") is True, "Expected newest verdict to be kept"
+    store.close()
+
+
+def test_katchHash_jar_change_changes_hash(tmp_path):
+    toolPath = tmp_path / "katch.sh"
+    toolPath.write_text("#!/bin/bash")
+    jarPath = tmp_path / "katch.jar"
+    jarPath.write_bytes(b"v1")
+    hash1 = katchHash(str(toolPath))
+    jarPath.write_bytes(b"v2")
+    assert hash1 != katchHash(str(toolPath)), "Expected different hashes"
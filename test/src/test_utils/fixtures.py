@@ -1,9 +1,19 @@
-from test.src.test_utils.util import KATCH_PATH
+import os
+from collections.abc import Callable
+from test.src.test_utils.util import (
+    EXAMPLES_DIR,
+    KATCH_PATH,
+    KATCH_SESSION_PATH,
+    MAUDE_FILES_PATH,
+)
 
 import pytest
 
 from src.KATch_comm import KATchComm
+from src.model.dnk_maude_model import DNKMaudeModel
+from src.tracer_config import TracerConfig
 from src.util import DyNetKATSymbols as sym
+from src.util import readFile
 
 
 @pytest.fixture
@@ -13,6 +23,24 @@ def katch(tmp_path) -> KATchComm:
     return KATchComm(KATCH_PATH, str(outputDir))
 
 
+@pytest.fixture
+def katchWithSession(tmp_path):
+    outputDir = tmp_path / "katch_test_output"
+    outputDir.mkdir()
+    katch = KATchComm(KATCH_PATH, str(outputDir), KATCH_SESSION_PATH)
+    yield katch
+    katch.close()
+
+
+@pytest.fixture
+def katchWithWorkers(tmp_path):
+    outputDir = tmp_path / "katch_test_output"
+    outputDir.mkdir()
+    katch = KATchComm(KATCH_PATH, str(outputDir), workers=4)
+    yield katch
+    katch.close()
+
+
 @pytest.fixture
 def flowRule1():
     return (
@@ -30,3 +58,29 @@ def flowRule2():
 @pytest.fixture
 def flowRule3():
     return f"field1 {sym.EQUAL} 50 {sym.AND} field2 {sym.EQUAL} 32 {sym.AND} field3 {sym.ASSIGN} 60"
+
+
+@pytest.fixture
+def firewallModel() -> DNKMaudeModel:
+    return DNKMaudeModel.fromJson(
+        readFile(os.path.join(EXAMPLES_DIR, "firewall", "firewall.json"))
+    )
+
+
+@pytest.fixture
+def newConfig(tmp_path) -> Callable[..., TracerConfig]:
+    """Returns a function building a tracer config writing to the test's
+    temporary directory. Its keyword arguments are passed to TracerConfig."""
+
+    def _newConfig(threads: int = 1, **kwargs) -> TracerConfig:
+        return TracerConfig(
+            outputDirPath=str(tmp_path),
+            katchPath=KATCH_PATH,
+            maudeFilesDirPath=MAUDE_FILES_PATH,
+            threads=threads,
+            verbose=False,
+            inputFileName="test",
+            **kwargs,
+        )
+
+    return _newConfig
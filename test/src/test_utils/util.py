@@ -1,9 +1,23 @@
 import inspect
 import os
 import test.src
+from typing import List, Tuple
 
 import src
+from src.generator.trace_tree import TraceTree
 
 PROJECT_DIR = os.path.dirname(inspect.getabsfile(src))
 TEST_DIR = os.path.dirname(inspect.getabsfile(test.src))
 KATCH_PATH = os.path.join(PROJECT_DIR, "..", "bin", "katch", "katch.sh")
+KATCH_SESSION_PATH = os.path.join(PROJECT_DIR, "..", "bin", "katch", "katch_session.sh")
+MAUDE_FILES_PATH = os.path.join(PROJECT_DIR, "maude")
+EXAMPLES_DIR = os.path.join(PROJECT_DIR, "..", "examples")
+
+
+def traceLabels(traceTree: TraceTree, fromNode: int = 0) -> List[Tuple[str, ...]]:
+    """Returns the sorted transition labels of the traces whose leaf is one of
+    the nodes added after the first 'fromNode' nodes of the given tree."""
+    return sorted(
+        tuple(str(node.trans) for node in trace)
+        for trace in traceTree.getTraceIterator(fromNode)
+    )